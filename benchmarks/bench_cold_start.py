@@ -0,0 +1,139 @@
+"""Orçamento de partida a frio do dashboard: tempo até o primeiro KPI e página completa.
+
+Cada medição roda em um processo Python novo (sem módulos nem caches
+carregados), com uma base já publicada como versão: mede a importação das
+dependências do app, o tempo até o primeiro card de KPI ser enviado e o tempo
+até a primeira execução terminar. Sai com código 1 se algum tempo passar do
+orçamento, para ser usado como verificação antes de publicar mudanças.
+
+Uso:
+    python benchmarks/bench_cold_start.py [--sizes 1000000] [--runs 3]
+                                          [--budget-import 2.0] [--budget-first-kpi 3.0]
+                                          [--output relatorio.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import generate_leads  # noqa: E402
+from leads_core import LeadStore  # noqa: E402
+
+# Orçamentos padrão (s): importação das dependências e início do processo até o primeiro KPI
+BUDGET_IMPORT_S = 2.0
+BUDGET_FIRST_KPI_S = 3.0
+
+# Executado em um processo novo, com o diretório da base como diretório atual
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import streamlit as st
+import leads_core, charts
+imported = time.perf_counter()
+
+marks = {{}}
+markdown = st.markdown
+def probe_markdown(body, *args, **kwargs):
+    # Primeiro card de KPI enviado pela página
+    if 'metric-value' in str(body) and 'first_kpi' not in marks:
+        marks['first_kpi'] = time.perf_counter()
+        # O Streamlit já importa plotly.graph_objects (carga preguiçosa); o custo está no plotly.express
+        marks['plotly_loaded'] = 'plotly.express' in sys.modules
+    return markdown(body, *args, **kwargs)
+st.markdown = probe_markdown
+
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=600)
+app.run()
+done = time.perf_counter()
+print(json.dumps({{
+    'import_s': imported - start,
+    'first_kpi_s': marks.get('first_kpi', done) - start,
+    'full_page_s': done - start,
+    'plotly_before_kpi': marks.get('plotly_loaded'),
+    'errors': [e.message for e in app.exception] + [e.value for e in app.error],
+}}))
+"""
+
+def measure(data_dir, runs):
+    """Mediana de `runs` partidas a frio (cada uma em um processo novo)"""
+    probe = PROBE.format(root=str(ROOT), app=str(ROOT / 'dashboard_app.py'))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', probe],
+            cwd=data_dir.parent,
+            env={**os.environ, 'DASHBOARD_PROFILING': '0'},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    errors = [error for sample in samples for error in sample['errors']]
+    if errors:
+        raise RuntimeError(f"Erro ao executar o dashboard: {errors[0]}")
+    result = {
+        key: statistics.median(sample[key] for sample in samples)
+        for key in ('import_s', 'first_kpi_s', 'full_page_s')
+    }
+    result['plotly_before_kpi'] = any(sample['plotly_before_kpi'] for sample in samples)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000],
+                        help="bases sintéticas medidas além da base real")
+    parser.add_argument('--base', type=Path, default=ROOT / 'data' / 'base_leads.xlsx')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--budget-import', type=float, default=BUDGET_IMPORT_S,
+                        help="máximo (s) para importar as dependências do app")
+    parser.add_argument('--budget-first-kpi', type=float, default=BUDGET_FIRST_KPI_S,
+                        help="máximo (s) do início do processo até o primeiro KPI")
+    parser.add_argument('--output', type=Path, help="grava as medições em JSON")
+    args = parser.parse_args()
+
+    workloads = []
+    if args.base and args.base.exists():
+        workloads.append(('base_leads', lambda: pd.read_excel(args.base)))
+    for n_rows in args.sizes:
+        workloads.append((f"synthetic_{n_rows}", lambda n_rows=n_rows: generate_leads(n_rows, seed=args.seed)))
+
+    budgets = {'import_s': args.budget_import, 'first_kpi_s': args.budget_first_kpi}
+    print(f"{'base':>18} {'import (s)':>11} {'1º KPI (s)':>11} {'página (s)':>11}  plotly.express antes do KPI")
+    report, failures = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workload, load in workloads:
+            data_dir = Path(tmp) / workload / 'data'
+            LeadStore(data_dir).save(load())
+            result = measure(data_dir, args.runs)
+            report.append({'workload': workload, **result})
+            print(f"{workload:>18} {result['import_s']:>11.2f} {result['first_kpi_s']:>11.2f} "
+                  f"{result['full_page_s']:>11.2f}  {'sim' if result['plotly_before_kpi'] else 'não'}")
+            failures.extend(
+                f"{workload}: {key} = {result[key]:.2f}s > {budget:.2f}s"
+                for key, budget in budgets.items() if result[key] > budget
+            )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({'budgets': budgets, 'results': report}, indent=2))
+
+    if failures:
+        print("\n⚠️ Acima do orçamento:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"\n✅ Dentro do orçamento (import ≤ {args.budget_import:.2f}s, 1º KPI ≤ {args.budget_first_kpi:.2f}s)")
+
+if __name__ == '__main__':
+    main()
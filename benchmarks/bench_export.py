@@ -0,0 +1,62 @@
+"""Benchmark dos formatos de exportação: tempo de geração e tamanho do arquivo.
+
+Compara o caminho original (pd.ExcelWriter com engine='openpyxl') com o Excel
+em modo streaming, o CSV em blocos e o Parquet.
+
+Uso:
+    python benchmarks/bench_export.py [--sizes 10000 100000]
+"""
+import argparse
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import timed  # noqa: E402
+from benchmarks.synthetic import generate_leads  # noqa: E402
+from leads_core import (  # noqa: E402
+    EXCEL_MAX_ROWS,
+    EXPORT_FORMATS,
+    FilterSelection,
+    compute_filter_result,
+    detail_frame,
+    prepare_data,
+    summary_rows,
+)
+
+def legacy_excel_export(frame, metrics):
+    """Implementação anterior: modelo completo do openpyxl via pd.ExcelWriter"""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        frame.to_excel(writer, index=False, sheet_name='Leads Filtrados')
+        pd.DataFrame(summary_rows(metrics), columns=['Métrica', 'Valor']).to_excel(
+            writer, index=False, sheet_name='Resumo'
+        )
+    return buffer.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    args = parser.parse_args()
+    
+    builders = {'xlsx (pd.ExcelWriter)': legacy_excel_export}
+    builders.update({f"{fmt} (dashboard)": spec['builder'] for fmt, spec in EXPORT_FORMATS.items()})
+    
+    print(f"{'linhas':>10} {'formato':<24} {'tempo (s)':>10} {'tamanho (MB)':>13}")
+    for n_rows in args.sizes:
+        data = prepare_data(generate_leads(n_rows))
+        result = compute_filter_result(data, FilterSelection())
+        frame = detail_frame(data, result.row_ids)
+        
+        for name, builder in builders.items():
+            if name.startswith('xlsx') and n_rows > EXCEL_MAX_ROWS:
+                print(f"{n_rows:>10,} {name:<24} {'acima do limite de linhas do Excel':>24}")
+                continue
+            elapsed, _, content = timed(builder, frame, result.metrics, repeat=1)
+            print(f"{n_rows:>10,} {name:<24} {elapsed:>10.3f} {len(content) / 1024 / 1024:>13.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Benchmark da coluna 'Status (Detalhado)': apply linha a linha vs. derivação vetorizada.
+
+Uso:
+    python benchmarks/bench_status_detalhado.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import timed  # noqa: E402
+from benchmarks.synthetic import generate_leads  # noqa: E402
+from leads_core import build_derived, prepare_data  # noqa: E402
+
+def row_wise(df):
+    """Implementação anterior: DataFrame.apply com axis=1"""
+    return df.apply(
+        lambda row: row['Status'] if row['Info Disparo'].strip().lower() == 'não disparado' else '—',
+        axis=1
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    
+    print(f"{'linhas':>10} {'apply (s)':>12} {'vetorizado (s)':>15} {'speedup':>9}")
+    for n_rows in args.sizes:
+        df = generate_leads(n_rows)
+        canon = prepare_data(df).canon
+        
+        # Resultados precisam ser idênticos antes de comparar tempos
+        expected = row_wise(df.astype({'Status': object, 'Info Disparo': object}))
+        assert (build_derived(canon)['Status (Detalhado)'].astype(object) == expected).all()
+        
+        t_apply = timed(row_wise, df, repeat=1)[0]
+        t_vector = timed(build_derived, canon)[0]
+        print(f"{n_rows:>10,} {t_apply:>12.3f} {t_vector:>15.4f} {t_apply / t_vector:>8.0f}x")
+
+if __name__ == '__main__':
+    main()
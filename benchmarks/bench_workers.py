@@ -0,0 +1,127 @@
+"""Memória com vários workers: cópia da base por processo × dataset compartilhado mapeado em memória.
+
+Sobe N processos novos (como os workers do Streamlit atrás de um proxy); cada
+um abre a versão atual, aplica filtros e lê páginas da tabela. Com todos
+vivos, mede a memória de cada um em /proc/self/smaps_rollup (Linux). O PSS
+divide as páginas compartilhadas entre os processos que as usam, então a soma
+do PSS é a memória física realmente ocupada pela base em todos os workers.
+
+Uso:
+    python benchmarks/bench_workers.py [--rows 1000000] [--workers 1 2 4 8]
+                                       [--data-dir data] [--output relatorio.json]
+"""
+import argparse
+import json
+import multiprocessing
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import generate_leads  # noqa: E402
+from leads_core import FilterSelection, LeadStore  # noqa: E402
+
+MODES = {'copia': False, 'compartilhado': True}
+
+def memory_mb():
+    """PSS e memória privada do processo atual (MB)"""
+    text = Path('/proc/self/smaps_rollup').read_text()
+    values = {key: int(value) / 1024 for key, value in re.findall(r'^(\w+):\s+(\d+) kB', text, re.M)}
+    return {'pss': values['Pss'], 'private': values['Private_Clean'] + values['Private_Dirty']}
+
+def worker(data_dir, shared, loaded, release, results):
+    """Abre a versão atual, consulta como uma sessão do visualizador e mede a memória"""
+    before = memory_mb()
+    start = time.perf_counter()
+    store = LeadStore(data_dir, shared=shared)
+    result = store.filter(FilterSelection())
+    store.page(result, 1)
+    colegio = store.engine().options()['colegios'][0]
+    store.page(store.filter(FilterSelection(colegios=(colegio,))), 1)
+    load_s = time.perf_counter() - start
+
+    # Mede só com todos os workers vivos (o PSS depende de quantos dividem as páginas)
+    loaded.wait()
+    after = memory_mb()
+    results.put({
+        'load_s': load_s,
+        'pss_mb': after['pss'] - before['pss'],
+        'private_mb': after['private'] - before['private'],
+    })
+    release.wait()
+
+def measure(data_dir, shared, n_workers):
+    """Memória da base somada entre `n_workers` processos novos e tempo de carga de cada um"""
+    context = multiprocessing.get_context('spawn')
+    loaded = context.Barrier(n_workers + 1)
+    release = context.Barrier(n_workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(data_dir, shared, loaded, release, results))
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    loaded.wait()
+    samples = [results.get() for _ in processes]
+    release.wait()
+    for process in processes:
+        process.join()
+
+    return {
+        'workers': n_workers,
+        'load_s': statistics.median(sample['load_s'] for sample in samples),
+        'pss_total_mb': sum(sample['pss_mb'] for sample in samples),
+        'pss_worker_mb': statistics.median(sample['pss_mb'] for sample in samples),
+        'private_worker_mb': statistics.median(sample['private_mb'] for sample in samples),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help="linhas da base sintética")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--data-dir', type=Path,
+                        help="diretório de uma base já publicada (em vez da sintética)")
+    parser.add_argument('--output', type=Path, help="grava as medições em JSON")
+    args = parser.parse_args()
+
+    if not Path('/proc/self/smaps_rollup').exists():
+        sys.exit("Este benchmark lê /proc/self/smaps_rollup e só roda no Linux")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = Path(tmp) / 'data'
+            print(f"Gerando base sintética com {args.rows:,} linhas...")
+            LeadStore(data_dir, shared=False).save(generate_leads(args.rows, seed=args.seed))
+
+        # O dataset compartilhado é gravado uma vez antes dos workers (como no upload da versão)
+        store = LeadStore(data_dir, shared=True)
+        start = time.perf_counter()
+        version_dir = store.versions.dataset_dir(store.current_version())
+        size = sum(path.stat().st_size for path in version_dir.glob('*.arrow'))
+        print(f"Dataset compartilhado: {size / 1024 / 1024:.0f} MB "
+              f"(pronto em {time.perf_counter() - start:.2f}s)\n")
+
+        print(f"{'modo':>14} {'workers':>8} {'carga (s)':>10} {'PSS total (MB)':>15} "
+              f"{'PSS/worker (MB)':>16} {'privada/worker (MB)':>20}")
+        report = []
+        for mode, shared in MODES.items():
+            for n_workers in args.workers:
+                result = {'mode': mode, **measure(data_dir, shared, n_workers)}
+                report.append(result)
+                print(f"{mode:>14} {n_workers:>8} {result['load_s']:>10.2f} {result['pss_total_mb']:>15.0f} "
+                      f"{result['pss_worker_mb']:>16.0f} {result['private_worker_mb']:>20.0f}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({'base': str(args.data_dir or f'synthetic_{args.rows}'), 'results': report}, indent=2))
+
+if __name__ == '__main__':
+    main()
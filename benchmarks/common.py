@@ -0,0 +1,13 @@
+"""Utilitários compartilhados pelos benchmarks"""
+import statistics
+import time
+
+def timed(func, *args, repeat=3):
+    """Executa `func(*args)` `repeat` vezes; retorna (melhor, mediana, último resultado)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times), result
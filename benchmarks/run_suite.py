@@ -0,0 +1,270 @@
+"""Suíte de benchmarks do dashboard: etapa por etapa, em bases sintéticas de 10k a 1M linhas.
+
+Mede carga (.xlsx em streaming e snapshot Parquet), normalização de ingestão,
+cada combinação de filtros, métricas, séries dos gráficos, montagem das
+figuras, paginação/formatação da tabela e cada formato de exportação, e grava
+um relatório JSON para comparar execuções (--compare).
+
+Uso:
+    python benchmarks/run_suite.py [--sizes 10000 100000 1000000] [--engines pandas sqlite]
+                                   [--base data/base_leads.xlsx] [--output relatorio.json]
+                                   [--compare relatorio_anterior.json]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.common import timed  # noqa: E402
+from benchmarks.synthetic import generate_leads  # noqa: E402
+from charts import CHARTS  # noqa: E402
+from leads_core import (  # noqa: E402
+    EXCEL_MAX_ROWS,
+    EXPORT_FORMATS,
+    FilterSelection,
+    PandasQueryEngine,
+    SQLiteQueryEngine,
+    arrow_compatible,
+    auto_granularity,
+    calculate_metrics,
+    cube_series,
+    iter_frame_chunks,
+    prepare_data,
+    read_excel_streaming,
+    selection_mask,
+    write_sqlite,
+    write_xlsx,
+)
+
+def filter_selections(data):
+    """Todas as combinações dos quatro filtros da sidebar, com valores típicos"""
+    canon = data.canon
+    dias = canon['dia'].dropna()
+    start, end = dias.min().date(), dias.max().date()
+    middle = start + (end - start) / 2
+    
+    values = {
+        'colegio': {'colegios': tuple(canon['colegio'].value_counts().index[:2])},
+        'periodo': {'data_inicio': middle, 'data_fim': end},
+        'disparo': {'disparo': ('Não disparado',)},
+        'status': {'status': tuple(canon['status'].value_counts().index[:3])},
+    }
+    selections = {'sem_filtros': FilterSelection()}
+    for size in range(1, len(values) + 1):
+        for names in combinations(values, size):
+            fields = {}
+            for name in names:
+                fields.update(values[name])
+            selections['+'.join(names)] = FilterSelection(**fields)
+    return selections
+
+class Suite:
+    """Coleta os tempos de cada etapa para uma base"""
+    
+    def __init__(self, workload, repeat):
+        self.workload = workload
+        self.repeat = repeat
+        self.results = []
+    
+    def measure(self, stage, func, rows_in=None, rows_out=None, repeat=None):
+        best, median, result = timed(func, repeat=repeat or self.repeat)
+        out = rows_out(result) if callable(rows_out) else rows_out
+        self.results.append({
+            'workload': self.workload,
+            'stage': stage,
+            'best_s': round(best, 6),
+            'median_s': round(median, 6),
+            'rows_in': rows_in,
+            'rows_out': out,
+        })
+        print(f"{self.workload:>14} {stage:<48} {best:>10.4f} {median:>10.4f}", flush=True)
+        return result
+    
+    def skip(self, stage, reason):
+        self.results.append({'workload': self.workload, 'stage': stage, 'skipped': reason})
+        print(f"{self.workload:>14} {stage:<48} {'(pulado: ' + reason + ')':>21}", flush=True)
+
+def run_workload(suite, df, engines, xlsx_max_rows, tmp_dir):
+    n_rows = len(df)
+    
+    # Carga: .xlsx em streaming (upload) e snapshot Parquet (versão já gravada)
+    xlsx_file = tmp_dir / f"{suite.workload}.xlsx"
+    if n_rows <= xlsx_max_rows:
+        write_xlsx(df, xlsx_file)
+        suite.measure('load.xlsx_streaming', lambda: read_excel_streaming(xlsx_file)[0],
+                      rows_out=len, repeat=1)
+    else:
+        suite.skip('load.xlsx_streaming', f"acima de --xlsx-max-rows ({xlsx_max_rows:,})")
+    
+    parquet_file = tmp_dir / f"{suite.workload}.parquet"
+    arrow_compatible(df).to_parquet(parquet_file, index=False)
+    raw = suite.measure('load.parquet', lambda: pd.read_parquet(parquet_file), rows_out=len)
+    
+    # Normalização de ingestão (colunas canônicas, derivadas, cubo e índice)
+    data = suite.measure('ingest.prepare_data', lambda: prepare_data(raw, 'bench'), rows_in=n_rows,
+                         rows_out=lambda data: len(data.cube))
+    
+    selections = filter_selections(data)
+    
+    # Etapas do cálculo de uma seleção, isoladas
+    for name, selection in selections.items():
+        cube = data.cube[selection_mask(data.cube, selection)]
+        suite.measure(f"filter.{name}.row_ids", lambda: data.index.row_ids(selection),
+                      rows_in=n_rows, rows_out=len)
+        suite.measure(f"metrics.{name}", lambda: calculate_metrics(cube), rows_in=len(cube))
+        suite.measure(f"series.{name}", lambda: cube_series(cube), rows_in=len(cube))
+    
+    # Figuras dos gráficos do visualizador (sem filtros)
+    result = PandasQueryEngine(data).compute(selections['sem_filtros'])
+    span = (data.canon['dia'].max() - data.canon['dia'].min()).days
+    granularity = auto_granularity(span)
+    chart_sources = {
+        'disparo': result.series,
+        'colegios': result.series,
+        'timeline': (result.series, granularity),
+        'nao_disparados_status': result.series,
+        'admin_disparo': data,
+        'admin_colegios': data,
+    }
+    for chart_id, source in chart_sources.items():
+        suite.measure(f"chart.{chart_id}", lambda: CHARTS[chart_id](source).to_json())
+    
+    # Motores de consulta: seleção completa, páginas da tabela e linhas da exportação
+    for engine_name in engines:
+        if engine_name == 'sqlite':
+            db_file = tmp_dir / f"{suite.workload}.sqlite"
+            suite.measure('sqlite.build', lambda: write_sqlite(db_file, iter_frame_chunks(raw)),
+                          rows_in=n_rows, repeat=1)
+            engine = SQLiteQueryEngine(db_file, 'bench')
+        else:
+            engine = PandasQueryEngine(data)
+        
+        for name, selection in selections.items():
+            suite.measure(f"{engine_name}.compute.{name}", lambda: engine.compute(selection),
+                          rows_in=n_rows, rows_out=lambda r: r.metrics['total_leads'])
+        
+        selection = selections['sem_filtros']
+        result = engine.compute(selection)
+        last_page = max(1, -(-n_rows // 20))
+        suite.measure(f"{engine_name}.table.page1", lambda: engine.page(selection, result, 1, 20),
+                      rows_in=n_rows, rows_out=len)
+        suite.measure(f"{engine_name}.table.last_page", lambda: engine.page(selection, result, last_page, 20),
+                      rows_in=n_rows, rows_out=len)
+        for column in ('Nome', 'Data de criação do Lead Raiz', 'Status (Detalhado)'):
+            suite.measure(f"{engine_name}.table.sorted.{column}",
+                          lambda: engine.page(selection, result, 1, 20, column, True),
+                          rows_in=n_rows, rows_out=len)
+        suite.measure(f"{engine_name}.export.rows", lambda: engine.rows(selection, result),
+                      rows_in=n_rows, rows_out=len)
+    
+    # Formatos de exportação sobre a base completa
+    engine = PandasQueryEngine(data)
+    result = engine.compute(selections['sem_filtros'])
+    frame = engine.rows(selections['sem_filtros'], result)
+    for fmt, spec in EXPORT_FORMATS.items():
+        if fmt == 'xlsx' and n_rows > min(xlsx_max_rows, EXCEL_MAX_ROWS):
+            suite.skip(f"export.{fmt}", f"acima de --xlsx-max-rows ({xlsx_max_rows:,})")
+            continue
+        content = suite.measure(f"export.{fmt}", lambda: spec['builder'](frame, result.metrics),
+                                rows_in=len(frame), repeat=1)
+        suite.results[-1]['bytes'] = len(content)
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    import pyarrow
+    import plotly
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pyarrow.__version__,
+        'plotly': plotly.__version__,
+    }
+
+def compare(report, baseline_file):
+    """Tabela melhor tempo atual vs. relatório anterior (mesma base e etapa)"""
+    baseline = json.loads(Path(baseline_file).read_text())
+    previous = {
+        (row['workload'], row['stage']): row['best_s']
+        for row in baseline['results'] if 'best_s' in row
+    }
+    print(f"\n{'base':>14} {'etapa':<48} {'antes (s)':>10} {'agora (s)':>10} {'razão':>7}")
+    for row in report['results']:
+        before = previous.get((row['workload'], row['stage']))
+        if before is None or 'best_s' not in row:
+            continue
+        ratio = row['best_s'] / before if before > 0 else float('inf')
+        flag = '  ⚠️' if ratio > 1.25 else ''
+        print(f"{row['workload']:>14} {row['stage']:<48} {before:>10.4f} {row['best_s']:>10.4f} {ratio:>6.2f}x{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--engines', nargs='+', default=['pandas', 'sqlite'], choices=['pandas', 'sqlite'])
+    parser.add_argument('--base', type=Path, default=ROOT / 'data' / 'base_leads.xlsx',
+                        help="base real incluída como workload 'base_leads' (se existir)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--xlsx-max-rows', type=int, default=100_000,
+                        help="acima disso, carga e exportação .xlsx são puladas (muito lentas)")
+    parser.add_argument('--output', type=Path,
+                        default=ROOT / 'benchmarks' / 'results' / f"suite_{datetime.now():%Y%m%d_%H%M%S}.json")
+    parser.add_argument('--compare', type=Path, help="relatório anterior para comparação")
+    args = parser.parse_args()
+    
+    workloads = []
+    if args.base and args.base.exists():
+        workloads.append(('base_leads', lambda: pd.read_excel(args.base)))
+    for n_rows in args.sizes:
+        workloads.append((f"synthetic_{n_rows}", lambda n_rows=n_rows: generate_leads(n_rows, seed=args.seed)))
+    
+    report = {
+        'environment': environment(),
+        'parameters': {
+            'sizes': args.sizes,
+            'engines': args.engines,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'xlsx_max_rows': args.xlsx_max_rows,
+            'base': str(args.base) if args.base and args.base.exists() else None,
+        },
+        'results': [],
+    }
+    
+    print(f"{'base':>14} {'etapa':<48} {'melhor (s)':>10} {'mediana':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for workload, load in workloads:
+            suite = Suite(workload, args.repeat)
+            run_workload(suite, load(), args.engines, args.xlsx_max_rows, Path(tmp))
+            report['results'].extend(suite.results)
+    
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+    print(f"\nRelatório: {args.output}")
+    
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == '__main__':
+    main()
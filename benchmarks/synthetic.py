@@ -0,0 +1,78 @@
+"""Gerador de bases sintéticas de leads no mesmo formato de data/base_leads.xlsx.
+
+Usado pelos benchmarks para medir o dashboard em escalas maiores que a base real.
+"""
+import numpy as np
+import pandas as pd
+
+# Cardinalidades e proporções aproximadas da base real (9.440 leads, 13 colégios)
+COLEGIOS = {
+    'Matriz Educação': 3340,
+    'Colégio QI': 2057,
+    'APOGEU': 1227,
+    'Creche Global Tree': 662,
+    'Unificado': 476,
+    'CLV': 466,
+    'Sá Pereira': 459,
+    'Colégio Ao Cubo': 396,
+    'Sarah Dawsey': 202,
+    'Escola SAP': 145,
+    'NOVO COLÉGIO AMERICANO': 116,
+    'COLÉGIO UNIÃO': 98,
+    '(Nenhum valor)': 2,
+}
+
+STATUS = {
+    'Leads (LEADS RAIZ 2026)': 3401,
+    'Agendamento Realizado (LEADS RAIZ 2026)': 3060,
+    'Leads contatados (LEADS RAIZ 2026)': 1053,
+    'Visita Realizada (LEADS RAIZ 2026)': 890,
+    'Declinado (LEADS RAIZ 2026)': 688,
+    'Tabulado pela central': 343,
+    'Matriculado Total (LEADS RAIZ 2026)': 139,
+    'Sem contato vinculado': 66,
+    'Sem telefone': 5,
+    '(Nenhum valor)': 1,
+}
+
+# Variações de grafia encontradas em planilhas montadas à mão
+INFO_DISPARO = {
+    'Disparado': 0.85,
+    'disparado ': 0.02,
+    'Não disparado': 0.10,
+    ' NÃO DISPARADO': 0.03,
+}
+
+PRIMEIROS_NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Élida', 'Fábio', 'Gabriel', 'Helena', 'Íris', 'João']
+SOBRENOMES = ['Silva', 'Souza', 'Oliveira', 'Conceição', 'Araújo', 'Pereira', 'Gonçalves', 'Lima']
+
+def _choice(rng, weights, size):
+    values = list(weights)
+    probs = np.array(list(weights.values()), dtype=float)
+    return rng.choice(np.array(values, dtype=object), size=size, p=probs / probs.sum())
+
+def generate_leads(n_rows, seed=42, start='2024-01-01', days=730):
+    """Gera `n_rows` leads com as colunas obrigatórias e as colunas da tabela detalhada"""
+    rng = np.random.default_rng(seed)
+    
+    created = (
+        pd.Timestamp(start)
+        + pd.to_timedelta(rng.integers(0, days, n_rows), unit='D')
+        + pd.to_timedelta(rng.integers(0, 24 * 60, n_rows), unit='min')
+    )
+    nomes = (
+        pd.Series(rng.choice(PRIMEIROS_NOMES, n_rows))
+        + ' '
+        + pd.Series(rng.choice(SOBRENOMES, n_rows))
+    )
+    telefones = rng.integers(21_900_000_000, 21_999_999_999, n_rows)
+    
+    return pd.DataFrame({
+        'Data de criação do Lead Raiz': created,
+        'Nome': nomes,
+        'E-mail': [f"lead{i}@exemplo.com.br" for i in range(n_rows)],
+        'Número de telefone': telefones,
+        'Colégio de Interesse': _choice(rng, COLEGIOS, n_rows),
+        'Info Disparo': _choice(rng, INFO_DISPARO, n_rows),
+        'Status': _choice(rng, STATUS, n_rows),
+    })
@@ -0,0 +1,156 @@
+"""Figuras Plotly dos gráficos do dashboard, montadas a partir das séries do núcleo (leads_core).
+
+O Plotly só é importado quando a primeira figura é montada, para não pesar na
+partida do app (os KPIs aparecem antes dos gráficos).
+"""
+from leads_core import TIMELINE_GRANULARITIES, TIMELINE_MAX_POINTS, timeline_points
+
+def chart_disparo(series):
+    """Pizza - Distribuição de Disparos"""
+    import plotly.graph_objects as go
+    
+    disparo_counts = series['disparo']
+    
+    fig = go.Figure(data=[go.Pie(
+        labels=disparo_counts.index,
+        values=disparo_counts.values,
+        hole=0.5,
+        marker=dict(colors=['#00c853', '#ff6f00']),
+        textposition='inside',
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>'
+    )])
+    
+    fig.update_layout(
+        title="Distribuição de Disparos",
+        height=400,
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
+        margin=dict(t=50, b=20, l=20, r=20)
+    )
+    return fig
+
+def chart_colegios(series):
+    """Barras - Top 10 Colégios por volume de leads"""
+    import plotly.express as px
+    
+    colegio_counts = series['colegios'].head(10)
+    
+    fig = px.bar(
+        x=colegio_counts.values,
+        y=colegio_counts.index,
+        orientation='h',
+        title="Top 10 Colégios por Volume de Leads",
+        color=colegio_counts.values,
+        color_continuous_scale='Viridis',
+        labels={'x': 'Quantidade de Leads', 'y': 'Colégio'}
+    )
+    
+    fig.update_layout(
+        height=400,
+        showlegend=False,
+        xaxis_title="Quantidade de Leads",
+        yaxis_title="",
+        margin=dict(t=50, b=20, l=20, r=20)
+    )
+    
+    fig.update_traces(
+        hovertemplate='<b>%{y}</b><br>Leads: %{x}<extra></extra>'
+    )
+    return fig
+
+def chart_timeline(source):
+    """Área - Volume de leads ao longo do tempo, no agrupamento escolhido"""
+    import plotly.express as px
+    
+    series, granularity = source
+    _, hover_format = TIMELINE_GRANULARITIES[granularity]
+    
+    fig = px.area(
+        timeline_points(series['timeline'], granularity, TIMELINE_MAX_POINTS),
+        x='Data',
+        y='Quantidade',
+        title=f"Volume de Leads ao Longo do Tempo (por {granularity.lower()})",
+        color_discrete_sequence=['#1f77b4']
+    )
+    
+    fig.update_traces(
+        fill='tozeroy',
+        line=dict(width=2),
+        hovertemplate=f'<b>{granularity}:</b> %{{x|{hover_format}}}<br><b>Leads:</b> %{{y}}<extra></extra>'
+    )
+    
+    fig.update_layout(
+        height=350,
+        hovermode='x unified',
+        xaxis_title="Data de Criação",
+        yaxis_title="Quantidade de Leads",
+        margin=dict(t=50, b=20, l=20, r=20)
+    )
+    return fig
+
+def chart_nao_disparados_status(series):
+    """Barras - Status dos leads não disparados"""
+    import plotly.express as px
+    
+    status_counts = series['nao_disparados_status'].head(8)
+    
+    fig = px.bar(
+        x=status_counts.values,
+        y=status_counts.index,
+        orientation='h',
+        title="Distribuição por Status (Leads Não Disparados)",
+        color=status_counts.values,
+        color_continuous_scale='Reds'
+    )
+    
+    fig.update_layout(
+        height=350,
+        showlegend=False,
+        xaxis_title="Quantidade",
+        yaxis_title="Status",
+        margin=dict(t=50, b=20, l=20, r=20)
+    )
+    return fig
+
+def chart_admin_disparo(data):
+    """Pizza - Distribuição de disparos da base atual (modo administrador)"""
+    import plotly.express as px
+    
+    disparo_counts = data.canon['disparo'].value_counts()
+    disparo_counts = disparo_counts[disparo_counts > 0]
+    fig = px.pie(
+        values=disparo_counts.values,
+        names=disparo_counts.index,
+        title="Distribuição de Disparos",
+        color_discrete_sequence=['#00c853', '#ff6f00'],
+        hole=0.4
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+def chart_admin_colegios(data):
+    """Barras - Top 8 colégios da base atual (modo administrador)"""
+    import plotly.express as px
+    
+    colegio_counts = data.canon['colegio'].value_counts().head(8)
+    fig = px.bar(
+        x=colegio_counts.values,
+        y=colegio_counts.index,
+        orientation='h',
+        title="Top 8 Colégios",
+        color=colegio_counts.values,
+        color_continuous_scale='Blues'
+    )
+    fig.update_layout(showlegend=False, xaxis_title="Quantidade", yaxis_title="")
+    return fig
+
+# Gráficos do dashboard: id -> função que monta a figura a partir dos dados da seleção
+CHARTS = {
+    'disparo': chart_disparo,
+    'colegios': chart_colegios,
+    'timeline': chart_timeline,
+    'nao_disparados_status': chart_nao_disparados_status,
+    'admin_disparo': chart_admin_disparo,
+    'admin_colegios': chart_admin_colegios,
+}
@@ -1,11 +1,31 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import io
+from datetime import datetime
+import json
 import os
-from pathlib import Path
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import astuple
+
+from charts import CHARTS
+from leads_core import (
+    EXPORT_FORMATS,
+    LEAD_KEY_COLUMNS,
+    LEAD_KEY_EXTRA_COLUMN,
+    PROFILING_ENABLED,
+    PROFILING_HISTORY,
+    TIMELINE_GRANULARITIES,
+    FilterSelection,
+    LeadStore,
+    LRUCache,
+    MissingColumnsError,
+    auto_granularity,
+    build_summary_csv,
+    get_profiler,
+    profile_span,
+    read_excel_streaming,
+)
 
 # Configuração da página
 st.set_page_config(
@@ -15,10 +35,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Diretório para armazenar dados
-DATA_DIR = Path("data")
-DATA_DIR.mkdir(exist_ok=True)
-DATA_FILE = DATA_DIR / "base_leads.xlsx"
+# Limite de memória do cache de figuras dos gráficos (MB)
+CHART_CACHE_MAX_MB = float(os.getenv("CHART_CACHE_MAX_MB", "32"))
 
 # Senha admin (use variável de ambiente em produção)
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin2026")
@@ -106,36 +124,118 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_data():
-    """Carrega dados do arquivo Excel"""
-    if DATA_FILE.exists():
-        try:
-            df = pd.read_excel(DATA_FILE)
-            
-            # NÃO converter data automaticamente para evitar perda de dados
-            # A conversão será feita apenas quando necessário, preservando dados originais
-            
-            return df
-        except Exception as e:
-            st.error(f"❌ Erro ao carregar dados: {str(e)}")
-            return None
-    return None
+@st.cache_resource
+def get_lead_store():
+    """Núcleo de dados (versões, filtros, exportação) único por processo do Streamlit"""
+    return LeadStore()
 
-def calculate_metrics(df):
-    """Calcula métricas do dashboard"""
-    total_leads = len(df)
-    
-    # Análise de Info Disparo
-    disparados = len(df[df['Info Disparo'].str.strip().str.lower() == 'disparado'])
-    nao_disparados = len(df[df['Info Disparo'].str.strip().str.lower() == 'não disparado'])
-    taxa_disparo = (disparados / total_leads * 100) if total_leads > 0 else 0
-    
-    return {
-        'total_leads': total_leads,
-        'disparados': disparados,
-        'nao_disparados': nao_disparados,
-        'taxa_disparo': taxa_disparo
-    }
+def show_sync_error(store):
+    """Avisa quando o data/base_leads.xlsx trocado manualmente não pôde ser importado"""
+    if store.versions.sync_error is not None:
+        st.error(f"❌ Erro ao carregar dados: {store.versions.sync_error}")
+
+def load_version_data(store, version_id):
+    """Dados em memória da versão, com o erro de leitura exibido na tela (None se falhar)"""
+    try:
+        return store.data(version_id)
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar dados: {str(e)}")
+        return None
+
+def open_engine(store, version_id):
+    """Motor de consultas da versão, com o erro de leitura exibido na tela (None se falhar)"""
+    try:
+        return store.engine(version_id)
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar dados: {str(e)}")
+        return None
+
+def load_engine(store, version_id):
+    """Motor de consultas da versão, com aviso enquanto as linhas ainda estão carregando"""
+    with st.spinner("⏳ Carregando dados..."), profile_span('viewer.engine') as span:
+        engine = open_engine(store, version_id) if version_id is not None else None
+        span['rows_out'] = engine.total_rows if engine is not None else 0
+    return engine
+
+def figure_nbytes(fig):
+    """Memória aproximada dos dados da figura (arrays e listas dos traces), sem serializá-la"""
+    total = 0
+    for trace in fig.data:
+        for value in trace.to_plotly_json().values():
+            if getattr(value, 'dtype', None) == object or isinstance(value, (list, tuple)):
+                total += sum(len(str(item)) for item in value)
+            elif hasattr(value, 'nbytes'):
+                total += value.nbytes
+    return total
+
+class ChartCache:
+    """Figuras Plotly prontas por (gráfico, chave da seleção), com tempos por gráfico.
+    
+    A chave da seleção já inclui a versão dos dados. Uma figura só é montada
+    quando a chave muda; nos demais reruns a mesma figura é reenviada, sem
+    refazer agregações nem a construção pelo Plotly Express. O spec JSON não
+    fica em cache: o st.plotly_chart só aceita a figura e a serializa a cada
+    envio (tempo medido em 'render_ms').
+    """
+    
+    def __init__(self, max_bytes):
+        self._figures = LRUCache(max_bytes)
+        self._lock = threading.Lock()
+        self._timings = {}
+    
+    def figure(self, chart_id, key, source):
+        fig = self._figures.get((chart_id, key))
+        if fig is not None:
+            self._record(chart_id, hits=1)
+            return fig
+        
+        start = time.perf_counter()
+        fig = CHARTS[chart_id](source)
+        built = time.perf_counter()
+        data_bytes = figure_nbytes(fig)
+        
+        self._figures.put((chart_id, key), fig, data_bytes)
+        self._record(
+            chart_id,
+            builds=1,
+            build_ms=(built - start) * 1000,
+            data_bytes=data_bytes,
+        )
+        return fig
+    
+    def _record(self, chart_id, hits=0, builds=0, **last):
+        with self._lock:
+            timing = self._timings.setdefault(chart_id, {
+                'hits': 0, 'builds': 0, 'build_ms': 0.0, 'render_ms': 0.0, 'data_bytes': 0,
+            })
+            timing['hits'] += hits
+            timing['builds'] += builds
+            timing.update(last)
+    
+    def record_render(self, chart_id, seconds):
+        self._record(chart_id, render_ms=seconds * 1000)
+    
+    def timings(self):
+        """Tempos da última construção e do último envio (serialização incluída) e contadores por gráfico"""
+        with self._lock:
+            return {chart_id: dict(timing) for chart_id, timing in self._timings.items()}
+    
+    def stats(self):
+        return self._figures.stats()
+
+@st.cache_resource
+def get_chart_cache():
+    """Cache de figuras por processo, compartilhado entre sessões"""
+    return ChartCache(max_bytes=int(CHART_CACHE_MAX_MB * 1024 * 1024))
+
+def render_chart(chart_id, key, source):
+    """Exibe o gráfico `chart_id`, montando a figura apenas se (gráfico, chave) mudou"""
+    cache = get_chart_cache()
+    with profile_span(f'chart.{chart_id}'):
+        fig = cache.figure(chart_id, key, source)
+        start = time.perf_counter()
+        st.plotly_chart(fig, use_container_width=True)
+        cache.record_render(chart_id, time.perf_counter() - start)
 
 def format_number(num):
     """Formata números com separador de milhares"""
@@ -177,67 +277,180 @@ def admin_mode():
     
     st.markdown("---")
     
+    store = get_lead_store()
+    
     # Upload de arquivo
     st.markdown("### 📤 Upload de Nova Base de Dados")
     
+    upload_sources = ["📄 Base já cruzada (.xlsx)", "🔗 Exportações brutas (HubSpot + Genesys)"]
+    upload_source = st.radio(
+        "Origem dos dados:",
+        upload_sources,
+        horizontal=True,
+        help="Nas exportações brutas, Info Disparo e Status são calculados cruzando os leads com o log de disparos"
+    )
+    
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        uploaded_file = st.file_uploader(
-            "Selecione o arquivo Excel (.xlsx)",
-            type=['xlsx'],
-            help="Arquivo deve conter as colunas: Data de criação do Lead Raiz, Colégio de Interesse, Info Disparo, Status"
-        )
+        if upload_source == upload_sources[0]:
+            uploaded_file = st.file_uploader(
+                "Selecione o arquivo Excel (.xlsx)",
+                type=['xlsx'],
+                help="Arquivo deve conter as colunas: Data de criação do Lead Raiz, Colégio de Interesse, Info Disparo, Status"
+            )
+            uploaded = [uploaded_file] if uploaded_file else []
+        else:
+            hubspot_file = st.file_uploader(
+                "Exportação de leads do HubSpot (.xlsx ou .csv)",
+                type=['xlsx', 'csv'],
+                help="Deve conter Data de criação do Lead Raiz, Colégio de Interesse e telefone e/ou e-mail"
+            )
+            genesys_file = st.file_uploader(
+                "Log de disparos do Genesys (.csv, .xlsx ou .parquet)",
+                type=['csv', 'xlsx', 'parquet'],
+                help="Uma linha por disparo, com o telefone e/ou e-mail de destino"
+            )
+            uploaded = [hubspot_file, genesys_file] if hubspot_file and genesys_file else []
     
-    if uploaded_file:
+    if uploaded:
         try:
-            df = pd.read_excel(uploaded_file)
-            
-            # Validar colunas essenciais
-            required_cols = ['Info Disparo', 'Status', 'Colégio de Interesse', 'Data de criação do Lead Raiz']
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            
-            if missing_cols:
-                st.error(f"❌ Colunas obrigatórias ausentes: {', '.join(missing_cols)}")
-            else:
-                st.success(f"✅ Arquivo válido carregado!")
+            # Upload já processado fica em staging na sessão: reruns não releem o arquivo
+            file_id = tuple(file.file_id for file in uploaded)
+            staging = st.session_state.get('upload_staging')
+            if staging is None or staging['file_id'] != file_id:
+                st.session_state.pop('upload_staging', None)
+                progress_bar = st.progress(0.0, text="Lendo planilha...")
                 
-                # Estatísticas do arquivo
-                col1, col2, col3 = st.columns(3)
-                col1.metric("📊 Total de Linhas", format_number(len(df)))
-                col2.metric("📋 Total de Colunas", len(df.columns))
+                def report_progress(rows_read, total_estimate):
+                    fraction = min(rows_read / total_estimate, 1.0) if total_estimate else 0.0
+                    progress_bar.progress(fraction, text=f"Lendo planilha... {format_number(rows_read)} linhas")
                 
-                disparados = len(df[df['Info Disparo'].str.strip().str.lower() == 'disparado'])
-                taxa = (disparados / len(df) * 100) if len(df) > 0 else 0
-                col3.metric("📈 Taxa de Disparo", f"{taxa:.1f}%")
+                def report_join_progress(rows_read, total_estimate):
+                    progress_bar.progress(0.0, text=f"Cruzando disparos... {format_number(rows_read)} linhas do log")
                 
-                # Preview dos dados
-                st.markdown("### 👀 Preview dos Dados")
-                st.dataframe(df.head(10), use_container_width=True, height=350)
+                join_report = None
+                try:
+                    if len(uploaded) == 1:
+                        with profile_span('admin.upload.read') as span:
+                            df, upload_stats = read_excel_streaming(uploaded[0], progress=report_progress)
+                            span['rows_out'] = len(df)
+                    else:
+                        with profile_span('admin.upload.join') as span:
+                            df, join_report = store.join_exports(*uploaded, progress=report_join_progress)
+                            span['rows_out'] = len(df)
+                        upload_stats = {
+                            'rows': len(df),
+                            'columns': len(df.columns),
+                            'taxa_disparo': join_report['taxa_disparo'],
+                        }
+                finally:
+                    progress_bar.empty()
+                staging = {'file_id': file_id, 'df': df, 'stats': upload_stats, 'join': join_report}
+                st.session_state.upload_staging = staging
+            
+            df = staging['df']
+            upload_stats = staging['stats']
+            join_report = staging['join']
+            
+            st.success(f"✅ Arquivo válido carregado!")
+            
+            # Estatísticas do arquivo
+            col1, col2, col3 = st.columns(3)
+            col1.metric("📊 Total de Linhas", format_number(upload_stats['rows']))
+            col2.metric("📋 Total de Colunas", upload_stats['columns'])
+            col3.metric("📈 Taxa de Disparo", f"{upload_stats['taxa_disparo']:.1f}%")
+            
+            # Taxas de casamento do cruzamento HubSpot × Genesys
+            if join_report is not None:
+                st.markdown("### 🔗 Cruzamento HubSpot × Genesys")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("✅ Leads Disparados", format_number(join_report['disparados']))
+                col2.metric("📞 Casados por Telefone", format_number(join_report['por_telefone']))
+                col3.metric("📧 Só por E-mail", format_number(join_report['somente_email']))
+                col4.metric("📜 Log Casado", f"{join_report['taxa_casamento_log']:.1f}%")
+                st.caption(
+                    f"{format_number(join_report['linhas_log'])} disparos lidos em {join_report['lotes']} lotes "
+                    f"({join_report['segundos']:.1f}s) | Colunas do log: "
+                    f"{join_report['coluna_telefone'] or '—'} / {join_report['coluna_email'] or '—'} | "
+                    f"Leads sem telefone válido: {format_number(join_report['leads'] - join_report['leads_com_telefone'])} | "
+                    f"Disparos sem chave válida: {format_number(join_report['linhas_log_sem_chave'])}"
+                )
+            
+            # Preview dos dados
+            st.markdown("### 👀 Preview dos Dados")
+            st.dataframe(df.head(10), use_container_width=True, height=350)
+            
+            # Informações das colunas
+            with st.expander("📑 Estrutura de Colunas Detectadas"):
+                col1, col2 = st.columns(2)
+                mid_point = len(df.columns) // 2
                 
-                # Informações das colunas
-                with st.expander("📑 Estrutura de Colunas Detectadas"):
-                    col1, col2 = st.columns(2)
-                    mid_point = len(df.columns) // 2
-                    
-                    with col1:
-                        for i, col in enumerate(df.columns[:mid_point], 1):
-                            st.text(f"{i}. {col}")
-                    
-                    with col2:
-                        for i, col in enumerate(df.columns[mid_point:], mid_point + 1):
-                            st.text(f"{i}. {col}")
+                with col1:
+                    for i, col in enumerate(df.columns[:mid_point], 1):
+                        st.text(f"{i}. {col}")
                 
-                # Botão para salvar
-                st.markdown("---")
-                col1, col2, col3 = st.columns([1, 2, 1])
                 with col2:
-                    if st.button("💾 SALVAR E ATUALIZAR DASHBOARD", type="primary", use_container_width=True):
-                        df.to_excel(DATA_FILE, index=False, engine='openpyxl')
-                        st.success("🎉 Base de dados atualizada com sucesso!")
-                        st.balloons()
-                        st.info("💡 Os usuários visualizadores já podem acessar os novos dados.")
+                    for i, col in enumerate(df.columns[mid_point:], mid_point + 1):
+                        st.text(f"{i}. {col}")
+            
+            # Modo de atualização: substituir tudo ou mesclar só o delta (upsert)
+            st.markdown("### 🔄 Modo de Atualização")
+            update_modes = ["🔁 Substituir base completa", "➕ Mesclar com a base atual (inserir/atualizar)"]
+            update_mode = st.radio(
+                "Como aplicar este arquivo?",
+                update_modes,
+                horizontal=True,
+                help=(
+                    f"Na mesclagem, cada lead é identificado por: {', '.join(LEAD_KEY_COLUMNS)} "
+                    f"(e {LEAD_KEY_EXTRA_COLUMN}, quando presente)"
+                )
+            )
+            
+            merged = None
+            can_save = True
+            if update_mode == update_modes[1]:
+                current = store.data()
                 
+                if current is None:
+                    st.warning("⚠️ Não há base atual para mesclar; o arquivo será salvo como base completa.")
+                else:
+                    try:
+                        # Mesclagem calculada uma vez por arquivo e versão da base
+                        merge_state = staging.get('merge')
+                        if merge_state is None or merge_state[0] != current.version:
+                            with st.spinner("Comparando com a base atual..."), \
+                                    profile_span('admin.upload.merge', rows_in=len(df)) as span:
+                                merge_state = (current.version, *store.merge(df, current.version))
+                                span['rows_out'] = len(merge_state[1].raw)
+                            staging['merge'] = merge_state
+                        _, merged, merge_counts = merge_state
+                        
+                        col1, col2, col3 = st.columns(3)
+                        col1.metric("🆕 Inseridos", format_number(merge_counts['inserted']))
+                        col2.metric("✏️ Atualizados", format_number(merge_counts['updated']))
+                        col3.metric("➖ Sem alteração", format_number(merge_counts['unchanged']))
+                    except MissingColumnsError as e:
+                        st.error(f"❌ Colunas de identificação ausentes: {', '.join(e.missing)}")
+                        can_save = False
+            
+            # Botão para salvar
+            st.markdown("---")
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col2:
+                if st.button("💾 SALVAR E ATUALIZAR DASHBOARD", type="primary", use_container_width=True, disabled=not can_save):
+                    with st.spinner("Salvando base..."), profile_span('admin.save', rows_in=len(df)):
+                        if merged is not None:
+                            store.save(merged.raw, merged)
+                        else:
+                            store.save(df)
+                    st.session_state.pop('upload_staging', None)
+                    st.success("🎉 Base de dados atualizada com sucesso!")
+                    st.balloons()
+                    st.info("💡 Os usuários visualizadores já podem acessar os novos dados.")
+        
+        except MissingColumnsError as e:
+            st.error(f"❌ {e}")
         except Exception as e:
             st.error(f"❌ Erro ao processar arquivo: {str(e)}")
             st.info("💡 Verifique se o arquivo não está corrompido e possui o formato correto.")
@@ -246,11 +459,14 @@ def admin_mode():
     st.markdown("---")
     st.markdown("### 📊 Base de Dados Atual")
     
-    if DATA_FILE.exists():
-        df = load_data()
-        if df is not None:
-            file_stats = DATA_FILE.stat()
-            last_modified = datetime.fromtimestamp(file_stats.st_mtime)
+    current_id = store.current_version()
+    show_sync_error(store)
+    if current_id is not None:
+        with profile_span('admin.data'):
+            data = load_version_data(store, current_id)
+        if data is not None:
+            df = data.raw
+            last_modified = datetime.fromisoformat(store.versions.meta(current_id)['uploaded_at'])
             
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("📈 Total de Leads", format_number(len(df)))
@@ -263,54 +479,237 @@ def admin_mode():
             col1, col2 = st.columns(2)
             
             with col1:
-                disparo_counts = df['Info Disparo'].value_counts()
-                fig = px.pie(
-                    values=disparo_counts.values,
-                    names=disparo_counts.index,
-                    title="Distribuição de Disparos",
-                    color_discrete_sequence=['#00c853', '#ff6f00'],
-                    hole=0.4
-                )
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-                st.plotly_chart(fig, use_container_width=True)
+                render_chart('admin_disparo', ('admin', current_id), data)
             
             with col2:
-                colegio_counts = df['Colégio de Interesse'].value_counts().head(8)
-                fig = px.bar(
-                    x=colegio_counts.values,
-                    y=colegio_counts.index,
-                    orientation='h',
-                    title="Top 8 Colégios",
-                    color=colegio_counts.values,
-                    color_continuous_scale='Blues'
-                )
-                fig.update_layout(showlegend=False, xaxis_title="Quantidade", yaxis_title="")
-                st.plotly_chart(fig, use_container_width=True)
+                render_chart('admin_colegios', ('admin', current_id), data)
             
             # Preview da base atual
             with st.expander("🔍 Visualizar Primeiras Linhas da Base Atual"):
                 st.dataframe(df.head(20), use_container_width=True, height=400)
+            
+            # Histórico de versões retidas, com restauração
+            st.markdown("#### 🗂️ Histórico de Versões")
+            versions = store.versions.list_versions()
+            history = pd.DataFrame([
+                {
+                    'Versão': meta['id'],
+                    'Enviada em': datetime.fromisoformat(meta['uploaded_at']).strftime("%d/%m/%Y %H:%M:%S"),
+                    'Linhas': format_number(meta['rows']),
+                    'Origem': meta.get('origin', 'upload'),
+                    'SHA-256': meta['sha256'][:12] if meta['sha256'] else '— (.xlsx sob demanda)',
+                    'Atual': '✅' if meta['id'] == current_id else '',
+                }
+                for meta in versions
+            ])
+            st.dataframe(history, use_container_width=True, hide_index=True)
+            st.caption(f"São mantidas as {store.versions.keep} versões mais recentes (DATA_VERSIONS_KEEP).")
+            
+            # Versão mesclada: o .xlsx completo só é gravado quando pedido
+            if store.versions.meta(current_id)['sha256'] is None:
+                st.info("💡 A versão atual veio de uma mesclagem: o .xlsx completo (e a cópia em data/base_leads.xlsx) é gerado sob demanda.")
+                if st.button("⚙️ Gerar .xlsx da versão atual"):
+                    with st.spinner("Gerando .xlsx..."), profile_span('admin.xlsx', rows_in=len(df)):
+                        store.versions.xlsx_path(current_id)
+                    st.success("✅ .xlsx gerado.")
+            
+            older = [meta['id'] for meta in versions if meta['id'] != current_id]
+            if older:
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    restore_id = st.selectbox("Versão para restaurar:", older, label_visibility="collapsed")
+                with col2:
+                    if st.button("⏪ Restaurar versão", use_container_width=True):
+                        store.rollback(restore_id)
+                        st.success(f"✅ Versão {restore_id} restaurada como base atual.")
+                        st.rerun()
+            
+            # Uso do cache compartilhado entre sessões
+            with st.expander("⚡ Cache Compartilhado de Dados"):
+                cache_stats = store.data_cache.stats()
+                col1, col2, col3 = st.columns(3)
+                col1.metric("✅ Hits", format_number(cache_stats['hits']))
+                col2.metric("🔄 Misses", format_number(cache_stats['misses']))
+                col3.metric("🗑️ Evictions", format_number(cache_stats['evictions']))
+                st.caption(
+                    "Versões em cache: " + ", ".join(f"`{v}`" for v in cache_stats['versions'])
+                    + f" | Motor de consultas: `{store.engine_name}`"
+                    + f" | Base compartilhada entre processos: `{'sim' if store.versions.shared_dataset else 'não'}`"
+                )
+                
+                filter_stats = store.filter_cache.stats()
+                st.markdown("**Resultados de filtros (LRU)**")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("🎯 Taxa de Acerto", f"{filter_stats['hit_ratio']:.1f}%")
+                col2.metric("📦 Entradas", format_number(filter_stats['entries']))
+                col3.metric("💾 Memória", f"{filter_stats['bytes'] / 1024 / 1024:.1f} MB")
+                col4.metric("🗑️ Evictions", format_number(filter_stats['evictions']))
+                st.caption(
+                    f"Hits: {format_number(filter_stats['hits'])} | "
+                    f"Misses: {format_number(filter_stats['misses'])} | "
+                    f"Limite: {filter_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+                )
+                
+                chart_cache = get_chart_cache()
+                chart_stats = chart_cache.stats()
+                st.markdown("**Gráficos (figuras prontas)**")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("🎯 Taxa de Acerto", f"{chart_stats['hit_ratio']:.1f}%")
+                col2.metric("📦 Figuras", format_number(chart_stats['entries']))
+                col3.metric("💾 Memória", f"{chart_stats['bytes'] / 1024 / 1024:.1f} MB")
+                col4.metric("🗑️ Evictions", format_number(chart_stats['evictions']))
+                timings = chart_cache.timings()
+                if timings:
+                    st.dataframe(
+                        pd.DataFrame([
+                            {
+                                'Gráfico': chart_id,
+                                'Construções': timing['builds'],
+                                'Reaproveitamentos': timing['hits'],
+                                'Construção (ms)': round(timing['build_ms'], 1),
+                                'Serialização + envio (ms)': round(timing['render_ms'], 1),
+                                'Dados (KB)': round(timing['data_bytes'] / 1024, 1),
+                            }
+                            for chart_id, timing in timings.items()
+                        ]),
+                        use_container_width=True,
+                        hide_index=True,
+                    )
+                    st.caption("Tempos da última construção e do último envio (com a serialização) de cada gráfico.")
     else:
         st.warning("⚠️ Nenhuma base de dados encontrada. Faça upload para começar.")
+    
+    diagnostics_panel()
+
+def diagnostics_panel():
+    """Painel do administrador com os tempos por etapa dos reruns recentes"""
+    st.markdown("---")
+    with st.expander("🩺 Diagnóstico de Desempenho"):
+        if not PROFILING_ENABLED:
+            st.info("💡 Instrumentação desligada. Inicie o dashboard com `DASHBOARD_PROFILING=1` para coletar os tempos por etapa.")
+            return
+        
+        profiler = get_profiler()
+        runs = profiler.runs()
+        summary = profiler.summary()
+        if summary.empty:
+            st.caption("Nenhum rerun registrado ainda.")
+            return
+        
+        st.caption(
+            f"p50/p95 por etapa nos últimos {format_number(len(runs))} reruns "
+            f"(limite: {PROFILING_HISTORY}). O delta de memória é do processo inteiro "
+            "e inclui outras sessões ativas."
+        )
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Exportar JSON",
+                data=json.dumps(runs, ensure_ascii=False, indent=2, default=str),
+                file_name=f"diagnostico_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                use_container_width=True
+            )
+        with col2:
+            st.download_button(
+                label="📥 Exportar CSV",
+                data=profiler.spans_frame().to_csv(index=False).encode('utf-8-sig'),
+                file_name=f"diagnostico_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+
+def render_kpis(metrics):
+    """Cards dos indicadores principais"""
+    st.markdown("### 📈 Indicadores Principais")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown(f"""
+        <div class='metric-card info-metric'>
+            <div class='metric-label'>Total de Leads</div>
+            <div class='metric-value'>{format_number(metrics['total_leads'])}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown(f"""
+        <div class='metric-card success-metric'>
+            <div class='metric-label'>✅ Disparados</div>
+            <div class='metric-value'>{format_number(metrics['disparados'])}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown(f"""
+        <div class='metric-card warning-metric'>
+            <div class='metric-label'>❌ Não Disparados</div>
+            <div class='metric-value'>{format_number(metrics['nao_disparados'])}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col4:
+        taxa_color = 'success-metric' if metrics['taxa_disparo'] >= 80 else 'warning-metric' if metrics['taxa_disparo'] >= 60 else 'metric-card'
+        st.markdown(f"""
+        <div class='metric-card {taxa_color}'>
+            <div class='metric-label'>Taxa de Disparo</div>
+            <div class='metric-value'>{metrics['taxa_disparo']:.1f}%</div>
+        </div>
+        """, unsafe_allow_html=True)
 
 def viewer_mode():
     """Modo visualizador - permite filtros, visualização e exportação"""
     st.markdown("<div class='main-header'>📊 Performance de Acionamento de Leads</div>", unsafe_allow_html=True)
     st.markdown("<div class='sub-header'>Cruzamento de base HubSpot vs. Disparos Genesys</div>", unsafe_allow_html=True)
     
-    df = load_data()
+    # Cada sessão fica fixada na versão que abriu até pedir para atualizar,
+    # para que filtros, páginas e exportações não mudem de base no meio da análise
+    store = get_lead_store()
+    current_id = store.current_version()
+    show_sync_error(store)
+    pinned_id = st.session_state.get('pinned_version')
+    if pinned_id is None or store.versions.meta(pinned_id) is None:
+        pinned_id = current_id
+        st.session_state.pinned_version = pinned_id
+    
+    # Com o resumo gravado na versão, sidebar e KPIs iniciais não esperam pelas linhas,
+    # que são carregadas em segundo plano enquanto a página é montada
+    summary = store.summary(pinned_id) if pinned_id is not None else None
+    engine = None
+    if summary is not None:
+        store.prefetch(pinned_id)
+        total_rows, options = summary['total_rows'], summary['options']
+    else:
+        engine = load_engine(store, pinned_id)
+        total_rows = engine.total_rows if engine is not None else 0
+    
+    if pinned_id != current_id and current_id is not None:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.info("🆕 Uma nova versão da base foi publicada. Você está vendo a versão anterior.")
+        with col2:
+            if st.button("🔄 Atualizar", use_container_width=True):
+                st.session_state.pinned_version = current_id
+                st.rerun()
     
-    if df is None or df.empty:
+    if total_rows == 0:
         st.warning("⚠️ Nenhum dado disponível. Entre em contato com o administrador para atualização da base.")
         st.info("💡 Acesse o modo Administrador para fazer upload da base de dados.")
         return
     
+    if engine is not None:
+        with profile_span('viewer.options'):
+            options = engine.options()
+    
     # Sidebar - Filtros
     with st.sidebar:
         st.markdown("## 🎯 Filtros de Análise")
         
         # Mostrar total de leads na base
-        st.info(f"📊 **Base completa:** {len(df):,} leads".replace(",", "."))
+        st.info(f"📊 **Base completa:** {total_rows:,} leads".replace(",", "."))
         
         st.markdown("💡 **Dica:** Deixe os filtros vazios para ver todos os dados")
         
@@ -318,7 +717,7 @@ def viewer_mode():
         
         # Filtro de Colégio
         st.markdown("### 🏫 Colégio de Interesse")
-        colegios_disponiveis = sorted(df['Colégio de Interesse'].unique().tolist())
+        colegios_disponiveis = options['colegios']
         colegios_selecionados = st.multiselect(
             "Selecione um ou mais colégios (vazio = todos):",
             colegios_disponiveis,
@@ -331,14 +730,11 @@ def viewer_mode():
         
         # Filtro de Data
         st.markdown("### 📅 Período")
-        # Converter apenas para extrair min/max
-        df_dates_temp = pd.to_datetime(df['Data de criação do Lead Raiz'], errors='coerce')
-        df_dates = df_dates_temp.dropna()
+        # Período coberto pela base (datas já convertidas na ingestão)
+        min_date = options['min_date']
+        max_date = options['max_date']
         
-        if not df_dates.empty:
-            min_date = df_dates.min().date()
-            max_date = df_dates.max().date()
-            
+        if min_date is not None:
             date_range = st.date_input(
                 "Selecione o intervalo:",
                 value=(min_date, max_date),
@@ -371,8 +767,7 @@ def viewer_mode():
         
         # Filtro de Status do Lead
         st.markdown("### 📋 Status do Lead")
-        # Não usar dropna() para garantir que todos os status sejam incluídos
-        status_disponiveis = sorted(df['Status'].unique().tolist())
+        status_disponiveis = options['status']
         status_selecionados = st.multiselect(
             "Selecione um ou mais status (vazio = todos):",
             status_disponiveis,
@@ -389,82 +784,41 @@ def viewer_mode():
         </div>
         """, unsafe_allow_html=True)
     
-    # Aplicar filtros
-    df_filtered = df.copy()
+    # Aplicar filtros (filtros vazios = todos)
+    data_inicio = data_fim = None
     
-    # Filtro de Colégio (múltipla escolha) - se vazio, mostrar todos
-    if colegios_selecionados:  # Se tem algum selecionado, filtrar
-        df_filtered = df_filtered[df_filtered['Colégio de Interesse'].isin(colegios_selecionados)]
-    # Se está vazio, não filtra (mostra todos)
-    
-    # Filtro de Data - converter e filtrar apenas se usuário alterou
-    if start_date and end_date:
-        # Converter coluna de data apenas para este filtro
-        df_temp_dates = pd.to_datetime(df_filtered['Data de criação do Lead Raiz'], errors='coerce')
-        
-        df_dates_check = df_temp_dates.dropna()
-        if not df_dates_check.empty:
-            full_min = df_dates_check.min().date()
-            full_max = df_dates_check.max().date()
-            
-            # Só filtrar se usuário mudou as datas
-            if start_date != full_min or end_date != full_max:
-                df_filtered = df_filtered[
-                    (df_temp_dates >= pd.Timestamp(start_date)) &
-                    (df_temp_dates <= pd.Timestamp(end_date))
-                ]
-    
-    # Filtro de Status de Disparo (múltipla escolha) - se vazio, mostrar todos
-    if status_disparo_selecionados:  # Se tem algum selecionado, filtrar
-        df_filtered = df_filtered[
-            df_filtered['Info Disparo'].str.strip().str.lower().isin([s.lower() for s in status_disparo_selecionados])
-        ]
-    # Se está vazio, não filtra (mostra todos)
-    
-    # Filtro de Status do Lead (múltipla escolha) - se vazio, mostrar todos
-    if status_selecionados:  # Se tem algum selecionado, filtrar
-        df_filtered = df_filtered[df_filtered['Status'].isin(status_selecionados)]
-    # Se está vazio, não filtra (mostra todos)
-    
-    # Métricas
-    metrics = calculate_metrics(df_filtered)
+    # Filtro de Data - só filtrar se usuário mudou o intervalo completo da base
+    if start_date and end_date and (start_date != min_date or end_date != max_date):
+        data_inicio, data_fim = start_date, end_date
     
-    st.markdown("### 📈 Indicadores Principais")
+    selection = FilterSelection(
+        colegios=tuple(colegios_selecionados),
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        disparo=tuple(status_disparo_selecionados),
+        status=tuple(status_selecionados),
+    )
     
-    col1, col2, col3, col4 = st.columns(4)
+    # Sem filtros, os KPIs saem do resumo da versão antes de as linhas terminarem de carregar
+    kpis_shown = summary is not None and selection == FilterSelection()
+    if kpis_shown:
+        render_kpis(summary['metrics'])
     
-    with col1:
-        st.markdown(f"""
-        <div class='metric-card info-metric'>
-            <div class='metric-label'>Total de Leads</div>
-            <div class='metric-value'>{format_number(metrics['total_leads'])}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class='metric-card success-metric'>
-            <div class='metric-label'>✅ Disparados</div>
-            <div class='metric-value'>{format_number(metrics['disparados'])}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    if engine is None:
+        engine = load_engine(store, pinned_id)
+        if engine is None:
+            return
     
-    with col3:
-        st.markdown(f"""
-        <div class='metric-card warning-metric'>
-            <div class='metric-label'>❌ Não Disparados</div>
-            <div class='metric-value'>{format_number(metrics['nao_disparados'])}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    # KPIs e gráficos saem do cubo; apenas a tabela/exportação usa as linhas
+    filter_key = (engine.name, engine.version, astuple(selection.normalized()))
+    with profile_span('viewer.filter', rows_in=engine.total_rows) as span:
+        result = store.filter(selection, pinned_id)
+        span['rows_out'] = result.metrics['total_leads']
+    metrics = store.metrics(result)
+    series = store.chart_series(result)
     
-    with col4:
-        taxa_color = 'success-metric' if metrics['taxa_disparo'] >= 80 else 'warning-metric' if metrics['taxa_disparo'] >= 60 else 'metric-card'
-        st.markdown(f"""
-        <div class='metric-card {taxa_color}'>
-            <div class='metric-label'>Taxa de Disparo</div>
-            <div class='metric-value'>{metrics['taxa_disparo']:.1f}%</div>
-        </div>
-        """, unsafe_allow_html=True)
+    if not kpis_shown:
+        render_kpis(metrics)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -474,252 +828,190 @@ def viewer_mode():
     col1, col2 = st.columns(2)
     
     with col1:
-        # Gráfico de pizza - Distribuição de Disparos
-        disparo_counts = df_filtered['Info Disparo'].value_counts()
-        
-        fig = go.Figure(data=[go.Pie(
-            labels=disparo_counts.index,
-            values=disparo_counts.values,
-            hole=0.5,
-            marker=dict(colors=['#00c853', '#ff6f00']),
-            textposition='inside',
-            textinfo='percent+label',
-            hovertemplate='<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>'
-        )])
-        
-        fig.update_layout(
-            title="Distribuição de Disparos",
-            height=400,
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
-            margin=dict(t=50, b=20, l=20, r=20)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        render_chart('disparo', filter_key, series)
     
     with col2:
-        # Gráfico de barras - Leads por Colégio
-        colegio_counts = df_filtered['Colégio de Interesse'].value_counts().head(10)
-        
-        fig = px.bar(
-            x=colegio_counts.values,
-            y=colegio_counts.index,
-            orientation='h',
-            title="Top 10 Colégios por Volume de Leads",
-            color=colegio_counts.values,
-            color_continuous_scale='Viridis',
-            labels={'x': 'Quantidade de Leads', 'y': 'Colégio'}
-        )
-        
-        fig.update_layout(
-            height=400,
-            showlegend=False,
-            xaxis_title="Quantidade de Leads",
-            yaxis_title="",
-            margin=dict(t=50, b=20, l=20, r=20)
-        )
-        
-        fig.update_traces(
-            hovertemplate='<b>%{y}</b><br>Leads: %{x}<extra></extra>'
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        render_chart('colegios', filter_key, series)
     
     # Timeline
     st.markdown("### 📅 Evolução Temporal de Leads")
     
-    df_timeline = df_filtered.copy()
-    df_timeline['Data'] = df_timeline['Data de criação do Lead Raiz'].dt.date
-    timeline_data = df_timeline.groupby('Data').size().reset_index(name='Quantidade')
-    
-    fig = px.area(
-        timeline_data,
-        x='Data',
-        y='Quantidade',
-        title="Volume de Leads ao Longo do Tempo",
-        color_discrete_sequence=['#1f77b4']
-    )
-    
-    fig.update_traces(
-        fill='tozeroy',
-        line=dict(width=2),
-        hovertemplate='<b>Data:</b> %{x}<br><b>Leads:</b> %{y}<extra></extra>'
-    )
-    
-    fig.update_layout(
-        height=350,
-        hovermode='x unified',
-        xaxis_title="Data de Criação",
-        yaxis_title="Quantidade de Leads",
-        margin=dict(t=50, b=20, l=20, r=20)
+    timeline_options = ['Automático', *TIMELINE_GRANULARITIES]
+    timeline_choice = st.radio(
+        "Agrupar por:",
+        timeline_options,
+        horizontal=True,
+        key='timeline_granularity'
     )
+    if timeline_choice == 'Automático':
+        # Período selecionado na sidebar (ou toda a base, sem filtro de data)
+        span_start = selection.data_inicio or min_date
+        span_end = selection.data_fim or max_date
+        span_days = (span_end - span_start).days if span_start and span_end else 0
+        granularity = auto_granularity(span_days)
+    else:
+        granularity = timeline_choice
     
-    st.plotly_chart(fig, use_container_width=True)
+    render_chart('timeline', (*filter_key, granularity), (series, granularity))
     
     # Análise por Status (somente para não disparados)
-    nao_disparados_df = df_filtered[df_filtered['Info Disparo'].str.strip().str.lower() == 'não disparado']
+    nao_disparados_status = series['nao_disparados_status']
     
-    if len(nao_disparados_df) > 0:
+    if metrics['nao_disparados'] > 0:
         st.markdown("### 🔍 Análise de Leads Não Disparados")
         
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            status_counts = nao_disparados_df['Status'].value_counts().head(8)
-            
-            fig = px.bar(
-                x=status_counts.values,
-                y=status_counts.index,
-                orientation='h',
-                title="Distribuição por Status (Leads Não Disparados)",
-                color=status_counts.values,
-                color_continuous_scale='Reds'
-            )
-            
-            fig.update_layout(
-                height=350,
-                showlegend=False,
-                xaxis_title="Quantidade",
-                yaxis_title="Status",
-                margin=dict(t=50, b=20, l=20, r=20)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            render_chart('nao_disparados_status', filter_key, series)
         
         with col2:
             st.markdown("#### 📊 Resumo")
-            st.metric("Total Não Disparados", format_number(len(nao_disparados_df)))
-            st.metric("Status Diferentes", nao_disparados_df['Status'].nunique())
+            st.metric("Total Não Disparados", format_number(metrics['nao_disparados']))
+            st.metric("Status Diferentes", len(nao_disparados_status))
             
-            if len(nao_disparados_df) > 0:
-                status_mais_comum = nao_disparados_df['Status'].mode()[0] if not nao_disparados_df['Status'].mode().empty else "N/A"
+            if metrics['nao_disparados'] > 0:
+                status_mais_comum = nao_disparados_status.index[0] if not nao_disparados_status.empty else "N/A"
                 st.info(f"**Status mais comum:**\n\n{status_mais_comum}")
     
     # Detalhes dos dados
     st.markdown("---")
     st.markdown("### 📋 Detalhamento Completo dos Dados")
     
-    # Preparar DataFrame para exibição
-    df_display = df_filtered.copy()
-    
-    # Criar coluna condicional para Status
-    df_display['Status (Detalhado)'] = df_display.apply(
-        lambda row: row['Status'] if row['Info Disparo'].strip().lower() == 'não disparado' else '—',
-        axis=1
-    )
-    
-    # Selecionar colunas para exibição
-    cols_to_display = [
-        'Data de criação do Lead Raiz',
-        'Nome',
-        'Colégio de Interesse',
-        'Número de telefone',
-        'E-mail',
-        'Info Disparo',
-        'Status (Detalhado)'
-    ]
-    
-    # Filtrar apenas colunas que existem
-    cols_to_display = [col for col in cols_to_display if col in df_display.columns]
-    df_display = df_display[cols_to_display]
+    # Busca livre indexada, aplicada sobre os filtros da sidebar
+    query = st.text_input(
+        "🔎 Buscar lead (nome, telefone ou e-mail):",
+        placeholder="Ex.: maria souza, 21 98765-4321, maria@email.com",
+    ).strip()
+    table_result = result
+    if query:
+        # A primeira busca da versão monta o índice; as seguintes usam o mesmo
+        with st.spinner("Buscando..."), profile_span('viewer.search', rows_in=metrics['total_leads']) as span:
+            table_result = store.search(result, query)
+            span['rows_out'] = table_result.metrics['total_leads']
+        st.caption(
+            f"🔎 {format_number(table_result.metrics['total_leads'])} lead(s) encontrado(s) para "
+            f"\"{query}\" dentro dos filtros aplicados."
+        )
     
-    # Formatar data
-    if 'Data de criação do Lead Raiz' in df_display.columns:
-        df_display['Data de criação do Lead Raiz'] = df_display['Data de criação do Lead Raiz'].dt.strftime('%d/%m/%Y %H:%M')
+    total_registros = table_result.metrics['total_leads']
+    columns = engine.columns()
     
-    # Opções de visualização
-    col1, col2, col3 = st.columns([1, 1, 2])
+    # Opções de visualização (paginação e ordenação no servidor)
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
     
     with col1:
-        show_all = st.checkbox("Mostrar todos os registros", value=False)
+        sort_column = st.selectbox(
+            "Ordenar por:",
+            [None] + columns,
+            format_func=lambda col: "Ordem original" if col is None else col
+        )
     
     with col2:
+        descending = st.selectbox(
+            "Ordem:",
+            [False, True],
+            format_func=lambda desc: "Decrescente" if desc else "Crescente"
+        )
+    
+    with col3:
         records_to_show = st.selectbox(
             "Registros por página:",
             [20, 50, 100, 500],
-            index=0,
-            disabled=show_all
+            index=0
         )
     
+    total_pages = max(1, -(-total_registros // records_to_show))
+    with col4:
+        page = st.number_input("Página:", min_value=1, max_value=total_pages, value=1, step=1)
+    page = min(int(page), total_pages)
+    
+    # Apenas as linhas da página são montadas e formatadas
+    with profile_span('viewer.table', rows_in=total_registros) as span:
+        df_display = store.page(table_result, page, records_to_show, sort_column, descending)
+        span['rows_out'] = len(df_display)
+    
     # Mostrar tabela
-    if show_all:
-        st.dataframe(
-            df_display,
-            use_container_width=True,
-            height=500,
-            hide_index=True
-        )
-    else:
-        st.dataframe(
-            df_display.head(records_to_show),
-            use_container_width=True,
-            height=500,
-            hide_index=True
+    st.dataframe(
+        df_display,
+        use_container_width=True,
+        height=500,
+        hide_index=True
+    )
+    
+    if total_registros > 0:
+        first = (page - 1) * records_to_show + 1
+        last = first + len(df_display) - 1
+        st.caption(
+            f"ℹ️ Mostrando {format_number(first)}–{format_number(last)} de "
+            f"{format_number(total_registros)} registros (página {page} de {total_pages})."
         )
-        
-        if len(df_display) > records_to_show:
-            st.info(f"ℹ️ Mostrando {records_to_show} de {format_number(len(df_display))} registros. Marque 'Mostrar todos' para ver a lista completa.")
     
     # Botão de exportação
     st.markdown("---")
     st.markdown("### 💾 Exportar Dados Filtrados")
     
+    # A exportação segue os filtros da sidebar (a busca só restringe a tabela)
+    total_registros = metrics['total_leads']
     col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
     
     with col1:
-        st.metric("📊 Registros Filtrados", format_number(len(df_display)))
+        st.metric("📊 Registros Filtrados", format_number(total_registros))
     
     with col2:
-        st.metric("📋 Colunas Exportadas", len(df_display.columns))
+        st.metric("📋 Colunas Exportadas", len(columns))
     
+    # Exportação gerada apenas sob demanda e reaproveitada para a mesma seleção/versão
+    # Formatos com limite de linhas (Excel) saem da lista quando a seleção passa dele
+    formats = [
+        fmt for fmt, spec in EXPORT_FORMATS.items()
+        if spec.get('max_rows') is None or total_registros <= spec['max_rows']
+    ]
     with col3:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"leads_whatsapp_{timestamp}.xlsx"
-        
-        # Preparar arquivo para download
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            # Restaurar formato de data para Excel
-            df_export = df_filtered.copy()
-            
-            # Criar coluna Status condicional
-            df_export['Status (Detalhado)'] = df_export.apply(
-                lambda row: row['Status'] if row['Info Disparo'].strip().lower() == 'não disparado' else '—',
-                axis=1
-            )
-            
-            # Selecionar e ordenar colunas
-            export_cols = [col for col in cols_to_display if col in df_export.columns]
-            if 'Status (Detalhado)' not in export_cols:
-                export_cols.append('Status (Detalhado)')
-            
-            df_export[export_cols].to_excel(writer, index=False, sheet_name='Leads Filtrados')
-            
-            # Adicionar aba com resumo
-            summary_data = {
-                'Métrica': ['Total de Leads', 'Disparados', 'Não Disparados', 'Taxa de Disparo (%)'],
-                'Valor': [
-                    metrics['total_leads'],
-                    metrics['disparados'],
-                    metrics['nao_disparados'],
-                    round(metrics['taxa_disparo'], 2)
-                ]
-            }
-            pd.DataFrame(summary_data).to_excel(writer, index=False, sheet_name='Resumo')
-        
-        buffer.seek(0)
-        
-        st.download_button(
-            label="📥 Baixar Excel",
-            data=buffer,
-            file_name=filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True,
-            type="primary"
+        export_format = st.selectbox(
+            "Formato:",
+            formats,
+            format_func=lambda fmt: EXPORT_FORMATS[fmt]['label'],
         )
+        if len(formats) < len(EXPORT_FORMATS):
+            st.caption(
+                f"Excel indisponível: a seleção passa de {format_number(EXPORT_FORMATS['xlsx']['max_rows'])} "
+                "linhas por planilha; use CSV ou Parquet."
+            )
+    
+    export_spec = EXPORT_FORMATS[export_format]
+    export = store.cached_export(result, export_format)
     
     with col4:
-        st.info(f"**Arquivo:** {filename[:20]}...")
+        if export is None:
+            if st.button("⚙️ Gerar arquivo", use_container_width=True):
+                with st.spinner("Gerando arquivo..."), \
+                        profile_span(f'viewer.export.{export_format}', rows_in=total_registros) as span:
+                    export = store.export(result, export_format)
+                    span['rows_out'] = total_registros
+        
+        if export is not None:
+            filename, content = export
+            st.download_button(
+                label=f"📥 Baixar {export_spec['label']}",
+                data=content,
+                file_name=filename,
+                mime=export_spec['mime'],
+                use_container_width=True,
+                type="primary"
+            )
+            
+            # Excel já traz a aba 'Resumo'; nos demais formatos ela vai em arquivo separado
+            if export_format != 'xlsx':
+                st.download_button(
+                    label="📄 Baixar Resumo (.csv)",
+                    data=build_summary_csv(metrics),
+                    file_name=filename.rsplit('.', 1)[0] + "_resumo.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+        else:
+            st.caption("O arquivo é gerado apenas quando solicitado.")
 
 def main():
     """Função principal"""
@@ -733,10 +1025,15 @@ def main():
     
     st.sidebar.markdown("---")
     
-    if mode == "🔐 Administrador":
-        admin_mode()
-    else:
-        viewer_mode()
+    # Com DASHBOARD_PROFILING=1, cada rerun é registrado com os spans das etapas
+    is_admin = mode == "🔐 Administrador"
+    profiled = get_profiler().run('admin' if is_admin else 'viewer') if PROFILING_ENABLED else nullcontext()
+    with profiled:
+        if is_admin:
+            admin_mode()
+        else:
+            viewer_mode()
 
 if __name__ == "__main__":
     main()
+
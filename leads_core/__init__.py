@@ -0,0 +1,133 @@
+"""Núcleo do dashboard de leads, sem interface: ingestão, versões, filtros, métricas e exportação.
+
+Pode ser importado por scripts, jobs e benchmarks sem Streamlit nem Plotly:
+    
+    from leads_core import FilterSelection, LeadStore
+    
+    store = LeadStore()
+    result = store.filter(FilterSelection(colegios=('Colégio X',)))
+    store.metrics(result)
+    store.page(result, 1)
+    filename, content = store.export(result, 'csv')
+"""
+from .api import LeadStore
+from .cache import LRUCache
+from .config import (
+    CATEGORICAL_COLUMNS,
+    DATA_DIR,
+    DATA_FILE,
+    EXCEL_MAX_ROWS,
+    EXPORT_CHUNK_ROWS,
+    INGEST_CHUNK_ROWS,
+    JOIN_CHUNK_ROWS,
+    PROFILING_ENABLED,
+    PROFILING_HISTORY,
+    QUERY_ENGINE,
+    REQUIRED_COLUMNS,
+    SHARED_DATASET,
+    TIMELINE_MAX_POINTS,
+)
+from .engines import (
+    PandasQueryEngine,
+    SQLiteQueryEngine,
+    iter_frame_chunks,
+    iter_parquet_chunks,
+    write_sqlite,
+)
+from .export import EXPORT_FORMATS, build_summary_csv, summary_rows, write_export, write_xlsx
+from .ingest import (
+    MissingColumnsError,
+    arrow_compatible,
+    encode_categories,
+    file_signature,
+    iter_excel_chunks,
+    iter_table_chunks,
+    read_excel_streaming,
+)
+from .join import join_dispatches, join_exports, normalize_email, normalize_phone, phone_digits
+from .merge import LEAD_KEY_COLUMNS, LEAD_KEY_EXTRA_COLUMN, merge_delta
+from .model import (
+    DETAIL_COLUMNS,
+    FilterResult,
+    FilterSelection,
+    LeadsData,
+    build_derived,
+    calculate_metrics,
+    compute_filter_result,
+    cube_series,
+    detail_frame,
+    prepare_data,
+    selection_mask,
+)
+from .profiling import get_profiler, profile_span
+from .search import SearchIndex, build_search_index, fold_text
+from .shared import open_dataset, write_dataset
+from .store import SharedDataCache, VersionStore
+from .timeline import TIMELINE_GRANULARITIES, auto_granularity, lttb, timeline_points
+
+__all__ = [
+    'LeadStore',
+    'LRUCache',
+    'CATEGORICAL_COLUMNS',
+    'DATA_DIR',
+    'DATA_FILE',
+    'EXCEL_MAX_ROWS',
+    'EXPORT_CHUNK_ROWS',
+    'INGEST_CHUNK_ROWS',
+    'JOIN_CHUNK_ROWS',
+    'PROFILING_ENABLED',
+    'PROFILING_HISTORY',
+    'QUERY_ENGINE',
+    'REQUIRED_COLUMNS',
+    'SHARED_DATASET',
+    'TIMELINE_MAX_POINTS',
+    'PandasQueryEngine',
+    'SQLiteQueryEngine',
+    'iter_frame_chunks',
+    'iter_parquet_chunks',
+    'write_sqlite',
+    'EXPORT_FORMATS',
+    'build_summary_csv',
+    'summary_rows',
+    'write_export',
+    'write_xlsx',
+    'MissingColumnsError',
+    'arrow_compatible',
+    'encode_categories',
+    'file_signature',
+    'iter_excel_chunks',
+    'iter_table_chunks',
+    'read_excel_streaming',
+    'join_dispatches',
+    'join_exports',
+    'normalize_email',
+    'normalize_phone',
+    'phone_digits',
+    'LEAD_KEY_COLUMNS',
+    'LEAD_KEY_EXTRA_COLUMN',
+    'merge_delta',
+    'DETAIL_COLUMNS',
+    'FilterResult',
+    'FilterSelection',
+    'LeadsData',
+    'build_derived',
+    'calculate_metrics',
+    'compute_filter_result',
+    'cube_series',
+    'detail_frame',
+    'prepare_data',
+    'selection_mask',
+    'get_profiler',
+    'profile_span',
+    'SearchIndex',
+    'build_search_index',
+    'fold_text',
+    'open_dataset',
+    'write_dataset',
+    'SharedDataCache',
+    'VersionStore',
+    'TIMELINE_GRANULARITIES',
+    'auto_granularity',
+    'lttb',
+    'timeline_points',
+]
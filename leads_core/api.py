@@ -0,0 +1,263 @@
+"""LeadStore: API única do núcleo, usada pelo dashboard, pelos benchmarks e por scripts"""
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from .cache import LRUCache
+from .config import (
+    DATA_CACHE_VERSIONS,
+    DATA_DIR,
+    EXPORT_CACHE_MAX_MB,
+    FILTER_CACHE_MAX_MB,
+    QUERY_ENGINE,
+    SHARED_DATASET,
+    TIMELINE_MAX_POINTS,
+    VERSIONS_KEEP,
+)
+from .engines import PandasQueryEngine, SQLiteQueryEngine
+from .export import EXPORT_FORMATS
+from .ingest import encode_categories, read_excel_streaming
+from .join import join_exports
+from .merge import merge_delta
+from .model import FilterSelection, prepare_data
+from .store import SharedDataCache, VersionStore
+from .timeline import timeline_points
+
+class LeadStore:
+    """Base de leads versionada com filtros, métricas, séries, páginas e exportações.
+    
+    Uma instância por processo: o cache de versões prontas, o LRU de
+    resultados de filtros e o LRU de arquivos exportados são compartilhados
+    por todas as sessões/threads que a usam. Não depende de Streamlit nem de
+    Plotly; a interface só exibe o que esta classe devolve.
+    
+    Com `shared`, as versões são mapeadas do dataset Arrow gravado com elas
+    (ver `shared.py`): vários processos servindo a mesma base dividem as
+    mesmas páginas em memória, e cada um passa a usar a versão nova assim que
+    ela vira a atual.
+    """
+    
+    def __init__(self, data_dir=DATA_DIR, engine=QUERY_ENGINE, keep=VERSIONS_KEEP,
+                 cache_versions=DATA_CACHE_VERSIONS, shared=SHARED_DATASET):
+        if engine not in ('pandas', 'sqlite'):
+            raise ValueError(f"Motor de consultas desconhecido: {engine}")
+        data_dir = Path(data_dir)
+        self.engine_name = engine
+        self.versions = VersionStore(
+            data_dir / 'versions',
+            data_dir / 'CURRENT',
+            keep=keep,
+            data_file=data_dir / 'base_leads.xlsx',
+            build_sqlite=engine == 'sqlite',
+            shared_dataset=shared,
+        )
+        self.data_cache = SharedDataCache(self.versions, cache_versions)
+        self.filter_cache = LRUCache(max_bytes=int(FILTER_CACHE_MAX_MB * 1024 * 1024))
+        self.export_cache = LRUCache(max_bytes=int(EXPORT_CACHE_MAX_MB * 1024 * 1024))
+        self._lock = threading.Lock()
+        self._sqlite_engines = OrderedDict()
+        self._cache_versions = max(1, cache_versions)
+        self._prefetching = {}
+    
+    def current_version(self):
+        """Id da versão atual (None se ainda não houver base)"""
+        return self.versions.current_id()
+    
+    def summary(self, version_id=None):
+        """KPIs da base inteira e opções dos filtros gravados com a versão, sem carregar as linhas.
+        
+        Retorna {'total_rows', 'metrics', 'options'}, ou None se a versão não
+        existir ou tiver sido gravada antes do resumo.
+        """
+        if version_id is None:
+            version_id = self.current_version()
+        meta = self.versions.meta(version_id) if version_id is not None else None
+        summary = meta.get('summary') if meta is not None else None
+        if summary is None:
+            return None
+        return {
+            'total_rows': meta['rows'],
+            'metrics': summary['metrics'],
+            'options': {
+                'colegios': summary['colegios'],
+                'status': summary['status'],
+                'min_date': date.fromisoformat(summary['min_date']) if summary['min_date'] else None,
+                'max_date': date.fromisoformat(summary['max_date']) if summary['max_date'] else None,
+            },
+        }
+    
+    def prefetch(self, version_id=None):
+        """Prepara o motor da versão em segundo plano (linhas em memória ou banco SQLite).
+        
+        Quem pedir a versão enquanto isso espera pela mesma carga, sem repeti-la.
+        """
+        if version_id is None:
+            version_id = self.current_version()
+        if version_id is None:
+            return
+        with self._lock:
+            thread = self._prefetching.get(version_id)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._prefetch, args=(version_id,), daemon=True)
+            self._prefetching[version_id] = thread
+        thread.start()
+    
+    def _prefetch(self, version_id):
+        try:
+            self.engine(version_id)
+        except Exception:
+            # O erro de leitura reaparece (e é exibido) quando a versão for pedida de novo
+            pass
+        finally:
+            with self._lock:
+                self._prefetching.pop(version_id, None)
+    
+    def data(self, version_id=None):
+        """Dados em memória (LeadsData) da versão pedida ou da atual; None sem base"""
+        return self.data_cache.get(version_id)
+    
+    def merge(self, df, version_id=None):
+        """Upsert do DataFrame sobre a versão atual, sem salvar: (LeadsData, contagens)"""
+        current = self.data(version_id)
+        if current is None:
+            raise ValueError("Não há base atual para mesclar")
+        return merge_delta(current, df)
+    
+    def save(self, df, prepared=None):
+        """Grava a base como nova versão atual e a publica para todas as sessões"""
+        if prepared is None:
+            prepared = prepare_data(df)
+        meta = self.versions.create_version(prepared, origin='mesclagem' if prepared.delta else 'upload')
+        # No modo compartilhado a versão é mapeada do disco na primeira consulta, sem cópia privada;
+        # no motor SQLite as consultas vão ao banco e as linhas não ficam no processo
+        if not self.versions.shared_dataset and self.engine_name != 'sqlite':
+            # As chaves de lead da mescla seguem valendo para a próxima
+            self.data_cache.publish(replace(prepared, version=meta['id'], memo=dict(prepared.memo), delta=None))
+        return meta
+    
+    def ingest(self, source, merge=False, progress=None):
+        """Lê um .xlsx (caminho ou arquivo) ou DataFrame e o publica como nova versão.
+        
+        Com `merge`, o conteúdo é mesclado na versão atual (se houver).
+        Retorna (metadados da versão, contagens da mescla ou None).
+        """
+        if isinstance(source, pd.DataFrame):
+            df = encode_categories(source)
+        else:
+            df, _ = read_excel_streaming(source, progress=progress)
+        
+        if merge and self.current_version() is not None:
+            merged, counts = self.merge(df)
+            return self.save(merged.raw, merged), counts
+        return self.save(df), None
+    
+    def join_exports(self, hubspot_source, genesys_source, progress=None):
+        """Cruza as exportações brutas do HubSpot e do Genesys, sem salvar: (DataFrame, relatório)"""
+        return join_exports(hubspot_source, genesys_source, progress=progress)
+    
+    def rollback(self, version_id):
+        """Torna atual uma versão anterior"""
+        self.versions.rollback(version_id)
+    
+    def engine(self, version_id=None):
+        """Motor de consultas configurado para a versão (None se ela não existir)"""
+        if version_id is None:
+            version_id = self.current_version()
+        if version_id is None or self.versions.meta(version_id) is None:
+            return None
+        if self.engine_name == 'sqlite':
+            return self._sqlite_engine(version_id)
+        data = self.data_cache.get(version_id)
+        return PandasQueryEngine(data) if data is not None else None
+    
+    def _sqlite_engine(self, version_id):
+        # O banco é gerado na primeira consulta da versão, se ainda não existir
+        with self._lock:
+            engine = self._sqlite_engines.get(version_id)
+            if engine is None:
+                engine = SQLiteQueryEngine(self.versions.sqlite_path(version_id), version_id)
+                self._sqlite_engines[version_id] = engine
+                while len(self._sqlite_engines) > self._cache_versions:
+                    self._sqlite_engines.popitem(last=False)
+            self._sqlite_engines.move_to_end(version_id)
+            return engine
+    
+    def filter(self, selection=None, version_id=None):
+        """Resultado (FilterResult) da seleção, reaproveitado entre sessões para a mesma versão"""
+        if selection is None:
+            selection = FilterSelection()
+        engine = self.engine(version_id)
+        if engine is None:
+            return None
+        
+        key = (engine.name, engine.version, selection.normalized())
+        result = self.filter_cache.get(key)
+        if result is None:
+            result = engine.compute(selection)
+            self.filter_cache.put(key, result, result.nbytes)
+        return result
+    
+    def search(self, result, query):
+        """Linhas do resultado que casam com a busca livre por nome, telefone ou e-mail.
+        
+        O índice de busca é montado uma vez por versão; a busca se combina com
+        a seleção do resultado e também fica no LRU de filtros. Devolve um
+        FilterResult com as linhas e KPIs encontrados (sem séries de gráficos).
+        """
+        query = (query or '').strip()
+        if not query:
+            return result
+        engine = self.engine(result.version)
+        key = (engine.name, engine.version, result.selection.normalized(), 'busca', query.lower())
+        found = self.filter_cache.get(key)
+        if found is None:
+            found = engine.search(result, query)
+            self.filter_cache.put(key, found, found.nbytes)
+        return found
+    
+    def metrics(self, result):
+        """KPIs do resultado: total, disparados, não disparados e taxa de disparo"""
+        return result.metrics
+    
+    def chart_series(self, result, granularity=None, max_points=TIMELINE_MAX_POINTS):
+        """Séries dos gráficos; com `granularity`, a linha do tempo já vem reagrupada"""
+        series = dict(result.series)
+        if granularity is not None:
+            series['timeline'] = timeline_points(series['timeline'], granularity, max_points)
+        return series
+    
+    def page(self, result, n, page_size=20, sort_column=None, descending=False):
+        """Página `n` (a partir de 1) da tabela detalhada, formatada para exibição"""
+        engine = self.engine(result.version)
+        return engine.page(result.selection, result, n, page_size, sort_column, descending)
+    
+    def rows(self, result):
+        """Todas as linhas do resultado com as colunas da exportação"""
+        engine = self.engine(result.version)
+        return engine.rows(result.selection, result)
+    
+    def cached_export(self, result, fmt):
+        """Exportação já gerada para a mesma seleção/versão: (nome do arquivo, bytes) ou None"""
+        return self.export_cache.get(self._export_key(result, fmt))
+    
+    def export(self, result, fmt, prefix='leads_whatsapp'):
+        """Gera (ou reaproveita) o arquivo do resultado no formato `fmt` de EXPORT_FORMATS.
+        
+        Retorna (nome do arquivo, bytes).
+        """
+        key = self._export_key(result, fmt)
+        export = self.export_cache.get(key)
+        if export is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            content = EXPORT_FORMATS[fmt]['builder'](self.rows(result), result.metrics)
+            export = (f"{prefix}_{timestamp}.{fmt}", content)
+            self.export_cache.put(key, export, len(content))
+        return export
+    
+    def _export_key(self, result, fmt):
+        return (self.engine_name, result.version, result.selection.normalized(), result.search, fmt)
@@ -0,0 +1,50 @@
+"""Cache LRU limitado por memória, compartilhado entre sessões/threads"""
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """Cache LRU limitado por memória (bytes), seguro para uso entre sessões"""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+            self.misses += 1
+            return None
+    
+    def put(self, key, value, nbytes):
+        with self._lock:
+            if key in self._items:
+                self.current_bytes -= self._items.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._items[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._items.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+    
+    def stats(self):
+        """Contadores de uso, taxa de acerto e memória ocupada"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': (self.hits / lookups * 100) if lookups > 0 else 0,
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,51 @@
+"""Configuração do núcleo: caminhos da base e limites ajustáveis por variável de ambiente"""
+import os
+from pathlib import Path
+
+# Diretório para armazenar dados
+DATA_DIR = Path("data")
+DATA_FILE = DATA_DIR / "base_leads.xlsx"
+
+# Versões da base: um diretório imutável por upload + ponteiro para a versão atual
+VERSIONS_DIR = DATA_DIR / "versions"
+CURRENT_FILE = DATA_DIR / "CURRENT"
+VERSIONS_KEEP = int(os.getenv("DATA_VERSIONS_KEEP", "10"))
+
+# Motor de consultas do visualizador: 'pandas' (em memória) ou 'sqlite' (banco local por versão)
+QUERY_ENGINE = os.getenv("QUERY_ENGINE", "pandas").strip().lower()
+
+# Base compartilhada entre processos: cada versão também é gravada como dataset Arrow e os
+# processos (vários workers atrás de um proxy) mapeiam o mesmo arquivo em vez de copiar a base
+SHARED_DATASET = os.getenv("SHARED_DATASET", "0").strip().lower() in ("1", "true", "yes")
+
+# Versões mantidas prontas em memória ao mesmo tempo (visualizadores fixados em versões anteriores)
+DATA_CACHE_VERSIONS = int(os.getenv("DATA_CACHE_VERSIONS", "3"))
+
+# Colunas obrigatórias de qualquer base enviada pelo administrador
+REQUIRED_COLUMNS = ['Info Disparo', 'Status', 'Colégio de Interesse', 'Data de criação do Lead Raiz']
+
+# Linhas lidas por lote no upload da base
+INGEST_CHUNK_ROWS = 5_000
+
+# Colunas de baixa cardinalidade mantidas como category (códigos inteiros + dicionário)
+CATEGORICAL_COLUMNS = ['Colégio de Interesse', 'Status', 'Info Disparo']
+
+# Limite de memória do cache de resultados de filtros (MB)
+FILTER_CACHE_MAX_MB = float(os.getenv("FILTER_CACHE_MAX_MB", "64"))
+
+# Limite de memória do cache de arquivos exportados (MB) e linhas por lote na escrita
+EXPORT_CACHE_MAX_MB = float(os.getenv("EXPORT_CACHE_MAX_MB", "256"))
+EXPORT_CHUNK_ROWS = 10_000
+
+# Limite de linhas de uma planilha do Excel (menos a linha de cabeçalho)
+EXCEL_MAX_ROWS = 1_048_575
+
+# Máximo de pontos no gráfico temporal (acima disso a série é reduzida com LTTB; 0 = sem limite)
+TIMELINE_MAX_POINTS = int(os.getenv("TIMELINE_MAX_POINTS", "400"))
+
+# Instrumentação de desempenho (spans por etapa de cada rerun) e reruns mantidos no histórico
+PROFILING_ENABLED = os.getenv("DASHBOARD_PROFILING", "0").strip().lower() in ("1", "true", "yes")
+PROFILING_HISTORY = int(os.getenv("DASHBOARD_PROFILING_HISTORY", "200"))
+
+# Linhas do log de disparos do Genesys lidas por lote no cruzamento com o HubSpot
+JOIN_CHUNK_ROWS = int(os.getenv("JOIN_CHUNK_ROWS", "200000"))
@@ -0,0 +1,408 @@
+"""Motores de consulta do visualizador (pandas em memória ou SQLite por versão)"""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import INGEST_CHUNK_ROWS
+from .model import (
+    DETAIL_COLUMNS,
+    FilterResult,
+    calculate_metrics,
+    canonical_columns,
+    compute_filter_result,
+    detail_columns,
+    detail_frame,
+    filter_options,
+    page_row_ids,
+)
+from .search import SEARCH_EMAIL_COLUMN, SEARCH_NAME_COLUMN, SEARCH_PHONE_COLUMNS, build_search_index
+
+# Colunas derivadas no motor SQLite: nome -> expressão SQL (mesma regra de DERIVED_COLUMNS)
+DERIVED_SQL = {
+    'Status (Detalhado)': "CASE WHEN nao_disparado = 1 THEN status ELSE '—' END",
+}
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def _sqlite_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, int) and not -2**63 <= value < 2**63:
+        # Inteiros fora do INTEGER de 64 bits do SQLite são guardados como texto
+        return str(value)
+    return value
+
+def _sqlite_column(series):
+    """Valores aceitos pelo SQLite (datas em texto ISO, ausentes como NULL)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)
+    else:
+        values = series.astype(object).map(_sqlite_value)
+    return values.where(series.notna(), None)
+
+def sqlite_rows(chunk, offset=0):
+    """Lote da base no formato da tabela `leads`: colunas canônicas + colunas de exibição"""
+    chunk = chunk.reset_index(drop=True)
+    canon = canonical_columns(chunk)
+    frame = pd.DataFrame({
+        'row_id': np.arange(offset, offset + len(chunk)),
+        'data': _sqlite_column(canon['data']),
+        'dia': _sqlite_column(canon['dia'].dt.strftime('%Y-%m-%d')),
+        'disparo': _sqlite_column(canon['disparo']),
+        'disparado': canon['disparado'].astype(int),
+        'nao_disparado': canon['nao_disparado'].astype(int),
+        'colegio': _sqlite_column(canon['colegio']),
+        'status': _sqlite_column(canon['status']),
+    })
+    for col in DETAIL_COLUMNS:
+        if col in chunk.columns:
+            frame[col] = _sqlite_column(chunk[col])
+    return frame
+
+def write_sqlite(path, chunks):
+    """Grava a base no banco do motor SQLite, lote a lote, via arquivo temporário + rename"""
+    path = Path(path)
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_file.unlink(missing_ok=True)
+    
+    conn = sqlite3.connect(tmp_file)
+    try:
+        offset = 0
+        for chunk in chunks:
+            frame = sqlite_rows(chunk, offset)
+            if offset == 0:
+                # Colunas de exibição sem tipo declarado: cada valor mantém seu tipo (número/texto)
+                extra = ''.join(f", {_quote(col)}" for col in frame.columns[8:])
+                conn.execute(
+                    "CREATE TABLE leads (row_id INTEGER PRIMARY KEY, data TEXT, dia TEXT, "
+                    "disparo TEXT, disparado INTEGER, nao_disparado INTEGER, colegio TEXT, "
+                    f"status TEXT{extra})"
+                )
+                insert = f"INSERT INTO leads VALUES ({', '.join('?' * len(frame.columns))})"
+            conn.executemany(insert, frame.itertuples(index=False, name=None))
+            offset += len(frame)
+        
+        for column in ('colegio', 'disparo', 'status', 'dia'):
+            conn.execute(f"CREATE INDEX idx_leads_{column} ON leads ({column})")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_file, path)
+
+def patch_sqlite(source, path, frame, row_ids):
+    """Grava em `path` o banco `source` com as linhas `row_ids` de `frame` inseridas/regravadas.
+    
+    Usado na mesclagem: o banco da versão anterior é copiado e só as linhas do
+    delta passam por sqlite_rows. Se as colunas da base mudaram, o banco é
+    gravado por inteiro.
+    """
+    path = Path(path)
+    with closing(sqlite3.connect(f"{Path(source).resolve().as_uri()}?mode=ro", uri=True)) as conn:
+        table_columns = [row[1] for row in conn.execute("PRAGMA table_info(leads)")]
+    if table_columns[8:] != [col for col in DETAIL_COLUMNS if col in frame.columns]:
+        write_sqlite(path, iter_frame_chunks(frame))
+        return
+    
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    shutil.copyfile(source, tmp_file)
+    try:
+        conn = sqlite3.connect(tmp_file)
+        try:
+            insert = f"INSERT OR REPLACE INTO leads VALUES ({', '.join('?' * len(table_columns))})"
+            for start in range(0, len(row_ids), INGEST_CHUNK_ROWS):
+                chunk_ids = row_ids[start:start + INGEST_CHUNK_ROWS]
+                rows = sqlite_rows(frame.iloc[chunk_ids]).assign(row_id=chunk_ids)
+                conn.executemany(insert, rows.itertuples(index=False, name=None))
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_file, path)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+def iter_frame_chunks(frame, chunk_rows=INGEST_CHUNK_ROWS):
+    """Fatias consecutivas do DataFrame (ao menos uma, mesmo vazio)"""
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+def iter_parquet_chunks(path, chunk_rows=INGEST_CHUNK_ROWS):
+    """Lotes de linhas de um arquivo Parquet, sem carregá-lo inteiro"""
+    import pyarrow.parquet as pq
+    
+    parquet = pq.ParquetFile(path)
+    batches = parquet.iter_batches(batch_size=chunk_rows)
+    first = next(batches, None)
+    yield (first.to_pandas() if first is not None else parquet.schema_arrow.empty_table().to_pandas())
+    for batch in batches:
+        yield batch.to_pandas()
+
+class PandasQueryEngine:
+    """Motor em memória: cubo de contagens + índice de bitmaps da versão carregada"""
+    
+    name = 'pandas'
+    
+    def __init__(self, data):
+        self.data = data
+        self.version = data.version
+        self.total_rows = len(data.raw)
+    
+    def columns(self):
+        return detail_columns(self.data)
+    
+    def options(self):
+        """Valores dos filtros da sidebar e período coberto pela base"""
+        return filter_options(self.data)
+    
+    def compute(self, selection):
+        return compute_filter_result(self.data, selection)
+    
+    def search(self, result, query):
+        """Linhas do resultado que casam com a busca livre (nome, telefone ou e-mail)"""
+        index = self.data.memo.get(('search',))
+        if index is None:
+            index = build_search_index(self.data.raw)
+            self.data.memo[('search',)] = index
+        
+        matches = index.lookup(query)
+        in_result = np.zeros(self.total_rows, dtype=bool)
+        in_result[result.row_ids] = True
+        row_ids = matches[in_result[matches]]
+        return FilterResult(
+            row_ids=row_ids,
+            metrics=calculate_metrics(self.data.canon.iloc[row_ids]),
+            series={},
+            selection=result.selection,
+            version=self.version,
+            search=query,
+        )
+    
+    def page(self, selection, result, page, page_size, sort_column=None, descending=False):
+        """Linhas de uma página da tabela detalhada, já formatadas para exibição"""
+        page_ids = page_row_ids(self.data, result.row_ids, page, page_size, sort_column, descending)
+        frame = detail_frame(self.data, page_ids)
+        
+        # Formatar data (valor original mantido quando não é uma data válida)
+        if 'Data de criação do Lead Raiz' in frame.columns:
+            frame['Data de criação do Lead Raiz'] = (
+                self.data.canon['data'].iloc[page_ids].dt.strftime('%d/%m/%Y %H:%M')
+                .fillna(frame['Data de criação do Lead Raiz'].astype(str))
+            )
+        return frame
+    
+    def rows(self, selection, result):
+        """Todas as linhas da seleção com as colunas da exportação"""
+        return detail_frame(self.data, result.row_ids)
+
+class SQLiteQueryEngine:
+    """Motor SQLite: consultas parametrizadas sobre o banco gravado com a versão.
+    
+    Nenhuma linha da base fica na memória do processo; filtros, KPIs, séries e
+    páginas da tabela são resolvidos pelo SQLite com índices em colégio,
+    disparo, status e dia, e vários processos podem ler o mesmo arquivo.
+    """
+    
+    name = 'sqlite'
+    
+    # Colunas da tabela cuja ordenação usa outra expressão
+    SORT_EXPRESSIONS = {'Data de criação do Lead Raiz': 'data', **DERIVED_SQL}
+    
+    def __init__(self, path, version):
+        self.path = Path(path)
+        self.version = version
+        
+        table_columns = [row[1] for row in self._query("PRAGMA table_info(leads)")]
+        self._columns = [
+            col for col in DETAIL_COLUMNS
+            if col in table_columns or col in DERIVED_SQL
+        ]
+        self.total_rows = self._query("SELECT COUNT(*) FROM leads")[0][0]
+        self._search_columns = [
+            col for col in [SEARCH_NAME_COLUMN, SEARCH_EMAIL_COLUMN, *SEARCH_PHONE_COLUMNS]
+            if col in table_columns
+        ]
+        self._search_index = None
+        self._search_lock = threading.Lock()
+    
+    def _connect(self):
+        # Uma conexão somente leitura por consulta: as sessões rodam em threads diferentes
+        return closing(sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True))
+    
+    def _query(self, sql, params=()):
+        with self._connect() as conn:
+            return conn.execute(sql, params).fetchall()
+    
+    def _where(self, selection, *extra):
+        clauses = list(extra)
+        params = []
+        for column, values in (
+            ('colegio', selection.colegios),
+            ('disparo', selection.disparo),
+            ('status', selection.status),
+        ):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        
+        # Intervalo de datas inclusivo em dias inteiros
+        if selection.data_inicio is not None and selection.data_fim is not None:
+            clauses.append("dia BETWEEN ? AND ?")
+            params.extend([selection.data_inicio.isoformat(), selection.data_fim.isoformat()])
+        
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+    
+    def _result_where(self, selection, result):
+        # Resultado de busca: as linhas já foram resolvidas pelo índice
+        if result.row_ids is not None:
+            return " WHERE row_id IN (SELECT value FROM json_each(?))", [json.dumps(result.row_ids.tolist())]
+        return self._where(selection)
+    
+    def columns(self):
+        return list(self._columns)
+    
+    def options(self):
+        """Valores dos filtros da sidebar e período coberto pela base"""
+        def distinct(column):
+            return [row[0] for row in self._query(
+                f"SELECT DISTINCT {column} FROM leads WHERE {column} IS NOT NULL ORDER BY {column}"
+            )]
+        
+        min_date, max_date = self._query("SELECT MIN(dia), MAX(dia) FROM leads")[0]
+        return {
+            'colegios': distinct('colegio'),
+            'status': distinct('status'),
+            'min_date': date.fromisoformat(min_date) if min_date else None,
+            'max_date': date.fromisoformat(max_date) if max_date else None,
+        }
+    
+    def compute(self, selection):
+        """KPIs e séries dos gráficos por agregação no banco"""
+        where, params = self._where(selection)
+        total, disparados, nao_disparados = self._query(
+            f"SELECT COUNT(*), COALESCE(SUM(disparado), 0), COALESCE(SUM(nao_disparado), 0) FROM leads{where}",
+            params,
+        )[0]
+        
+        def counts(column, *extra):
+            column_where, column_params = self._where(selection, f"{column} IS NOT NULL", *extra)
+            rows = self._query(
+                f"SELECT {column}, COUNT(*) AS n FROM leads{column_where} "
+                f"GROUP BY {column} ORDER BY n DESC, {column}",
+                column_params,
+            )
+            return pd.Series(
+                [n for _, n in rows],
+                index=pd.Index([value for value, _ in rows], name=column, dtype=object),
+                name='n',
+                dtype='int64',
+            )
+        
+        timeline = counts('dia').sort_index()
+        return FilterResult(
+            row_ids=None,
+            metrics={
+                'total_leads': total,
+                'disparados': disparados,
+                'nao_disparados': nao_disparados,
+                'taxa_disparo': (disparados / total * 100) if total > 0 else 0,
+            },
+            series={
+                'disparo': counts('disparo'),
+                'colegios': counts('colegio'),
+                'timeline': pd.DataFrame({
+                    'Data': pd.to_datetime(timeline.index).as_unit('ns'),
+                    'Quantidade': timeline.to_numpy(),
+                }),
+                'nao_disparados_status': counts('status', "nao_disparado = 1"),
+            },
+            selection=selection,
+            version=self.version,
+        )
+    
+    def search(self, result, query):
+        """Linhas do resultado que casam com a busca livre (nome, telefone ou e-mail).
+        
+        O índice é montado na primeira busca da versão, lendo só as colunas
+        de nome, e-mail e telefone; o banco apenas confirma quais das linhas
+        encontradas estão na seleção da sidebar.
+        """
+        with self._search_lock:
+            if self._search_index is None:
+                select = ', '.join(_quote(col) for col in self._search_columns) or "NULL"
+                with self._connect() as conn:
+                    frame = pd.read_sql_query(f"SELECT {select} FROM leads ORDER BY row_id", conn)
+                self._search_index = build_search_index(frame)
+        
+        matches = self._search_index.lookup(query)
+        where, params = self._where(result.selection, "row_id IN (SELECT value FROM json_each(?))")
+        rows = self._query(
+            f"SELECT row_id, disparado, nao_disparado FROM leads{where} ORDER BY row_id",
+            [json.dumps(matches.tolist())] + params,
+        )
+        row_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        disparados = sum(row[1] for row in rows)
+        nao_disparados = sum(row[2] for row in rows)
+        return FilterResult(
+            row_ids=row_ids,
+            metrics={
+                'total_leads': len(rows),
+                'disparados': disparados,
+                'nao_disparados': nao_disparados,
+                'taxa_disparo': (disparados / len(rows) * 100) if rows else 0,
+            },
+            series={},
+            selection=result.selection,
+            version=self.version,
+            search=query,
+        )
+    
+    def _select(self, tail, params):
+        select = ', '.join(
+            f"{DERIVED_SQL[col]} AS {_quote(col)}" if col in DERIVED_SQL else _quote(col)
+            for col in self._columns
+        )
+        with self._connect() as conn:
+            frame = pd.read_sql_query(f"SELECT {select}, data AS _data FROM leads{tail}", conn, params=params)
+        return frame, pd.to_datetime(frame.pop('_data'))
+    
+    def page(self, selection, result, page, page_size, sort_column=None, descending=False):
+        """Linhas de uma página da tabela detalhada (ORDER BY + LIMIT/OFFSET no banco)"""
+        where, params = self._result_where(selection, result)
+        direction = 'DESC' if descending else 'ASC'
+        if sort_column in self._columns:
+            expr = self.SORT_EXPRESSIONS.get(sort_column, _quote(sort_column))
+            # Mesma ordem do motor pandas: vazios no fim (no começo quando decrescente)
+            order = f"{expr} IS NULL {direction}, {expr} {direction}, row_id {direction}"
+        else:
+            order = f"row_id {direction}"
+        
+        frame, dates = self._select(
+            f"{where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [page_size, (page - 1) * page_size],
+        )
+        if 'Data de criação do Lead Raiz' in frame.columns:
+            frame['Data de criação do Lead Raiz'] = (
+                dates.dt.strftime('%d/%m/%Y %H:%M')
+                .fillna(frame['Data de criação do Lead Raiz'].astype(str))
+            )
+        return frame
+    
+    def rows(self, selection, result):
+        """Todas as linhas da seleção com as colunas da exportação"""
+        where, params = self._result_where(selection, result)
+        frame, dates = self._select(f"{where} ORDER BY row_id", params)
+        if 'Data de criação do Lead Raiz' in frame.columns:
+            frame['Data de criação do Lead Raiz'] = (
+                dates.astype(object).where(dates.notna(), frame['Data de criação do Lead Raiz'])
+            )
+        return frame
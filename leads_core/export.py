@@ -0,0 +1,128 @@
+"""Exportação dos leads filtrados (Excel, CSV e Parquet)"""
+import io
+import json
+
+import pandas as pd
+
+from .config import EXCEL_MAX_ROWS, EXPORT_CHUNK_ROWS
+from .ingest import arrow_compatible
+
+def summary_rows(metrics):
+    """Linhas da aba/arquivo 'Resumo' da exportação"""
+    return [
+        ('Total de Leads', metrics['total_leads']),
+        ('Disparados', metrics['disparados']),
+        ('Não Disparados', metrics['nao_disparados']),
+        ('Taxa de Disparo (%)', round(metrics['taxa_disparo'], 2)),
+    ]
+
+def iter_export_rows(frame):
+    """Linhas da exportação em lotes, com ausentes como None"""
+    for start in range(0, len(frame), EXPORT_CHUNK_ROWS):
+        chunk = frame.iloc[start:start + EXPORT_CHUNK_ROWS].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+def write_xlsx(df, path):
+    """Grava o DataFrame em .xlsx com o writer em streaming (write-only) do openpyxl"""
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(df.columns))
+    for row in iter_export_rows(df):
+        sheet.append(row)
+    workbook.save(path)
+
+def build_excel_export(frame, metrics):
+    """Gera o .xlsx (abas 'Leads Filtrados' e 'Resumo') com o writer em modo streaming.
+    
+    O modo write_only do openpyxl grava as linhas direto no XML da planilha,
+    sem montar o modelo de células em memória. Seleções acima do limite de
+    linhas de uma planilha (EXCEL_MAX_ROWS) levantam ValueError antes de
+    qualquer escrita.
+    """
+    from openpyxl import Workbook
+    
+    if len(frame) > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"{len(frame)} linhas passam do limite de {EXCEL_MAX_ROWS} linhas do Excel; exporte em CSV ou Parquet"
+        )
+    
+    workbook = Workbook(write_only=True)
+    
+    sheet = workbook.create_sheet('Leads Filtrados')
+    sheet.append(list(frame.columns))
+    for row in iter_export_rows(frame):
+        sheet.append(row)
+    
+    summary = workbook.create_sheet('Resumo')
+    summary.append(['Métrica', 'Valor'])
+    for row in summary_rows(metrics):
+        summary.append(row)
+    
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def iter_csv_chunks(frame):
+    """CSV da exportação em blocos de bytes (cabeçalho + um bloco por lote de linhas)"""
+    yield frame.iloc[:0].to_csv(index=False).encode('utf-8-sig')
+    for start in range(0, len(frame), EXPORT_CHUNK_ROWS):
+        chunk = frame.iloc[start:start + EXPORT_CHUNK_ROWS]
+        yield chunk.to_csv(index=False, header=False).encode('utf-8')
+
+def build_csv_export(frame, metrics):
+    """Gera o CSV dos leads filtrados inteiro em memória (bytes).
+    
+    O st.download_button e o cache de exportações trabalham com o arquivo
+    completo; quem grava em disco usa `iter_csv_chunks` (ver `write_export`).
+    """
+    return b''.join(iter_csv_chunks(frame))
+
+def build_parquet_export(frame, metrics):
+    """Gera o Parquet dos leads filtrados; o resumo vai nos metadados do arquivo"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    table = pa.Table.from_pandas(arrow_compatible(frame), preserve_index=False)
+    resumo = json.dumps(dict(summary_rows(metrics)), ensure_ascii=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'resumo': resumo.encode('utf-8')})
+    
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, row_group_size=EXPORT_CHUNK_ROWS * 10)
+    return buffer.getvalue()
+
+def write_export(frame, metrics, fmt, path):
+    """Grava a exportação em `path`; formatos com 'chunks' são gravados bloco a bloco"""
+    spec = EXPORT_FORMATS[fmt]
+    with open(path, 'wb') as file:
+        if 'chunks' in spec:
+            file.writelines(spec['chunks'](frame))
+        else:
+            file.write(spec['builder'](frame, metrics))
+
+def build_summary_csv(metrics):
+    """Arquivo 'Resumo' separado, que acompanha as exportações CSV e Parquet"""
+    return pd.DataFrame(summary_rows(metrics), columns=['Métrica', 'Valor']).to_csv(index=False).encode('utf-8-sig')
+
+# Formatos de exportação disponíveis no visualizador
+EXPORT_FORMATS = {
+    'xlsx': {
+        'label': 'Excel (.xlsx)',
+        'builder': build_excel_export,
+        'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'max_rows': EXCEL_MAX_ROWS,
+    },
+    'csv': {
+        'label': 'CSV (.csv)',
+        'builder': build_csv_export,
+        'chunks': iter_csv_chunks,
+        'mime': 'text/csv',
+    },
+    'parquet': {
+        'label': 'Parquet (.parquet)',
+        'builder': build_parquet_export,
+        'mime': 'application/vnd.apache.parquet',
+    },
+}
@@ -0,0 +1,177 @@
+"""Leitura das planilhas enviadas e conversões de tipos da ingestão"""
+import hashlib
+
+import pandas as pd
+
+from .config import CATEGORICAL_COLUMNS, INGEST_CHUNK_ROWS, REQUIRED_COLUMNS
+
+def file_signature(path):
+    """Assinatura do arquivo fonte: mtime, tamanho e hash SHA-256"""
+    stat = path.stat()
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha.hexdigest()}
+
+def arrow_compatible(df):
+    """Prepara o DataFrame para formatos colunares (snapshot e exportação Parquet).
+    
+    Colunas object com tipos mistos (ex.: telefone numérico + '(Nenhum valor)')
+    não têm tipo Arrow único; nesses casos os valores são gravados como texto.
+    """
+    import pyarrow as pa
+    
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+def encode_categories(df):
+    """Converte as colunas de baixa cardinalidade para category (sem alterar valores)"""
+    to_encode = {
+        col: 'category' for col in CATEGORICAL_COLUMNS
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    return df.astype(to_encode) if to_encode else df
+
+class MissingColumnsError(ValueError):
+    """Planilha sem alguma das colunas obrigatórias"""
+    
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+
+def _dedupe_header(header):
+    """Nomes de coluna no mesmo padrão do pd.read_excel ('Coluna', 'Coluna.1', 'Unnamed: 3')"""
+    names = []
+    seen = {}
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def iter_excel_chunks(source, chunk_rows=INGEST_CHUNK_ROWS, required=(), progress=None):
+    """Lê a primeira planilha do .xlsx em DataFrames de até `chunk_rows` linhas (openpyxl read-only).
+    
+    O cabeçalho é validado contra `required` antes de ler o corpo.
+    `progress(linhas_lidas, total_estimado)` é chamado após cada lote.
+    """
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        
+        header = _dedupe_header(next(rows, ()))
+        missing = [col for col in required if col not in header]
+        if missing:
+            raise MissingColumnsError(missing)
+        
+        total_estimate = (sheet.max_row - 1) if sheet.max_row else None
+        rows_read = 0
+        buffer = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            # Mesma conversão do pd.read_excel: números inteiros guardados como float viram int
+            buffer.append(tuple(
+                int(value) if isinstance(value, float) and value.is_integer() else value
+                for value in row
+            ))
+            if len(buffer) >= chunk_rows:
+                rows_read += len(buffer)
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+                if progress is not None:
+                    progress(rows_read, total_estimate)
+        if buffer or rows_read == 0:
+            rows_read += len(buffer)
+            yield pd.DataFrame(buffer, columns=header)
+            if progress is not None:
+                progress(rows_read, total_estimate)
+    finally:
+        workbook.close()
+
+def _csv_separator(source):
+    """Separador do CSV (';' ou ',') pela primeira linha do arquivo"""
+    if hasattr(source, 'read'):
+        first = source.readline()
+        source.seek(0)
+    else:
+        with open(source, 'rb') as fh:
+            first = fh.readline()
+    if isinstance(first, bytes):
+        first = first.decode('utf-8', errors='ignore')
+    return ';' if first.count(';') > first.count(',') else ','
+
+def iter_table_chunks(source, chunk_rows=INGEST_CHUNK_ROWS, required=(), progress=None):
+    """Lotes de linhas de uma planilha .xlsx, .csv ou .parquet (caminho ou arquivo enviado).
+    
+    CSV é lido como texto (sem inferência de tipos); o formato vem da extensão do nome.
+    """
+    name = str(getattr(source, 'name', source)).lower()
+    if name.endswith('.xlsx'):
+        yield from iter_excel_chunks(source, chunk_rows, required, progress)
+        return
+    
+    if name.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        
+        parquet = pq.ParquetFile(source)
+        header = parquet.schema_arrow.names
+        batches = (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunk_rows))
+        total_estimate = parquet.metadata.num_rows
+    elif name.endswith(('.csv', '.txt')):
+        sep = _csv_separator(source)
+        header = pd.read_csv(source, sep=sep, nrows=0, encoding='utf-8-sig').columns
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        batches = pd.read_csv(source, sep=sep, dtype=str, chunksize=chunk_rows, encoding='utf-8-sig')
+        total_estimate = None
+    else:
+        raise ValueError(f"Formato de arquivo não suportado: {name}")
+    
+    missing = [col for col in required if col not in header]
+    if missing:
+        raise MissingColumnsError(missing)
+    
+    rows_read = 0
+    for chunk in batches:
+        rows_read += len(chunk)
+        yield chunk
+        if progress is not None:
+            progress(rows_read, total_estimate)
+    if rows_read == 0:
+        yield pd.DataFrame(columns=list(header))
+
+def read_excel_streaming(source, progress=None):
+    """Lê a primeira planilha do .xlsx em lotes de linhas (openpyxl read-only).
+    
+    O cabeçalho é validado contra REQUIRED_COLUMNS antes de ler o corpo, e as
+    estatísticas do upload (linhas, disparados) são acumuladas a cada lote.
+    `progress(linhas_lidas, total_estimado)` é chamado após cada lote.
+    Retorna (DataFrame, estatísticas).
+    """
+    chunks = []
+    stats = {'rows': 0, 'columns': 0, 'disparados': 0}
+    for chunk in iter_excel_chunks(source, required=REQUIRED_COLUMNS, progress=progress):
+        info = chunk['Info Disparo'].astype(str).str.strip().str.lower()
+        stats['rows'] += len(chunk)
+        stats['disparados'] += int((info == 'disparado').sum())
+        stats['columns'] = len(chunk.columns)
+        chunks.append(chunk)
+    
+    stats['taxa_disparo'] = (stats['disparados'] / stats['rows'] * 100) if stats['rows'] > 0 else 0
+    df = encode_categories(pd.concat(chunks, ignore_index=True))
+    return df, stats
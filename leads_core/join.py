@@ -0,0 +1,194 @@
+"""Cruzamento HubSpot × Genesys: calcula Info Disparo/Status a partir das exportações brutas"""
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from .config import JOIN_CHUNK_ROWS
+from .ingest import MissingColumnsError, encode_categories, iter_table_chunks
+
+# Colunas de telefone da exportação do HubSpot (um lead casa por qualquer uma delas)
+HUBSPOT_PHONE_COLUMNS = ['Número de telefone', 'Número de Telefone Real', 'Celular Tratado']
+HUBSPOT_EMAIL_COLUMN = 'E-mail'
+HUBSPOT_REQUIRED_COLUMNS = ['Colégio de Interesse', 'Data de criação do Lead Raiz']
+
+# Etapa do pipeline usada como Status quando a exportação não traz a coluna 'Status'
+HUBSPOT_STAGE_COLUMN = 'Prospecção pipeline stage'
+HUBSPOT_CONTACT_COLUMN = 'Contato ID'
+
+# Nomes aceitos para as chaves no log de disparos (comparados sem acento/caixa/pontuação)
+GENESYS_PHONE_COLUMNS = ['Telefone', 'Número de telefone', 'Número', 'Phone', 'Phone Number', 'DNIS', 'ANI', 'Destino']
+GENESYS_EMAIL_COLUMNS = ['E-mail', 'Email', 'Endereço de e-mail']
+
+# Valor de célula vazia nas exportações do HubSpot
+EMPTY_VALUE = '(Nenhum valor)'
+
+def phone_digits(series):
+    """Só os dígitos do telefone (vetorizado), sem o '.0' de colunas lidas como float.
+    
+    Uma célula vazia basta para o read_excel ler a coluna como float; sem o
+    '.0' o número casa com o mesmo telefone gravado como texto ou inteiro.
+    """
+    return series.astype(str).str.replace(r'\.0$', '', regex=True).str.replace(r'\D', '', regex=True)
+
+def normalize_phone(series):
+    """Telefone canônico DDD + número (NaN se inválido), vetorizado.
+    
+    Remove pontuação, zeros de discagem e o código do país (55); celulares
+    antigos de 8 dígitos ganham o 9 na frente para casar com o formato atual.
+    """
+    digits = phone_digits(series).str.lstrip('0')
+    has_country = digits.str.len().isin([12, 13]) & digits.str.startswith('55')
+    digits = digits.where(~has_country, digits.str[2:])
+    old_mobile = (digits.str.len() == 10) & digits.str[2].isin(['6', '7', '8', '9'])
+    digits = digits.where(~old_mobile, digits.str[:2] + '9' + digits.str[2:])
+    return digits.where(digits.str.len().isin([10, 11]))
+
+def normalize_email(series):
+    """E-mail sem espaços e em minúsculas (NaN se não tiver '@'), vetorizado"""
+    email = series.astype(str).str.strip().str.lower()
+    return email.where(email.str.contains('@', regex=False))
+
+def _fold(name):
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    return ''.join(ch for ch in name.lower() if ch.isalnum())
+
+def find_column(columns, candidates):
+    """Primeira coluna de `columns` que corresponde a um dos candidatos (sem acento/caixa)"""
+    folded = {_fold(col): col for col in columns}
+    for candidate in candidates:
+        if _fold(candidate) in folded:
+            return folded[_fold(candidate)]
+    return None
+
+class _KeyTable:
+    """Lado de construção do hash join: chaves únicas dos leads + contagem de disparos por chave"""
+    
+    def __init__(self, lead_keys):
+        keys = pd.concat(lead_keys, ignore_index=True).dropna() if lead_keys else pd.Series([], dtype=object)
+        self.keys = pd.Index(keys.unique())
+        # Código da chave de cada lead em cada coluna (-1 = sem chave válida)
+        self.lead_codes = [self.keys.get_indexer(column) for column in lead_keys]
+        self.hits = np.zeros(len(self.keys), dtype=np.int64)
+    
+    def probe(self, keys):
+        """Casa um lote de chaves do log; retorna a máscara das linhas casadas"""
+        codes = self.keys.get_indexer(keys)
+        found = codes >= 0
+        self.hits += np.bincount(codes[found], minlength=len(self.keys))
+        return found
+    
+    def matched(self, n_rows):
+        """Leads com ao menos um disparo casado por alguma de suas chaves"""
+        matched = np.zeros(n_rows, dtype=bool)
+        for codes in self.lead_codes:
+            matched |= (codes >= 0) & (self.hits[np.maximum(codes, 0)] > 0)
+        return matched
+    
+    def has_key(self, n_rows):
+        has_key = np.zeros(n_rows, dtype=bool)
+        for codes in self.lead_codes:
+            has_key |= codes >= 0
+        return has_key
+
+def join_dispatches(leads, dispatch_chunks, phone_column=None, email_column=None, progress=None):
+    """Hash join dos leads do HubSpot com o log de disparos do Genesys, lido em lotes.
+    
+    Os leads formam a tabela de chaves (telefone e e-mail normalizados) e o
+    log é percorrido lote a lote sem ficar inteiro em memória: de cada lote
+    só restam as contagens por chave. Um lead é 'Disparado' se qualquer um de
+    seus telefones ou o e-mail aparece no log. Retorna (DataFrame com Info
+    Disparo e Status, relatório de casamento).
+    """
+    start = time.perf_counter()
+    leads = leads.reset_index(drop=True)
+    n_rows = len(leads)
+    
+    phone_keys = [normalize_phone(leads[col]) for col in HUBSPOT_PHONE_COLUMNS if col in leads.columns]
+    email_keys = [normalize_email(leads[HUBSPOT_EMAIL_COLUMN])] if HUBSPOT_EMAIL_COLUMN in leads.columns else []
+    phones = _KeyTable(phone_keys)
+    emails = _KeyTable(email_keys)
+    
+    report = {'linhas_log': 0, 'linhas_log_casadas': 0, 'linhas_log_sem_chave': 0, 'lotes': 0}
+    for chunk in dispatch_chunks:
+        if report['lotes'] == 0:
+            phone_column = phone_column or find_column(chunk.columns, GENESYS_PHONE_COLUMNS)
+            email_column = email_column or find_column(chunk.columns, GENESYS_EMAIL_COLUMNS)
+            if phone_column is None and email_column is None:
+                raise MissingColumnsError(['telefone ou e-mail do disparo'])
+        
+        found = np.zeros(len(chunk), dtype=bool)
+        has_key = np.zeros(len(chunk), dtype=bool)
+        if phone_column is not None:
+            keys = normalize_phone(chunk[phone_column])
+            found |= phones.probe(keys)
+            has_key |= keys.notna().to_numpy()
+        if email_column is not None:
+            keys = normalize_email(chunk[email_column])
+            found |= emails.probe(keys)
+            has_key |= keys.notna().to_numpy()
+        
+        report['lotes'] += 1
+        report['linhas_log'] += len(chunk)
+        report['linhas_log_casadas'] += int(found.sum())
+        report['linhas_log_sem_chave'] += int((~has_key).sum())
+        if progress is not None:
+            progress(report['linhas_log'], None)
+    
+    by_phone = phones.matched(n_rows)
+    by_email = emails.matched(n_rows)
+    disparado = by_phone | by_email
+    
+    result = leads.assign(**{
+        'Info Disparo': np.where(disparado, 'Disparado', 'Não disparado'),
+        'Status': _status(leads, disparado, phones.has_key(n_rows)),
+    })
+    
+    report.update({
+        'leads': n_rows,
+        'leads_com_telefone': int(phones.has_key(n_rows).sum()),
+        'leads_com_email': int(emails.has_key(n_rows).sum()),
+        'disparados': int(disparado.sum()),
+        'por_telefone': int(by_phone.sum()),
+        'por_email': int(by_email.sum()),
+        'somente_email': int((by_email & ~by_phone).sum()),
+        'taxa_disparo': (int(disparado.sum()) / n_rows * 100) if n_rows > 0 else 0,
+        'taxa_casamento_log': (report['linhas_log_casadas'] / report['linhas_log'] * 100) if report['linhas_log'] > 0 else 0,
+        'coluna_telefone': phone_column,
+        'coluna_email': email_column,
+        'segundos': time.perf_counter() - start,
+    })
+    return result, report
+
+def _status(leads, disparado, has_phone):
+    """Status do lead: o da exportação, ou a etapa do pipeline com o motivo dos não disparados"""
+    if 'Status' in leads.columns:
+        return leads['Status']
+    
+    if HUBSPOT_STAGE_COLUMN in leads.columns:
+        status = leads[HUBSPOT_STAGE_COLUMN].astype(object).fillna(EMPTY_VALUE)
+    else:
+        status = pd.Series(EMPTY_VALUE, index=leads.index, dtype=object)
+    
+    if HUBSPOT_CONTACT_COLUMN in leads.columns:
+        contact = leads[HUBSPOT_CONTACT_COLUMN].astype(str).str.strip()
+        no_contact = (leads[HUBSPOT_CONTACT_COLUMN].isna() | contact.isin(['', EMPTY_VALUE])).to_numpy()
+    else:
+        no_contact = np.zeros(len(leads), dtype=bool)
+    
+    status = status.mask(~disparado & ~has_phone, 'Sem telefone')
+    return status.mask(~disparado & no_contact, 'Sem contato vinculado')
+
+def join_exports(hubspot_source, genesys_source, chunk_rows=JOIN_CHUNK_ROWS, progress=None):
+    """Lê a exportação do HubSpot e cruza com o log do Genesys (.xlsx, .csv ou .parquet).
+    
+    Retorna (base no formato do dashboard, relatório de casamento).
+    """
+    leads = pd.concat(iter_table_chunks(hubspot_source, required=HUBSPOT_REQUIRED_COLUMNS), ignore_index=True)
+    if not any(col in leads.columns for col in [*HUBSPOT_PHONE_COLUMNS, HUBSPOT_EMAIL_COLUMN]):
+        raise MissingColumnsError([' ou '.join([*HUBSPOT_PHONE_COLUMNS, HUBSPOT_EMAIL_COLUMN])])
+    
+    chunks = iter_table_chunks(genesys_source, chunk_rows)
+    joined, report = join_dispatches(leads, chunks, progress=progress)
+    return encode_categories(joined), report
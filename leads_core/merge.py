@@ -0,0 +1,156 @@
+"""Uploads incrementais: upsert do delta sobre a versão atual"""
+import numpy as np
+import pandas as pd
+
+from .ingest import MissingColumnsError
+from .join import phone_digits
+from .model import CUBE_DIMENSIONS, LeadsData, build_cube, prepare_data
+
+# Identidade de um lead para uploads incrementais (upsert)
+LEAD_KEY_COLUMNS = ['Número de telefone', 'E-mail', 'Data de criação do Lead Raiz']
+
+# Um mesmo contato pode ter vários Leads Raiz (um por filho/colégio) criados juntos;
+# quando base e delta trazem o ID do Lead Raiz, ele entra na chave
+LEAD_KEY_EXTRA_COLUMN = 'Lead Raiz ID'
+
+def lead_keys(raw, canon, with_lead_id=False):
+    """Chave de identidade por linha: dígitos do telefone | e-mail minúsculo | data de criação"""
+    phone = phone_digits(raw['Número de telefone'])
+    email = raw['E-mail'].astype(str).str.strip().str.lower()
+    created = canon['data'].dt.strftime('%Y-%m-%d %H:%M').fillna('')
+    keys = phone + '|' + email + '|' + created
+    if with_lead_id:
+        keys = keys + '|' + raw[LEAD_KEY_EXTRA_COLUMN].astype(str)
+    return pd.Index(keys)
+
+def lead_key_positions(data, with_lead_id=False):
+    """Índice chave -> posição da linha (uma vez por versão; chaves repetidas: vale a última)"""
+    positions = data.memo.get(('lead_keys', with_lead_id))
+    if positions is None:
+        keys = lead_keys(data.raw, data.canon, with_lead_id)
+        unique = ~keys.duplicated(keep='last')
+        positions = pd.Series(np.flatnonzero(unique), index=keys[unique])
+        data.memo[('lead_keys', with_lead_id)] = positions
+    return positions
+
+def _as_text(frame):
+    """Valores como texto para comparação; números inteiros lidos como float ('5.0') valem '5'"""
+    return frame.astype(str).replace(r'\.0$', '', regex=True).to_numpy()
+
+def _align_categories(frames):
+    """Mesmo dicionário (união ordenada) nas colunas category de todos os frames"""
+    frames = list(frames)
+    columns = [
+        col for col in frames[0].columns
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames if col in f.columns)
+    ]
+    for col in columns:
+        union = sorted(set().union(*(f[col].cat.categories for f in frames if col in f.columns)), key=str)
+        frames = [
+            f.assign(**{col: f[col].cat.set_categories(union)}) if col in f.columns else f
+            for f in frames
+        ]
+    return frames
+
+def combine_cubes(parts):
+    """Soma cubos com sinal: [(cubo, +1), (cubo, -1), ...] -> cubo resultante"""
+    cubes = _align_categories([cube.assign(n=cube['n'] * sign) for cube, sign in parts])
+    combined = (
+        pd.concat(cubes, ignore_index=True)
+        .groupby(CUBE_DIMENSIONS + ['disparado', 'nao_disparado'], observed=True, dropna=False, sort=False)['n']
+        .sum()
+        .reset_index()
+    )
+    return combined[combined['n'] != 0].reset_index(drop=True)
+
+def merge_delta(data, delta_df):
+    """Mescla um upload incremental na versão atual (upsert por LEAD_KEY_COLUMNS).
+    
+    Casamento de chaves, comparação e cubo trabalham apenas com as linhas do
+    delta: o cubo da base é ajustado subtraindo as versões antigas das linhas
+    atualizadas e somando as novas; o índice de filtros e as chaves de lead
+    da base são ajustados só nas linhas inseridas/atualizadas. Linhas
+    atualizadas mantêm a posição original; as inseridas entram no final.
+    Retorna (LeadsData mesclado, {'inserted', 'updated', 'unchanged'}).
+    Levanta MissingColumnsError se a base ou o delta não tiverem as colunas
+    de LEAD_KEY_COLUMNS.
+    """
+    missing = [col for col in LEAD_KEY_COLUMNS if col not in delta_df.columns or col not in data.raw.columns]
+    if missing:
+        raise MissingColumnsError(missing)
+    
+    delta = prepare_data(delta_df.reset_index(drop=True))
+    with_lead_id = LEAD_KEY_EXTRA_COLUMN in delta.raw.columns and LEAD_KEY_EXTRA_COLUMN in data.raw.columns
+    delta_keys = lead_keys(delta.raw, delta.canon, with_lead_id)
+    
+    # Chave repetida dentro do próprio delta: vale a última ocorrência
+    keep = np.flatnonzero(~delta_keys.duplicated(keep='last'))
+    delta_keys = delta_keys[keep]
+    
+    key_positions = lead_key_positions(data, with_lead_id)
+    indexer = key_positions.index.get_indexer(delta_keys)
+    matched = indexer >= 0
+    base_pos = np.where(matched, key_positions.to_numpy()[indexer], -1)
+    
+    # Linhas casadas só contam como atualizadas se algum valor mudou
+    compare_cols = [col for col in delta.raw.columns if col in data.raw.columns]
+    matched_delta = keep[matched]
+    old_values = _as_text(data.raw.iloc[base_pos[matched]][compare_cols])
+    new_values = _as_text(delta.raw.iloc[matched_delta][compare_cols])
+    changed = (old_values != new_values).any(axis=1)
+    
+    updated_delta = matched_delta[changed]
+    updated_base = base_pos[matched][changed]
+    inserted_delta = keep[~matched]
+    counts = {
+        'inserted': len(inserted_delta),
+        'updated': len(updated_delta),
+        'unchanged': int((~changed).sum()),
+    }
+    
+    # Base + delta concatenados; a ordem final é montada por posições (sem setitem)
+    n_base = len(data.raw)
+    order = np.arange(n_base)
+    order[updated_base] = n_base + updated_delta
+    order = np.concatenate([order, n_base + inserted_delta])
+    
+    def assemble(base_frame, delta_frame):
+        base_frame, delta_frame = _align_categories([base_frame, delta_frame])
+        combined = pd.concat([base_frame, delta_frame], ignore_index=True)
+        return combined.iloc[order].reset_index(drop=True)
+    
+    # Colunas ausentes no delta: linhas atualizadas mantêm o valor da base
+    base_pos_all = np.full(len(delta.raw), -1)
+    base_pos_all[keep] = base_pos
+    delta_raw = delta.raw.assign(**{
+        col: pd.Series(data.raw[col].to_numpy()[np.maximum(base_pos_all, 0)]).where(base_pos_all >= 0)
+        for col in data.raw.columns if col not in delta.raw.columns
+    })
+    
+    raw = assemble(data.raw, delta_raw)
+    canon = assemble(data.canon, delta.canon)
+    derived = assemble(data.derived, delta.derived)
+    
+    changed_delta = np.concatenate([updated_delta, inserted_delta])
+    cube = combine_cubes([
+        (data.cube, 1),
+        (build_cube(data.canon.iloc[updated_base]), -1),
+        (build_cube(delta.canon.iloc[changed_delta]), 1),
+    ])
+    
+    # Índice de filtros e chaves de lead ajustados só nas linhas do delta
+    inserted_pos = n_base + np.arange(len(inserted_delta))
+    changed = np.sort(np.concatenate([updated_base, inserted_pos]))
+    merged = LeadsData(
+        raw=raw,
+        canon=canon,
+        derived=derived,
+        cube=cube,
+        index=data.index.patch(canon, data.canon, changed),
+        delta=(data.version, changed),
+    )
+    merged.memo[('lead_keys', with_lead_id)] = pd.concat([
+        key_positions,
+        pd.Series(inserted_pos, index=delta_keys[~matched]),
+    ])
+    return merged, counts
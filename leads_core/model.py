@@ -0,0 +1,464 @@
+"""Modelo de dados por versão: colunas canônicas, cubo de contagens, índice de filtros e métricas"""
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from .ingest import encode_categories
+
+# Rótulos canônicos de Info Disparo (chave = valor normalizado com strip/lower)
+DISPARO_LABELS = {
+    'disparado': 'Disparado',
+    'não disparado': 'Não disparado',
+}
+
+@dataclass(frozen=True)
+class LeadsData:
+    """Base carregada + colunas canônicas calculadas uma única vez por versão.
+    
+    `raw` guarda os valores originais (exibição e exportação); `canon` tem o
+    mesmo índice e traz as colunas tipadas usadas por filtros e métricas;
+    `derived` traz as colunas derivadas da tabela/exportação; `cube` é o cubo de
+    contagens que responde KPIs e gráficos e `index` resolve os filtros em
+    posições de linha para a tabela detalhada. `memo` guarda estruturas
+    auxiliares calculadas sob demanda (ordenações por coluna, chaves de lead).
+    `delta` só existe numa base mesclada ainda não salva: (versão de origem,
+    posições das linhas inseridas/atualizadas), para gravar a nova versão a
+    partir da anterior.
+    """
+    raw: pd.DataFrame
+    canon: pd.DataFrame
+    derived: pd.DataFrame
+    cube: pd.DataFrame
+    index: 'FilterIndex'
+    version: str = None
+    memo: dict = field(default_factory=dict, compare=False, repr=False)
+    delta: tuple = field(default=None, compare=False, repr=False)
+
+@dataclass(frozen=True)
+class FilterSelection:
+    """Seleção normalizada dos filtros da sidebar (vazio/None = todos)"""
+    colegios: tuple = ()
+    data_inicio: object = None
+    data_fim: object = None
+    disparo: tuple = ()
+    status: tuple = ()
+    
+    def normalized(self):
+        """Mesma seleção com valores ordenados (a ordem de clique não muda o resultado)"""
+        return replace(
+            self,
+            colegios=tuple(sorted(self.colegios)),
+            disparo=tuple(sorted(self.disparo)),
+            status=tuple(sorted(self.status)),
+        )
+
+@dataclass(frozen=True)
+class FilterResult:
+    """Resultado de uma seleção: linhas, métricas e séries dos gráficos.
+    
+    `row_ids` é None no motor SQLite, que pagina e exporta direto do banco.
+    `selection` e `version` identificam de onde o resultado veio, para que
+    páginas e exportações sejam resolvidas na mesma versão da base.
+    `search` é a busca livre aplicada sobre a seleção (None sem busca); nesse
+    caso `row_ids` traz as linhas encontradas também no motor SQLite.
+    """
+    row_ids: np.ndarray
+    metrics: dict
+    series: dict
+    selection: FilterSelection = None
+    version: str = None
+    search: str = None
+    
+    @property
+    def nbytes(self):
+        """Memória aproximada ocupada pelo resultado"""
+        total = self.row_ids.nbytes if self.row_ids is not None else 0
+        for value in self.series.values():
+            usage = value.memory_usage(index=True, deep=True)
+            total += int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+        return total
+
+def canonical_columns(df):
+    """Colunas canônicas tipadas (data, disparo normalizado, flags, colégio e status)"""
+    df = encode_categories(df)
+    
+    # Normalização feita sobre o dicionário da categoria (poucos valores),
+    # depois propagada às linhas pelos códigos inteiros
+    info_disparo = df['Info Disparo'].cat
+    codes = info_disparo.codes.to_numpy()
+    norm = info_disparo.categories.astype(str).str.strip()
+    norm_lower = norm.str.lower()
+    labels = [DISPARO_LABELS.get(key, raw) for key, raw in zip(norm_lower, norm)]
+    label_codes, label_uniques = pd.factorize(pd.Index(labels, dtype=object))
+    
+    # Código -1 (valor ausente) aponta para o último elemento de cada tabela
+    disparo_codes = np.append(label_codes, -1)[codes]
+    is_disparado = np.append(norm_lower == 'disparado', False)
+    is_nao_disparado = np.append(norm_lower == 'não disparado', False)
+    
+    data_criacao = pd.to_datetime(df['Data de criação do Lead Raiz'], errors='coerce')
+    
+    canon = pd.DataFrame({
+        'data': data_criacao,
+        'dia': data_criacao.dt.normalize(),
+        'disparo': pd.Categorical.from_codes(disparo_codes, categories=label_uniques),
+        'disparado': is_disparado[codes],
+        'nao_disparado': is_nao_disparado[codes],
+        'colegio': df['Colégio de Interesse'],
+        'status': df['Status'],
+    }, index=df.index)
+    return canon
+
+def prepare_data(df, version=None, cube=None):
+    """Normalização de ingestão: executada uma vez por versão dos dados.
+    
+    `cube` é o cubo de agregados já gravado com a versão (evita recalculá-lo).
+    """
+    df = encode_categories(df)
+    canon = canonical_columns(df)
+    
+    return LeadsData(
+        raw=df,
+        canon=canon,
+        derived=build_derived(canon),
+        cube=build_cube(canon) if cube is None else align_cube(cube, canon),
+        index=FilterIndex(canon),
+        version=version,
+    )
+
+# Colunas da tabela detalhada e da exportação (na ordem de exibição)
+DETAIL_COLUMNS = [
+    'Data de criação do Lead Raiz',
+    'Nome',
+    'Colégio de Interesse',
+    'Número de telefone',
+    'E-mail',
+    'Info Disparo',
+    'Status (Detalhado)'
+]
+
+# Colunas derivadas: nome -> função vetorizada sobre as colunas canônicas
+DERIVED_COLUMNS = {
+    'Status (Detalhado)': lambda canon: status_detalhado(canon['status'], canon['nao_disparado']),
+}
+
+def build_derived(canon):
+    """Calcula as colunas derivadas uma única vez por versão dos dados"""
+    return pd.DataFrame(
+        {name: derive(canon) for name, derive in DERIVED_COLUMNS.items()},
+        index=canon.index,
+    )
+
+def detail_columns(data):
+    """Colunas da tabela/exportação presentes nesta versão dos dados"""
+    return [
+        col for col in DETAIL_COLUMNS
+        if col in data.raw.columns or col in data.derived.columns
+    ]
+
+def sort_order(data, column):
+    """Posições de todas as linhas da base ordenadas por `column` (uma vez por versão)"""
+    order = data.memo.get(('sort', column))
+    if order is None:
+        if column == 'Data de criação do Lead Raiz':
+            values = data.canon['data']
+        elif column in data.derived.columns:
+            values = data.derived[column]
+        else:
+            values = data.raw[column]
+        values = values.reset_index(drop=True)
+        
+        try:
+            order = values.sort_values(kind='stable', na_position='last').index.to_numpy()
+        except TypeError:
+            # Colunas com tipos mistos (ex.: números e textos) são ordenadas como texto
+            order = values.astype(str).sort_values(kind='stable').index.to_numpy()
+        data.memo[('sort', column)] = order
+    return order
+
+def page_row_ids(data, row_ids, page, page_size, sort_column=None, descending=False):
+    """Posições das linhas de uma página do resultado, na ordenação escolhida.
+    
+    Com ordenação, a ordem pré-calculada da base é filtrada pelos membros do
+    resultado, então qualquer página custa o mesmo que a primeira.
+    """
+    if sort_column is None:
+        ordered = row_ids
+    else:
+        order = sort_order(data, sort_column)
+        member = np.zeros(len(data.raw), dtype=bool)
+        member[row_ids] = True
+        ordered = order[member[order]]
+    
+    if descending:
+        ordered = ordered[::-1]
+    
+    start = (page - 1) * page_size
+    return ordered[start:start + page_size]
+
+def detail_frame(data, row_ids):
+    """Linhas selecionadas com as colunas da tabela/exportação (originais + derivadas)"""
+    columns = detail_columns(data)
+    raw_cols = [col for col in columns if col not in data.derived.columns]
+    derived_cols = [col for col in columns if col in data.derived.columns]
+    
+    frame = pd.concat(
+        [data.raw[raw_cols].iloc[row_ids], data.derived[derived_cols].iloc[row_ids]],
+        axis=1,
+    )
+    return frame[columns]
+
+# Dimensões do cubo = dimensões dos filtros da sidebar
+CUBE_DIMENSIONS = ['colegio', 'dia', 'disparo', 'status']
+
+def build_cube(canon):
+    """Cubo de contagens colégio × dia × disparo × status.
+    
+    As flags disparado/não disparado dependem apenas de `disparo` e entram
+    como chaves só para ficarem disponíveis nas linhas do cubo.
+    """
+    return (
+        canon.groupby(CUBE_DIMENSIONS + ['disparado', 'nao_disparado'], observed=True, dropna=False, sort=False)
+        .size()
+        .reset_index(name='n')
+    )
+
+def align_cube(cube, canon):
+    """Cubo lido do disco com as mesmas categorias das colunas canônicas"""
+    return cube.assign(**{
+        col: cube[col].astype('category').cat.set_categories(canon[col].cat.categories)
+        for col in ('colegio', 'disparo', 'status')
+    })
+
+class FilterIndex:
+    """Índice de filtros por versão: bitmaps por valor + índice ordenado de datas.
+    
+    Cada bitmap tem um bit por linha (np.packbits). Uma seleção vira OR entre
+    os valores escolhidos de cada coluna e AND entre colunas, sem cópias do
+    DataFrame; o período é resolvido por busca binária nas datas ordenadas.
+    """
+    
+    # Campo da FilterSelection -> coluna canônica indexada
+    BITMAP_COLUMNS = {'colegios': 'colegio', 'disparo': 'disparo', 'status': 'status'}
+    
+    def __init__(self, canon, date_index=None):
+        self.n_rows = len(canon)
+        self._empty = np.packbits(np.zeros(self.n_rows, dtype=bool))
+        
+        self._bitmaps = {}
+        for column in self.BITMAP_COLUMNS.values():
+            codes = canon[column].cat.codes.to_numpy()
+            self._bitmaps[column] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(canon[column].cat.categories)
+            }
+        
+        # Índice ordenado de datas (linhas sem data válida ficam de fora); `date_index`
+        # traz o índice já calculado (ex.: mapeado do dataset compartilhado da versão)
+        if date_index is None:
+            dias = canon['dia'].to_numpy()
+            valid_positions = np.flatnonzero(~np.isnat(dias))
+            order = np.argsort(dias[valid_positions], kind='stable')
+            date_index = (valid_positions[order], dias[valid_positions][order])
+        self._date_positions, self._sorted_days = date_index
+    
+    @property
+    def date_index(self):
+        """(posições das linhas com data válida ordenadas pelo dia, dias nessa ordem)"""
+        return self._date_positions, self._sorted_days
+    
+    def _values_bitmap(self, column, selected):
+        bits = self._empty
+        for value in selected:
+            bits = bits | self._bitmaps[column].get(value, self._empty)
+        return bits
+    
+    def _date_bitmap(self, start, end):
+        unit = self._sorted_days.dtype
+        lo = np.searchsorted(self._sorted_days, np.datetime64(start, 'D').astype(unit), side='left')
+        hi = np.searchsorted(self._sorted_days, np.datetime64(end, 'D').astype(unit), side='right')
+        rows = np.zeros(self.n_rows, dtype=bool)
+        rows[self._date_positions[lo:hi]] = True
+        return np.packbits(rows)
+    
+    def patch(self, canon, base_canon, changed):
+        """Índice de uma base mesclada (`canon`) a partir deste, mudando só as linhas `changed`.
+        
+        `changed` são as posições inseridas ou atualizadas (ordem crescente);
+        as que já existiam saem dos bitmaps e do índice de datas pelos valores
+        antigos de `base_canon`. Os bitmaps são copiados (um bit por linha) e
+        só os bits dessas linhas são alterados.
+        """
+        index = object.__new__(FilterIndex)
+        index.n_rows = len(canon)
+        index._empty = np.packbits(np.zeros(index.n_rows, dtype=bool))
+        updated = changed[changed < self.n_rows]
+        
+        index._bitmaps = {}
+        for column, bitmaps in self._bitmaps.items():
+            patched = {value: _resized_bits(bits, len(index._empty)) for value, bits in bitmaps.items()}
+            old_values = base_canon[column].iloc[updated].to_numpy()
+            for value in pd.unique(old_values[pd.notna(old_values)]):
+                _set_bits(patched[value], updated[old_values == value], False)
+            new_values = canon[column].iloc[changed].to_numpy()
+            for value in pd.unique(new_values[pd.notna(new_values)]):
+                if value not in patched:
+                    patched[value] = index._empty.copy()
+                _set_bits(patched[value], changed[new_values == value], True)
+            index._bitmaps[column] = patched
+        
+        # Datas: remove as linhas atualizadas e intercala as novas na ordem dos dias
+        positions, days = self.date_index
+        removed = np.zeros(index.n_rows, dtype=bool)
+        removed[updated] = True
+        keep = ~removed[positions]
+        positions, days = positions[keep], days[keep]
+        new_days = canon['dia'].iloc[changed].to_numpy().astype(days.dtype)
+        valid = ~np.isnat(new_days)
+        order = np.argsort(new_days[valid], kind='stable')
+        new_positions, new_days = changed[valid][order], new_days[valid][order]
+        at = np.searchsorted(days, new_days, side='right')
+        index._date_positions = np.insert(positions, at, new_positions)
+        index._sorted_days = np.insert(days, at, new_days)
+        return index
+    
+    def row_ids(self, selection):
+        """Posições (iloc) das linhas que atendem à seleção, em ordem crescente"""
+        bits = None
+        
+        for attr, column in self.BITMAP_COLUMNS.items():
+            selected = getattr(selection, attr)
+            if selected:
+                column_bits = self._values_bitmap(column, selected)
+                bits = column_bits if bits is None else bits & column_bits
+        
+        if selection.data_inicio is not None and selection.data_fim is not None:
+            date_bits = self._date_bitmap(selection.data_inicio, selection.data_fim)
+            bits = date_bits if bits is None else bits & date_bits
+        
+        if bits is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+def _resized_bits(bits, n_bytes):
+    """Cópia do bitmap com `n_bytes` bytes (bits novos zerados)"""
+    resized = np.zeros(n_bytes, dtype=np.uint8)
+    resized[:len(bits)] = bits[:n_bytes]
+    return resized
+
+def _set_bits(bits, positions, value):
+    """Liga/desliga no bitmap (ordem de np.packbits) os bits das posições"""
+    offsets = positions >> 3
+    masks = (0x80 >> (positions & 7)).astype(np.uint8)
+    if value:
+        np.bitwise_or.at(bits, offsets, masks)
+    else:
+        np.bitwise_and.at(bits, offsets, ~masks)
+
+def selection_mask(frame, selection):
+    """Máscara da seleção sobre o cubo (ou linhas canônicas, que têm as mesmas colunas)"""
+    mask = np.ones(len(frame), dtype=bool)
+    
+    if selection.colegios:
+        mask &= category_mask(frame['colegio'], selection.colegios)
+    
+    # Intervalo de datas inclusivo em dias inteiros
+    if selection.data_inicio is not None and selection.data_fim is not None:
+        dia = frame['dia']
+        mask &= ((dia >= pd.Timestamp(selection.data_inicio)) & (dia <= pd.Timestamp(selection.data_fim))).to_numpy()
+    
+    if selection.disparo:
+        mask &= category_mask(frame['disparo'], selection.disparo)
+    
+    if selection.status:
+        mask &= category_mask(frame['status'], selection.status)
+    
+    return mask
+
+def cube_series(cube):
+    """Séries dos gráficos do visualizador somando as células do cubo filtrado"""
+    n = cube['n']
+    nao_disparado = cube['nao_disparado'].to_numpy()
+    
+    disparo_counts = n.groupby(cube['disparo'], observed=True).sum()
+    colegio_counts = n.groupby(cube['colegio'], observed=True).sum()
+    timeline = n.groupby(cube['dia']).sum()
+    status_counts = n[nao_disparado].groupby(cube['status'][nao_disparado], observed=True).sum()
+    
+    return {
+        'disparo': disparo_counts[disparo_counts > 0].sort_values(ascending=False, kind='stable'),
+        'colegios': colegio_counts[colegio_counts > 0].sort_values(ascending=False, kind='stable'),
+        'timeline': pd.DataFrame({'Data': timeline.index.as_unit('ns'), 'Quantidade': timeline.to_numpy()}),
+        'nao_disparados_status': status_counts[status_counts > 0].sort_values(ascending=False, kind='stable'),
+    }
+
+def compute_filter_result(data, selection):
+    """Calcula linhas, métricas e séries de uma seleção sobre uma versão dos dados"""
+    cube_filtered = data.cube[selection_mask(data.cube, selection)]
+    return FilterResult(
+        row_ids=data.index.row_ids(selection),
+        metrics=calculate_metrics(cube_filtered),
+        series=cube_series(cube_filtered),
+        selection=selection,
+        version=data.version,
+    )
+
+def calculate_metrics(canon):
+    """Calcula métricas do dashboard a partir das colunas canônicas ou do cubo"""
+    if 'n' in canon.columns:
+        # Cubo: cada célula pesa a quantidade de leads que representa
+        counts = canon['n']
+        total_leads = int(counts.sum())
+        disparados = int(counts[canon['disparado']].sum())
+        nao_disparados = int(counts[canon['nao_disparado']].sum())
+    else:
+        total_leads = len(canon)
+        disparados = int(canon['disparado'].sum())
+        nao_disparados = int(canon['nao_disparado'].sum())
+    
+    taxa_disparo = (disparados / total_leads * 100) if total_leads > 0 else 0
+    
+    return {
+        'total_leads': total_leads,
+        'disparados': disparados,
+        'nao_disparados': nao_disparados,
+        'taxa_disparo': taxa_disparo
+    }
+
+def filter_options(data):
+    """Valores dos filtros da sidebar e período coberto pela base"""
+    canon = data.canon
+    dates = canon['data'].dropna()
+    return {
+        'colegios': sorted(canon['colegio'].cat.categories.tolist()),
+        'status': sorted(canon['status'].cat.categories.tolist()),
+        'min_date': dates.min().date() if not dates.empty else None,
+        'max_date': dates.max().date() if not dates.empty else None,
+    }
+
+def version_summary(data):
+    """Resumo pequeno da versão (KPIs sem filtros e opções dos filtros), gravado nos metadados.
+    
+    Permite desenhar a sidebar e os primeiros KPIs sem carregar as linhas da base.
+    """
+    options = filter_options(data)
+    return {
+        'metrics': calculate_metrics(data.cube),
+        'colegios': options['colegios'],
+        'status': options['status'],
+        'min_date': options['min_date'].isoformat() if options['min_date'] else None,
+        'max_date': options['max_date'].isoformat() if options['max_date'] else None,
+    }
+
+def category_mask(series, selected):
+    """Máscara de filtro comparando os códigos inteiros de uma coluna category"""
+    selected_codes = series.cat.categories.get_indexer(selected)
+    selected_codes = selected_codes[selected_codes >= 0]
+    return np.isin(series.cat.codes.to_numpy(), selected_codes)
+
+def status_detalhado(status, nao_disparado):
+    """Status exibido apenas para leads não disparados ('—' nos demais)"""
+    if '—' not in status.cat.categories:
+        status = status.cat.add_categories(['—'])
+    return status.where(nao_disparado, '—')
@@ -0,0 +1,114 @@
+"""Instrumentação opcional por etapa (DASHBOARD_PROFILING=1)"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import pandas as pd
+
+from .config import PROFILING_ENABLED, PROFILING_HISTORY
+
+class Profiler:
+    """Tempos por etapa de cada rerun (spans), com linhas de entrada/saída e delta de memória.
+    
+    Cada rerun do script roda numa thread do Streamlit; o rerun ativo fica em
+    uma variável local da thread e os spans abertos durante ele são anotados
+    nele. Os últimos `history` reruns ficam guardados para o painel de
+    diagnóstico do administrador.
+    """
+    
+    def __init__(self, history=PROFILING_HISTORY):
+        self._lock = threading.Lock()
+        self._runs = deque(maxlen=history)
+        self._active = threading.local()
+    
+    @contextmanager
+    def run(self, mode):
+        """Delimita um rerun do script"""
+        record = {
+            'started_at': datetime.now().isoformat(timespec='milliseconds'),
+            'mode': mode,
+            'spans': [],
+        }
+        self._active.run = record
+        try:
+            with self.span('rerun.total'):
+                yield record
+        finally:
+            self._active.run = None
+            with self._lock:
+                self._runs.append(record)
+    
+    @contextmanager
+    def span(self, stage, rows_in=None):
+        """Mede uma etapa; quem chama pode preencher `rows_out` no dicionário retornado"""
+        record = getattr(self._active, 'run', None)
+        info = {'stage': stage, 'rows_in': rows_in, 'rows_out': None}
+        if record is None:
+            yield info
+            return
+        
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            info['ms'] = (time.perf_counter() - start) * 1000
+            info['mem_delta_kb'] = (_rss_bytes() - rss_before) / 1024
+            record['spans'].append(info)
+    
+    def runs(self):
+        with self._lock:
+            return list(self._runs)
+    
+    def spans_frame(self):
+        """Um span por linha, com o início e o modo do rerun a que pertence"""
+        return pd.DataFrame(
+            [
+                {'started_at': run['started_at'], 'mode': run['mode'], **span}
+                for run in self.runs()
+                for span in run['spans']
+            ],
+            columns=['started_at', 'mode', 'stage', 'ms', 'rows_in', 'rows_out', 'mem_delta_kb'],
+        )
+    
+    def summary(self):
+        """p50/p95 por etapa sobre os reruns guardados"""
+        spans = self.spans_frame()
+        if spans.empty:
+            return spans
+        grouped = spans.groupby('stage', sort=False)
+        summary = pd.DataFrame({
+            'Execuções': grouped.size(),
+            'p50 (ms)': grouped['ms'].median(),
+            'p95 (ms)': grouped['ms'].quantile(0.95),
+            'Máx (ms)': grouped['ms'].max(),
+            'Linhas entrada (média)': grouped['rows_in'].mean(),
+            'Linhas saída (média)': grouped['rows_out'].mean(),
+            'Memória Δ p95 (KB)': grouped['mem_delta_kb'].quantile(0.95),
+        })
+        return summary.sort_values('p95 (ms)', ascending=False).round(1).reset_index(names='Etapa')
+
+def _rss_bytes():
+    """Memória residente atual do processo (Linux: /proc; demais: pico via resource)"""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# Coletor único por processo (só usado com DASHBOARD_PROFILING=1)
+_profiler = Profiler()
+
+def get_profiler():
+    """Coletor de spans do processo"""
+    return _profiler
+
+def profile_span(stage, rows_in=None):
+    """Span de tempo da etapa `stage`; sem custo quando o profiling está desligado"""
+    if not PROFILING_ENABLED:
+        return nullcontext({})
+    return get_profiler().span(stage, rows_in)
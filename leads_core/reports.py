@@ -0,0 +1,211 @@
+"""Relatórios em lote sem interface: um arquivo por colégio e/ou período, gerados em paralelo.
+
+Cada arquivo é a mesma exportação do visualizador ('Leads Filtrados' +
+'Resumo') para o recorte, e o lote termina com um índice (indice.csv) com os
+KPIs, o arquivo e o tempo de cada recorte. Não precisa do Streamlit.
+
+Uso:
+    python -m leads_core.reports [--por colegio periodo] [--periodo Mês] [--formato xlsx]
+                                 [--colegio NOME ...] [--inicio AAAA-MM-DD] [--fim AAAA-MM-DD]
+                                 [--saida relatorios/] [--workers 4] [--data-dir data] [--versao ID]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from .api import LeadStore
+from .config import DATA_DIR, QUERY_ENGINE
+from .export import EXPORT_FORMATS, build_summary_csv, write_export
+from .model import FilterSelection
+from .search import fold_text
+
+# Períodos do lote (mesmos rótulos do agrupamento da linha do tempo)
+PERIOD_FREQS = {'Dia': 'D', 'Semana': 'W-SUN', 'Mês': 'M'}
+
+INDEX_COLUMNS = [
+    'arquivo', 'colegio', 'inicio', 'fim',
+    'total_leads', 'disparados', 'nao_disparados', 'taxa_disparo', 'segundos',
+]
+
+# LeadStore do processo: no fork os workers herdam a base já carregada pelo processo principal
+_store = None
+
+def period_ranges(start, end, granularity):
+    """Intervalos (início, fim) inclusivos de cada dia/semana/mês entre `start` e `end`"""
+    periods = pd.period_range(start, end, freq=PERIOD_FREQS[granularity])
+    return [
+        (max(period.start_time.date(), start), min(period.end_time.date(), end))
+        for period in periods
+    ]
+
+def _slug(text):
+    return fold_text(pd.Series([text])).iloc[0].replace(' ', '_') or 'sem_nome'
+
+def report_jobs(options, by=('colegio',), granularity='Mês', colegios=None, start=None, end=None):
+    """Recortes do lote: [(nome do arquivo sem extensão, FilterSelection)].
+    
+    `by` combina 'colegio' (um arquivo por colégio) e 'periodo' (um por
+    dia/semana/mês); sem 'colegio', os colégios pedidos vão juntos em cada
+    arquivo. `start`/`end` limitam o período coberto.
+    """
+    colegios = list(colegios) if colegios else options['colegios']
+    if 'colegio' in by:
+        groups = [(name,) for name in colegios]
+    else:
+        groups = [tuple(colegios) if len(colegios) < len(options['colegios']) else ()]
+    
+    start = start or options['min_date']
+    end = end or options['max_date']
+    if 'periodo' in by and start is not None and end is not None:
+        periods = period_ranges(start, end, granularity)
+    elif start != options['min_date'] or end != options['max_date']:
+        periods = [(start, end)]
+    else:
+        periods = [(None, None)]
+    
+    jobs = []
+    for group in groups:
+        for period_start, period_end in periods:
+            parts = ['leads', _slug(group[0]) if len(group) == 1 else 'colegios' if group else 'todos']
+            if period_start is not None:
+                parts.append(period_start.isoformat() if period_start == period_end
+                             else f"{period_start.isoformat()}_a_{period_end.isoformat()}")
+            jobs.append(('_'.join(parts), FilterSelection(
+                colegios=group,
+                data_inicio=period_start,
+                data_fim=period_end,
+            )))
+    return jobs
+
+def _init_worker(data_dir, engine, version_id):
+    global _store
+    if _store is None:
+        _store = LeadStore(data_dir, engine=engine)
+        _store.data(version_id)
+
+def _write_report(name, selection, version_id, fmt, output_dir):
+    """Filtra, exporta e grava um recorte (roda no worker); retorna a linha do índice"""
+    start = time.perf_counter()
+    result = _store.filter(selection, version_id)
+    metrics = result.metrics
+    
+    filename = ''
+    if metrics['total_leads'] > 0:
+        filename = f"{name}.{fmt}"
+        write_export(_store.rows(result), metrics, fmt, Path(output_dir) / filename)
+        # Excel já traz a aba 'Resumo'; nos demais formatos ela vai em arquivo separado
+        if fmt != 'xlsx':
+            (Path(output_dir) / f"{name}_resumo.csv").write_bytes(build_summary_csv(metrics))
+    
+    return {
+        'arquivo': filename,
+        'colegio': ', '.join(selection.colegios) or 'Todos',
+        'inicio': selection.data_inicio,
+        'fim': selection.data_fim,
+        'total_leads': metrics['total_leads'],
+        'disparados': metrics['disparados'],
+        'nao_disparados': metrics['nao_disparados'],
+        'taxa_disparo': round(metrics['taxa_disparo'], 2),
+        'segundos': round(time.perf_counter() - start, 3),
+    }
+
+def run_reports(store, jobs, output_dir, fmt='xlsx', workers=None, version_id=None, progress=None):
+    """Gera os arquivos dos recortes em um pool de processos e grava o índice do lote.
+    
+    A versão é carregada uma vez no processo principal; com fork os workers
+    a compartilham sem recarregar (nos demais sistemas cada worker a lê do
+    snapshot da versão). Retorna as linhas do índice, na ordem dos recortes.
+    """
+    global _store
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt}")
+    version_id = version_id or store.current_version()
+    if version_id is None:
+        raise ValueError("Não há base carregada")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    store.data(version_id)
+    _store = store
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    rows = [None] * len(jobs)
+    
+    if workers == 1:
+        for i, (name, selection) in enumerate(jobs):
+            rows[i] = _write_report(name, selection, version_id, fmt, output_dir)
+            if progress is not None:
+                progress(rows[i])
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(store.versions.root.parent, store.engine_name, version_id),
+        ) as pool:
+            futures = {
+                pool.submit(_write_report, name, selection, version_id, fmt, output_dir): i
+                for i, (name, selection) in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                rows[futures[future]] = future.result()
+                if progress is not None:
+                    progress(rows[futures[future]])
+    
+    pd.DataFrame(rows, columns=INDEX_COLUMNS).to_csv(output_dir / 'indice.csv', index=False, encoding='utf-8-sig')
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--por', nargs='+', choices=['colegio', 'periodo'], default=['colegio'],
+                        help="um arquivo por colégio, por período ou pelos dois")
+    parser.add_argument('--periodo', choices=list(PERIOD_FREQS), default='Mês')
+    parser.add_argument('--colegio', nargs='+', help="colégios incluídos (padrão: todos)")
+    parser.add_argument('--inicio', type=date.fromisoformat, help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument('--fim', type=date.fromisoformat, help="último dia (AAAA-MM-DD)")
+    parser.add_argument('--formato', choices=list(EXPORT_FORMATS), default='xlsx')
+    parser.add_argument('--saida', type=Path,
+                        default=Path('relatorios') / f"{datetime.now():%Y%m%d_%H%M%S}")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--engine', choices=['pandas', 'sqlite'], default=QUERY_ENGINE)
+    parser.add_argument('--versao', help="id da versão da base (padrão: a atual)")
+    args = parser.parse_args(argv)
+    
+    store = LeadStore(args.data_dir, engine=args.engine)
+    version_id = args.versao or store.current_version()
+    engine = store.engine(version_id)
+    if engine is None:
+        print(f"❌ Nenhuma base encontrada em {args.data_dir} (versão: {version_id or 'atual'})", file=sys.stderr)
+        return 1
+    
+    options = engine.options()
+    unknown = sorted(set(args.colegio or []) - set(options['colegios']))
+    if unknown:
+        parser.error(f"colégio(s) não encontrado(s) na base: {', '.join(unknown)}")
+    
+    start = time.perf_counter()
+    jobs = report_jobs(options, args.por, args.periodo, args.colegio, args.inicio, args.fim)
+    print(f"Versão {version_id}: {len(jobs)} recorte(s) em {args.saida} ({args.formato})")
+    print(f"{'segundos':>9} {'leads':>9}  arquivo")
+    
+    def progress(row):
+        print(f"{row['segundos']:>9.2f} {row['total_leads']:>9,}  {row['arquivo'] or '(sem leads)'}")
+    
+    rows = run_reports(store, jobs, args.saida, args.formato, args.workers, version_id, progress)
+    elapsed = time.perf_counter() - start
+    files = sum(1 for row in rows if row['arquivo'])
+    print(f"\n✅ {files} arquivo(s) em {elapsed:.2f}s "
+          f"(soma dos recortes: {sum(row['segundos'] for row in rows):.2f}s); índice: {args.saida / 'indice.csv'}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
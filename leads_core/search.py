@@ -0,0 +1,199 @@
+"""Busca livre por nome, telefone e e-mail com índices montados uma vez por versão da base"""
+import re
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from .join import HUBSPOT_PHONE_COLUMNS, normalize_email, normalize_phone
+
+# Colunas indexadas na busca da tabela detalhada
+SEARCH_NAME_COLUMN = 'Nome'
+SEARCH_EMAIL_COLUMN = 'E-mail'
+SEARCH_PHONE_COLUMNS = HUBSPOT_PHONE_COLUMNS
+
+# Buscas só com dígitos (e ao menos esta quantidade) são tratadas como telefone
+MIN_PHONE_DIGITS = 4
+
+def fold_text(series):
+    """Texto sem acentos, em minúsculas e só com letras/dígitos separados por espaço (vetorizado)"""
+    return (
+        series.astype(str)
+        .str.normalize('NFKD')
+        .str.replace('[\u0300-\u036f]', '', regex=True)
+        .str.lower()
+        .str.replace(r'[^a-z0-9]+', ' ', regex=True)
+        .str.strip()
+    )
+
+def _sorted(values):
+    """Valores (texto) ordenados e a posição original de cada um"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    
+    values = np.asarray(values, dtype=object)
+    order = pc.sort_indices(pa.array(values, type=pa.string())).to_numpy()
+    return values[order], order
+
+def _prefix_range(sorted_values, prefix):
+    lo = np.searchsorted(sorted_values, prefix, side='left')
+    hi = np.searchsorted(sorted_values, prefix + '\uffff', side='left')
+    return lo, hi
+
+class _Field:
+    """Valores distintos de um campo (em uma ou mais colunas) e o código do valor em cada linha.
+    
+    As estruturas da busca ficam sobre os valores distintos; as linhas só
+    entram no fim, convertendo a máscara de valores encontrados em linhas.
+    """
+    
+    def __init__(self, columns, normalize):
+        keys, column_codes = [], []
+        for column in columns:
+            codes, uniques = pd.factorize(column)
+            keys.append(normalize(pd.Series(np.asarray(uniques, dtype=object), dtype=object)))
+            column_codes.append(codes)
+        
+        merged = pd.concat(keys, ignore_index=True) if keys else pd.Series([], dtype=object)
+        key_codes, uniques = pd.factorize(merged)
+        self.keys = np.asarray(uniques, dtype=object)
+        
+        # Código do valor em cada linha; len(keys) = linha sem valor válido
+        self.row_codes = []
+        offset = 0
+        for codes, column_keys in zip(column_codes, keys):
+            mapping = np.append(key_codes[offset:offset + len(column_keys)], -1)
+            row_codes = mapping[codes].astype(np.int32)
+            row_codes[row_codes < 0] = len(self.keys)
+            self.row_codes.append(row_codes)
+            offset += len(column_keys)
+    
+    def empty_mask(self):
+        # Posição extra sempre falsa para as linhas sem valor
+        return np.zeros(len(self.keys) + 1, dtype=bool)
+    
+    def rows(self, key_mask, row_mask):
+        """Marca em `row_mask` as linhas cujo valor (em qualquer coluna) está em `key_mask`"""
+        if key_mask.any():
+            for row_codes in self.row_codes:
+                row_mask |= key_mask[row_codes]
+        return row_mask
+
+class SearchIndex:
+    """Índices da busca livre sobre nome, e-mail e telefones de uma versão da base.
+    
+    - Nome: vocabulário ordenado dos termos sem acento (busca por prefixo) e
+      trigramas do vocabulário (termo contido em outro); todas as palavras
+      da busca precisam aparecer no mesmo nome.
+    - E-mail: e-mails em minúsculas ordenados (busca por prefixo).
+    - Telefone: números normalizados ordenados pelo início (com e sem DDD)
+      e pelo final.
+    """
+    
+    def __init__(self, n_rows, names=(), emails=(), phones=()):
+        self.n_rows = n_rows
+        self._names = _Field(names, fold_text)
+        self._emails = _Field(emails, normalize_email)
+        self._phones = _Field(phones, normalize_phone)
+        self._build_tokens()
+        
+        self._sorted_emails, self._email_order = _sorted(self._emails.keys)
+        phones = pd.Series(self._phones.keys, dtype=object)
+        self._phone_variants = [
+            _sorted(phones),            # com DDD
+            _sorted(phones.str[2:]),    # sem DDD
+            _sorted(phones.str[::-1]),  # final do número (invertido)
+        ]
+    
+    def _build_tokens(self):
+        # Termo -> nomes distintos em que aparece (CSR ordenado pelo termo)
+        tokens = pd.Series(self._names.keys, dtype=object).str.split().explode().dropna()
+        tokens = tokens[tokens != '']
+        codes, vocab = pd.factorize(tokens.to_numpy(dtype=object), sort=True)
+        order = np.argsort(codes, kind='stable')
+        self._vocab = np.asarray(vocab, dtype=object)
+        self._token_names = tokens.index.to_numpy()[order]
+        self._token_offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(vocab)))])
+        
+        # Trigrama -> termos do vocabulário que o contêm
+        vocab_series = pd.Series(self._vocab, dtype=object)
+        lengths = vocab_series.str.len().to_numpy() if len(vocab_series) else np.array([], dtype=int)
+        trigrams, token_ids = [], []
+        for start in range(max(int(lengths.max(initial=0)) - 2, 0)):
+            ids = np.flatnonzero(lengths >= start + 3)
+            trigrams.append(vocab_series.iloc[ids].str.slice(start, start + 3).to_numpy(dtype=object))
+            token_ids.append(ids)
+        self._trigrams = {}
+        if trigrams:
+            pairs = pd.DataFrame({'trigram': np.concatenate(trigrams), 'token': np.concatenate(token_ids)})
+            for trigram, group in pairs.drop_duplicates().groupby('trigram', sort=False)['token']:
+                self._trigrams[trigram] = np.sort(group.to_numpy())
+    
+    def _token_slice(self, first, last):
+        return self._token_names[self._token_offsets[first]:self._token_offsets[last]]
+    
+    def _word_names(self, word):
+        """Máscara dos nomes distintos com algum termo que começa com (ou contém) `word`"""
+        mask = self._names.empty_mask()
+        # Termos com o mesmo prefixo são contíguos no vocabulário ordenado
+        mask[self._token_slice(*_prefix_range(self._vocab, word))] = True
+        
+        if len(word) >= 3:
+            postings = [self._trigrams.get(word[i:i + 3]) for i in range(len(word) - 2)]
+            if all(posting is not None for posting in postings):
+                for token_id in reduce(np.intersect1d, postings):
+                    if word in self._vocab[token_id]:
+                        mask[self._token_slice(token_id, token_id + 1)] = True
+        return mask
+    
+    def _email_keys(self, prefix):
+        mask = self._emails.empty_mask()
+        lo, hi = _prefix_range(self._sorted_emails, prefix)
+        mask[self._email_order[lo:hi]] = True
+        return mask
+    
+    def _phone_keys(self, digits):
+        mask = self._phones.empty_mask()
+        digits = digits.lstrip('0')
+        if len(digits) in (12, 13) and digits.startswith('55'):
+            digits = digits[2:]
+        if len(digits) in (10, 11):
+            normalized = normalize_phone(pd.Series([digits])).iloc[0]
+            digits = normalized if isinstance(normalized, str) else digits
+        if not digits:
+            return mask
+        
+        for (values, order), prefix in zip(self._phone_variants, [digits, digits, digits[::-1]]):
+            lo, hi = _prefix_range(values, prefix)
+            mask[order[lo:hi]] = True
+        return mask
+    
+    def lookup(self, query):
+        """Posições das linhas que casam com a busca, em ordem crescente"""
+        query = query.strip()
+        if not query:
+            return np.arange(self.n_rows)
+        
+        rows = np.zeros(self.n_rows, dtype=bool)
+        digits = re.sub(r'\D', '', query)
+        if len(digits) >= MIN_PHONE_DIGITS and not re.search(r'[^\d\s()+.\-]', query):
+            return np.flatnonzero(self._phones.rows(self._phone_keys(digits), rows))
+        
+        self._emails.rows(self._email_keys(query.lower()), rows)
+        words = fold_text(pd.Series([query])).iloc[0].split()
+        if '@' not in query and words:
+            names = reduce(np.logical_and, [self._word_names(word) for word in words])
+            self._names.rows(names, rows)
+        return np.flatnonzero(rows)
+
+def build_search_index(frame):
+    """Índice de busca a partir das colunas de nome, e-mail e telefones presentes no DataFrame"""
+    def present(columns):
+        return [frame[col] for col in columns if col in frame.columns]
+    
+    return SearchIndex(
+        len(frame),
+        names=present([SEARCH_NAME_COLUMN]),
+        emails=present([SEARCH_EMAIL_COLUMN]),
+        phones=present(SEARCH_PHONE_COLUMNS),
+    )
@@ -0,0 +1,150 @@
+"""Dataset compartilhado entre processos: cada versão preparada gravada em Arrow e mapeada em memória.
+
+Os arquivos (Arrow IPC, sem compressão) trazem as colunas originais, as
+canônicas, as derivadas, o índice de datas e o cubo de agregados já no
+formato de memória do numpy/pandas: datas como int64, categorias como
+códigos inteiros e flags como uint8, sem valores nulos do Arrow. Quem abre a
+versão mapeia os arquivos e monta os DataFrames sobre as páginas mapeadas,
+sem copiar; as páginas ficam no cache do sistema operacional uma única vez
+para todos os processos.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .model import FilterIndex, LeadsData
+
+# Arquivos do dataset no diretório da versão: uma linha por lead e o cubo de agregados
+DATASET_FILE = 'dataset.arrow'
+CUBE_FILE = 'cube.arrow'
+
+# Chave dos metadados do esquema com a codificação de cada coluna
+LAYOUT_KEY = b'leads_core'
+
+def _encode(series):
+    """(array Arrow, codificação) de uma coluna, no formato lido sem cópia"""
+    import pyarrow as pa
+    
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories
+        if all(isinstance(value, str) for value in categories):
+            return pa.array(series.cat.codes.to_numpy()), {
+                'kind': 'category',
+                'categories': categories.tolist(),
+                'str': categories.dtype != object,
+            }
+    elif dtype.kind == 'M' and isinstance(dtype, np.dtype):
+        # NaT é o menor int64: volta como NaT na mesma visão
+        return pa.array(series.to_numpy().view(np.int64)), {'kind': 'numpy', 'dtype': dtype.str}
+    elif dtype.kind in 'biuf' and isinstance(dtype, np.dtype):
+        values = series.to_numpy()
+        if dtype.kind == 'b':
+            values = values.view(np.uint8)
+        return pa.array(values), {'kind': 'numpy', 'dtype': dtype.str}
+    # Textos (e o que mais houver) seguem como array Arrow; textos são lidos sem cópia
+    return pa.array(series, from_pandas=True), {'kind': 'arrow'}
+
+def _decode(column, layout):
+    array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    if layout['kind'] == 'category':
+        categories = pd.Index(layout['categories'], dtype='str' if layout['str'] else object)
+        return pd.Categorical.from_codes(
+            array.to_numpy(zero_copy_only=True),
+            dtype=pd.CategoricalDtype(categories),
+            validate=False,
+        )
+    if layout['kind'] == 'numpy':
+        return array.to_numpy(zero_copy_only=True).view(np.dtype(layout['dtype']))
+    return column.to_pandas()
+
+def _write_table(columns, path, **layout):
+    """Grava as colunas ({nome: Series}) em `path` via arquivo temporário + rename"""
+    import pyarrow as pa
+    
+    arrays, encodings = {}, {}
+    for name, series in columns.items():
+        arrays[name], encodings[name] = _encode(series)
+    # Um único lote: cada coluna vira um buffer contínuo, lido sem juntar pedaços
+    table = pa.table(arrays).combine_chunks().replace_schema_metadata({
+        LAYOUT_KEY: json.dumps({**layout, 'columns': encodings}),
+    })
+    
+    # Nome temporário por processo: outros workers podem gerar o mesmo arquivo
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with pa.OSFile(str(tmp_file), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_file, path)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+def _map_table(path):
+    """Colunas ({nome: array}) montadas sobre o arquivo mapeado e a codificação gravada"""
+    import pyarrow as pa
+    
+    table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    layout = json.loads(table.schema.metadata[LAYOUT_KEY])
+    columns = {
+        name: _decode(column, layout['columns'][name])
+        for name, column in zip(table.column_names, table.columns)
+    }
+    return columns, layout
+
+def write_dataset(data, directory):
+    """Grava a versão preparada (LeadsData) como dataset Arrow no diretório da versão.
+    
+    As colunas de `data.raw` já devem ser compatíveis com Arrow (ver
+    `arrow_compatible`). O arquivo das linhas é gravado por último: se ele
+    existe, o dataset está completo.
+    """
+    directory = Path(directory)
+    _write_table(dict(data.cube.items()), directory / CUBE_FILE)
+    
+    columns = {}
+    for part, frame in (('raw', data.raw), ('canon', data.canon), ('derived', data.derived)):
+        for name, series in frame.items():
+            columns[f"{part}:{name}"] = series
+    
+    # Posições/dias ordenados das linhas com data, completados até o total de linhas
+    positions, days = data.index.date_index
+    n_rows, n_days = len(data.raw), len(positions)
+    missing = np.setdiff1d(np.arange(n_rows), positions)
+    padding = np.full(n_rows - n_days, np.datetime64('NaT'), dtype=days.dtype)
+    columns['index:posicoes'] = pd.Series(np.concatenate([positions, missing]).astype(np.int64))
+    columns['index:dias'] = pd.Series(np.concatenate([days, padding]))
+    
+    _write_table(columns, directory / DATASET_FILE, dias_validos=n_days)
+
+def open_dataset(directory, version=None):
+    """Mapeia o dataset Arrow da versão e monta o LeadsData sobre ele (sem copiar as colunas).
+    
+    As colunas mapeadas são somente leitura; os arquivos ficam mapeados
+    enquanto algum DataFrame da versão estiver em uso.
+    """
+    directory = Path(directory)
+    columns, layout = _map_table(directory / DATASET_FILE)
+    parts = {'raw': {}, 'canon': {}, 'derived': {}, 'index': {}}
+    for key, values in columns.items():
+        part, name = key.split(':', 1)
+        parts[part][name] = values
+    
+    raw = pd.DataFrame(parts['raw'], copy=False)
+    canon = pd.DataFrame(parts['canon'], index=raw.index, copy=False)
+    derived = pd.DataFrame(parts['derived'], index=raw.index, copy=False)
+    # O cubo foi gravado com as mesmas categorias das colunas canônicas
+    cube = pd.DataFrame(_map_table(directory / CUBE_FILE)[0], copy=False)
+    
+    n_days = layout['dias_validos']
+    date_index = (parts['index']['posicoes'][:n_days], parts['index']['dias'][:n_days])
+    return LeadsData(
+        raw=raw,
+        canon=canon,
+        derived=derived,
+        cube=cube,
+        index=FilterIndex(canon, date_index=date_index),
+        version=version,
+    )
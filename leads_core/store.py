@@ -0,0 +1,361 @@
+"""Armazenamento versionado da base e cache de processo das versões em uso"""
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from .config import (
+    CURRENT_FILE,
+    DATA_CACHE_VERSIONS,
+    DATA_FILE,
+    SHARED_DATASET,
+    VERSIONS_DIR,
+    VERSIONS_KEEP,
+)
+from .engines import iter_frame_chunks, iter_parquet_chunks, patch_sqlite, write_sqlite
+from .export import write_xlsx
+from .ingest import arrow_compatible, encode_categories, file_signature
+from .model import prepare_data, version_summary
+from .profiling import profile_span
+from .shared import DATASET_FILE, open_dataset, write_dataset
+
+def _atomic_copy(source, target):
+    """Copia via arquivo temporário + rename: leitores nunca veem o arquivo pela metade"""
+    tmp_file = target.with_name(f".{target.name}.tmp")
+    shutil.copyfile(source, tmp_file)
+    os.replace(tmp_file, target)
+
+def _atomic_write_text(target, text):
+    """Grava texto via arquivo temporário + rename"""
+    tmp_file = target.with_name(f".{target.name}.tmp")
+    tmp_file.write_text(text)
+    os.replace(tmp_file, target)
+
+class VersionStore:
+    """Armazenamento versionado da base em data/versions/<id>/.
+    
+    Cada versão é montada num diretório temporário e publicada com rename
+    atômico; o ponteiro CURRENT também é trocado por rename, então nenhum
+    leitor enxerga uma base pela metade. Além do .xlsx original, cada versão
+    guarda o snapshot colunar (Parquet), o cubo de agregados e os metadados
+    (linhas, hash, data do upload e um resumo com os KPIs da base inteira e
+    as opções dos filtros), o que torna a troca de versão imediata.
+    `data/base_leads.xlsx` continua sendo uma cópia da versão atual; numa
+    versão mesclada, o .xlsx só é gerado sob demanda (`xlsx_path`).
+    
+    Com `build_sqlite`, cada versão também já sai com o banco do motor SQLite.
+    Com `shared_dataset`, a versão também é gravada como dataset Arrow
+    (`shared.py`) e carregada mapeando esse arquivo: todos os processos que
+    servem o dashboard usam as mesmas páginas em memória, em vez de uma cópia
+    da base por processo.
+    Uma falha ao importar o .xlsx trocado manualmente fica em `sync_error`
+    até o arquivo ser corrigido ou uma nova versão ser publicada.
+    """
+    
+    XLSX = 'base_leads.xlsx'
+    PARQUET = 'base_leads.parquet'
+    CUBE = 'cube.parquet'
+    SQLITE = 'leads.sqlite'
+    META = 'meta.json'
+    
+    def __init__(self, root=VERSIONS_DIR, current_file=CURRENT_FILE, keep=VERSIONS_KEEP,
+                 data_file=DATA_FILE, build_sqlite=False, shared_dataset=SHARED_DATASET):
+        self.root = Path(root)
+        self.current_file = Path(current_file)
+        self.data_file = Path(data_file)
+        self.keep = max(1, keep)
+        self.build_sqlite = build_sqlite
+        self.shared_dataset = shared_dataset
+        self.sync_error = None
+        self._lock = threading.RLock()
+        self._sync_key = None
+    
+    def path(self, version_id):
+        return self.root / version_id
+    
+    def meta(self, version_id):
+        """Metadados de uma versão, ou None se ela não existir (ex.: removida na retenção)"""
+        try:
+            return json.loads((self.path(version_id) / self.META).read_text())
+        except (OSError, ValueError):
+            return None
+    
+    def _read_current(self):
+        try:
+            version_id = self.current_file.read_text().strip()
+        except OSError:
+            return None
+        return version_id if version_id and self.path(version_id).is_dir() else None
+    
+    def current_id(self):
+        """Id da versão atual (None se ainda não houver base)"""
+        self.sync_data_file()
+        return self._read_current()
+    
+    def sync_data_file(self):
+        """Importa data/base_leads.xlsx como nova versão quando o conteúdo é desconhecido.
+        
+        Cobre a primeira execução (base anterior ao versionamento) e a troca
+        manual do arquivo. Conteúdo igual ao de uma versão retida não é
+        reimportado (ex.: cópia de outro processo em andamento). O hash só é
+        recalculado se mtime/tamanho mudarem.
+        """
+        if not self.data_file.exists():
+            return
+        stat = self.data_file.stat()
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if stat_key == self._sync_key:
+            return
+        
+        with self._lock:
+            if stat_key == self._sync_key:
+                return
+            # Marcado antes da importação: um arquivo inválido não é relido a cada rerun
+            self._sync_key = stat_key
+            self.sync_error = None
+            known = {meta['sha256'] for meta in self.list_versions()}
+            if file_signature(self.data_file)['sha256'] not in known:
+                try:
+                    df = encode_categories(pd.read_excel(self.data_file))
+                    self.create_version(prepare_data(df), source=self.data_file, origin='arquivo')
+                except Exception as e:
+                    self.sync_error = e
+    
+    def _new_id(self):
+        # Ordem lexicográfica = ordem cronológica
+        return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    
+    def create_version(self, prepared, source=None, origin='upload'):
+        """Grava uma nova versão completa (LeadsData já preparado) e a torna atual.
+        
+        `source` é um .xlsx já existente com o mesmo conteúdo, copiado em vez de
+        regravado. Numa base mesclada (`prepared.delta`) o .xlsx não é
+        regravado (fica para `xlsx_path`) e o banco SQLite parte do banco da
+        versão de origem, regravando só as linhas do delta. Retorna os
+        metadados da versão.
+        """
+        df = prepared.raw
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            version_id = self._new_id()
+            tmp_dir = self.root / f".tmp-{version_id}"
+            tmp_dir.mkdir()
+            try:
+                xlsx_file = tmp_dir / self.XLSX
+                if source is not None:
+                    shutil.copyfile(source, xlsx_file)
+                elif prepared.delta is None:
+                    write_xlsx(df, xlsx_file)
+                columnar = arrow_compatible(df)
+                columnar.to_parquet(tmp_dir / self.PARQUET, index=False)
+                prepared.cube.to_parquet(tmp_dir / self.CUBE, index=False)
+                if self.shared_dataset:
+                    write_dataset(replace(prepared, raw=columnar), tmp_dir)
+                if self.build_sqlite:
+                    # Mesmos valores do snapshot, para o banco coincidir com uma versão recarregada
+                    base_db = self.path(prepared.delta[0]) / self.SQLITE if prepared.delta else None
+                    if base_db is not None and base_db.exists():
+                        patch_sqlite(base_db, tmp_dir / self.SQLITE, columnar, prepared.delta[1])
+                    else:
+                        write_sqlite(tmp_dir / self.SQLITE, iter_frame_chunks(columnar))
+                
+                # Sem .xlsx (mesclagem), hash e tamanho são preenchidos quando ele for gerado
+                signature = file_signature(xlsx_file) if xlsx_file.exists() else {'sha256': None, 'size': None}
+                meta = {
+                    'id': version_id,
+                    'uploaded_at': datetime.now().isoformat(timespec='seconds'),
+                    'rows': len(df),
+                    'columns': len(df.columns),
+                    'sha256': signature['sha256'],
+                    'size': signature['size'],
+                    'origin': origin,
+                    'summary': version_summary(prepared),
+                }
+                (tmp_dir / self.META).write_text(json.dumps(meta))
+                os.replace(tmp_dir, self.path(version_id))
+            except BaseException:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+            
+            self._make_current(version_id)
+            self.prune()
+            return meta
+    
+    def _make_current(self, version_id):
+        xlsx_file = self.path(version_id) / self.XLSX
+        if xlsx_file.exists():
+            _atomic_copy(xlsx_file, self.data_file)
+            stat = self.data_file.stat()
+            self._sync_key = (stat.st_mtime_ns, stat.st_size)
+        else:
+            # .xlsx ainda não gerado (versão mesclada): a cópia da versão anterior sairia desatualizada
+            self.data_file.unlink(missing_ok=True)
+            self._sync_key = None
+        self.sync_error = None
+        _atomic_write_text(self.current_file, version_id)
+    
+    def rollback(self, version_id):
+        """Torna atual uma versão anterior (sem regravar nenhum dado)"""
+        with self._lock:
+            if self.meta(version_id) is None:
+                raise ValueError(f"Versão inexistente: {version_id}")
+            self._make_current(version_id)
+    
+    def list_versions(self):
+        """Metadados das versões retidas, da mais recente para a mais antiga"""
+        if not self.root.exists():
+            return []
+        versions = []
+        for entry in self.root.iterdir():
+            if entry.is_dir() and not entry.name.startswith('.'):
+                meta = self.meta(entry.name)
+                if meta is not None:
+                    versions.append(meta)
+        return sorted(versions, key=lambda meta: meta['id'], reverse=True)
+    
+    def prune(self):
+        """Mantém só as `keep` versões mais recentes (a atual nunca é removida)"""
+        current = self._read_current()
+        for meta in self.list_versions()[self.keep:]:
+            if meta['id'] != current:
+                shutil.rmtree(self.path(meta['id']), ignore_errors=True)
+    
+    def xlsx_path(self, version_id):
+        """.xlsx da versão; gerado a partir do snapshot colunar se ainda não existir (versões mescladas).
+        
+        Ao ser gerado, o hash entra nos metadados e, se a versão for a atual,
+        o arquivo volta a ser copiado para data/base_leads.xlsx.
+        """
+        path = self.path(version_id) / self.XLSX
+        if not path.exists():
+            with self._lock:
+                if not path.exists():
+                    tmp_file = path.with_name(f".{path.name}.tmp")
+                    write_xlsx(pd.read_parquet(self.path(version_id) / self.PARQUET), tmp_file)
+                    os.replace(tmp_file, path)
+                    signature = file_signature(path)
+                    meta = {**self.meta(version_id), 'sha256': signature['sha256'], 'size': signature['size']}
+                    _atomic_write_text(self.path(version_id) / self.META, json.dumps(meta))
+                    if self._read_current() == version_id:
+                        self._make_current(version_id)
+        return path
+    
+    def sqlite_path(self, version_id):
+        """Banco SQLite da versão; gerado a partir do snapshot colunar se ainda não existir"""
+        path = self.path(version_id) / self.SQLITE
+        if not path.exists():
+            with self._lock:
+                if not path.exists():
+                    write_sqlite(path, iter_parquet_chunks(self.path(version_id) / self.PARQUET))
+        return path
+    
+    def dataset_dir(self, version_id):
+        """Diretório da versão com o dataset Arrow; gerado a partir do snapshot colunar se ainda não existir"""
+        version_dir = self.path(version_id)
+        if not (version_dir / DATASET_FILE).exists():
+            with self._lock:
+                if not (version_dir / DATASET_FILE).exists():
+                    data = self._read(version_id)
+                    write_dataset(replace(data, raw=arrow_compatible(data.raw)), version_dir)
+        return version_dir
+    
+    def _read(self, version_id):
+        """Versão lida (cópia do processo) do snapshot colunar e do cubo gravados com ela"""
+        version_dir = self.path(version_id)
+        try:
+            df = encode_categories(pd.read_parquet(version_dir / self.PARQUET))
+            cube = pd.read_parquet(version_dir / self.CUBE)
+        except Exception:
+            # Snapshot ausente/corrompido: recalcula a partir do .xlsx da versão
+            df = encode_categories(pd.read_excel(version_dir / self.XLSX))
+            cube = None
+        return prepare_data(df, version_id, cube=cube)
+    
+    def load(self, version_id):
+        """Carrega uma versão: mapeia o dataset compartilhado ou lê o snapshot colunar e o cubo"""
+        if self.shared_dataset:
+            data = open_dataset(self.dataset_dir(version_id), version_id)
+        else:
+            data = self._read(version_id)
+        
+        # Versões gravadas antes do resumo ganham o resumo na primeira carga
+        meta = self.meta(version_id)
+        if meta is not None and 'summary' not in meta:
+            try:
+                _atomic_write_text(self.path(version_id) / self.META, json.dumps({**meta, 'summary': version_summary(data)}))
+            except OSError:
+                pass
+        return data
+
+class SharedDataCache:
+    """Cache de processo com as versões da base em uso, compartilhado por todas as sessões.
+    
+    Guarda até `max_versions` versões prontas (LRU): a atual e as que algum
+    visualizador mantém fixadas. Os DataFrames guardados são somente leitura:
+    quem precisar alterá-los deve trabalhar sobre uma cópia. No modo
+    compartilhado cada entrada só mapeia o dataset da versão, e o mapeamento
+    é liberado quando ela sai do cache e nenhuma sessão a usa mais.
+    """
+    
+    def __init__(self, store, max_versions=DATA_CACHE_VERSIONS):
+        self.store = store
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_versions = max(1, max_versions)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, version_id=None):
+        """Retorna os dados (LeadsData) da versão pedida ou da atual; None sem base.
+        
+        Erros de leitura dos arquivos da versão são propagados a quem chamou.
+        """
+        store = self.store
+        if version_id is None:
+            version_id = store.current_id()
+            if version_id is None:
+                return None
+        
+        with self._lock:
+            data = self._entries.get(version_id)
+            if data is not None:
+                self.hits += 1
+                self._entries.move_to_end(version_id)
+                return data
+            
+            self.misses += 1
+            if store.meta(version_id) is None:
+                return None
+            with profile_span('data.load') as span:
+                data = store.load(version_id)
+                span['rows_out'] = len(data.raw)
+            self._put(version_id, data)
+            return data
+    
+    def publish(self, prepared):
+        """Publica uma versão recém-salva sem reler os arquivos"""
+        with self._lock:
+            self._put(prepared.version, prepared)
+    
+    def _put(self, version_id, data):
+        self._entries[version_id] = data
+        self._entries.move_to_end(version_id)
+        while len(self._entries) > self.max_versions:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def stats(self):
+        """Contadores de uso do cache"""
+        return {
+            'versions': list(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
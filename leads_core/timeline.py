@@ -0,0 +1,75 @@
+"""Linha do tempo: reagrupamento por dia/semana/mês e redução de pontos (LTTB)"""
+import numpy as np
+import pandas as pd
+
+# Agrupamentos da linha do tempo: rótulo -> (regra de resample, formato da data no hover)
+TIMELINE_GRANULARITIES = {
+    'Dia': (None, '%d/%m/%Y'),
+    'Semana': ('W-MON', '%d/%m/%Y'),
+    'Mês': ('MS', '%m/%Y'),
+}
+
+def auto_granularity(span_days):
+    """Agrupamento automático pelo tamanho do período: dia até ~3 meses, semana até 2 anos"""
+    if span_days <= 92:
+        return 'Dia'
+    if span_days <= 731:
+        return 'Semana'
+    return 'Mês'
+
+def lttb(x, y, threshold):
+    """Downsampling Largest-Triangle-Three-Buckets: índices dos pontos mantidos.
+    
+    Mantém o primeiro e o último ponto e, em cada balde intermediário, o ponto
+    que forma o maior triângulo com o escolhido no balde anterior e a média do
+    próximo balde, preservando picos e vales da série.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        keep[i + 1] = previous
+    return keep
+
+def timeline_points(daily, granularity, max_points=None):
+    """Série do gráfico temporal a partir das contagens diárias pré-agregadas.
+    
+    Reagrupa por semana (início na segunda-feira) ou mês e, se ainda houver
+    mais de `max_points` pontos, reduz a série com LTTB.
+    """
+    rule, _ = TIMELINE_GRANULARITIES[granularity]
+    frame = daily
+    if rule is not None and not daily.empty:
+        resampled = (
+            daily.set_index('Data')['Quantidade']
+            .resample(rule, label='left', closed='left')
+            .sum()
+        )
+        frame = pd.DataFrame({'Data': resampled.index, 'Quantidade': resampled.to_numpy()})
+    
+    if max_points and len(frame) > max_points:
+        keep = lttb(frame['Data'].to_numpy().astype('int64'), frame['Quantidade'].to_numpy(), max_points)
+        frame = frame.iloc[keep]
+    return frame.reset_index(drop=True)
@@ -0,0 +1,5 @@
+"""Testes do núcleo e do dashboard: rodam a partir da raiz do repositório (python -m pytest)"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,28 @@
+"""Partida a frio do dashboard em uma base pequena: sem plotly.express antes do primeiro KPI
+
+O tempo até o primeiro KPI depende da máquina; o orçamento só é conferido com
+COLD_START_BUDGET=1 (o acompanhamento fica com benchmarks/bench_cold_start.py).
+"""
+import os
+
+import pytest
+
+from benchmarks.bench_cold_start import BUDGET_FIRST_KPI_S, measure
+from benchmarks.synthetic import generate_leads
+from leads_core import LeadStore
+
+CHECK_BUDGET = os.getenv('COLD_START_BUDGET', '0').strip().lower() in ('1', 'true', 'yes')
+
+@pytest.fixture(scope='module')
+def cold_start(tmp_path_factory):
+    """Uma partida a frio (processo novo, via AppTest) com uma base sintética publicada"""
+    data_dir = tmp_path_factory.mktemp('cold_start') / 'data'
+    LeadStore(data_dir).save(generate_leads(2_000, seed=1))
+    return measure(data_dir, runs=1)
+
+def test_plotly_express_not_imported_before_first_kpi(cold_start):
+    assert cold_start['plotly_before_kpi'] is False
+
+@pytest.mark.skipif(not CHECK_BUDGET, reason='orçamento de tempo só com COLD_START_BUDGET=1')
+def test_first_kpi_within_budget(cold_start):
+    assert cold_start['first_kpi_s'] <= BUDGET_FIRST_KPI_S
@@ -0,0 +1,111 @@
+"""Motores de consulta: pandas (índice de bitmaps + cubo) e SQLite"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_leads
+from leads_core import FilterSelection, LeadStore, PandasQueryEngine, prepare_data
+from leads_core.model import DISPARO_LABELS
+
+SELECTIONS = [
+    FilterSelection(),
+    FilterSelection(colegios=('Matriz Educação', 'APOGEU')),
+    FilterSelection(status=('Leads (LEADS RAIZ 2026)', 'Declinado (LEADS RAIZ 2026)')),
+    FilterSelection(disparo=('Não disparado',)),
+    FilterSelection(data_inicio=date(2024, 3, 1), data_fim=date(2024, 9, 30)),
+    FilterSelection(
+        colegios=('Colégio QI',),
+        disparo=('Disparado',),
+        data_inicio=date(2024, 6, 1),
+        data_fim=date(2025, 6, 1),
+    ),
+    FilterSelection(colegios=('Colégio inexistente',)),
+]
+
+def leads():
+    """Base pequena com grafias variadas de Info Disparo e algumas datas vazias"""
+    df = generate_leads(600, seed=7)
+    df.loc[:4, 'Data de criação do Lead Raiz'] = pd.NaT
+    return df
+
+def masked(df, selection):
+    """Referência: máscaras booleanas sobre as colunas originais, sem índice nem cubo"""
+    created = pd.to_datetime(df['Data de criação do Lead Raiz'], errors='coerce')
+    info = df['Info Disparo'].str.strip()
+    disparo = info.map(lambda value: DISPARO_LABELS.get(value.lower(), value))
+    
+    mask = pd.Series(True, index=df.index)
+    if selection.colegios:
+        mask &= df['Colégio de Interesse'].isin(selection.colegios)
+    if selection.status:
+        mask &= df['Status'].isin(selection.status)
+    if selection.disparo:
+        mask &= disparo.isin(selection.disparo)
+    if selection.data_inicio is not None:
+        mask &= (created.dt.date >= selection.data_inicio) & (created.dt.date <= selection.data_fim)
+    
+    nao_disparado = mask & (info.str.lower() == 'não disparado')
+    return mask, {
+        'total_leads': int(mask.sum()),
+        'disparados': int((mask & (info.str.lower() == 'disparado')).sum()),
+        'nao_disparados': int(nao_disparado.sum()),
+    }, {
+        'disparo': disparo[mask].value_counts().to_dict(),
+        'colegios': df.loc[mask, 'Colégio de Interesse'].value_counts().to_dict(),
+        'timeline': created[mask].dt.normalize().value_counts().to_dict(),
+        'nao_disparados_status': df.loc[nao_disparado, 'Status'].value_counts().to_dict(),
+    }
+
+def as_dicts(series):
+    timeline = series['timeline']
+    return {
+        **{name: series[name].to_dict() for name in ('disparo', 'colegios', 'nao_disparados_status')},
+        'timeline': dict(zip(timeline['Data'], timeline['Quantidade'])),
+    }
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_pandas_engine_matches_boolean_masks(selection):
+    df = leads()
+    result = PandasQueryEngine(prepare_data(df)).compute(selection)
+    mask, metrics, series = masked(df, selection)
+    
+    np.testing.assert_array_equal(result.row_ids, np.flatnonzero(mask))
+    assert {key: result.metrics[key] for key in metrics} == metrics
+    assert as_dicts(result.series) == series
+
+def test_sqlite_save_keeps_rows_out_of_the_process(tmp_path):
+    store = LeadStore(tmp_path / 'data', engine='sqlite', shared=False)
+    store.save(generate_leads(200, seed=1))
+    
+    assert store.data_cache.stats()['versions'] == []
+    assert store.filter().metrics['total_leads'] == 200
+    assert store.data_cache.stats()['versions'] == []
+
+def values(frame):
+    """Linhas como listas de valores Python (ausentes = None), sem depender do dtype de cada motor"""
+    return frame.astype(object).where(frame.notna(), None).to_numpy().tolist()
+
+@pytest.fixture(scope='module')
+def engines(tmp_path_factory):
+    """Motores SQLite e pandas sobre a mesma versão gravada"""
+    data_dir = tmp_path_factory.mktemp('engines') / 'data'
+    LeadStore(data_dir, engine='sqlite', shared=False).save(leads())
+    return LeadStore(data_dir, engine='sqlite', shared=False), LeadStore(data_dir, shared=False)
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_sqlite_engine_matches_pandas(engines, selection):
+    sqlite_store, pandas_store = engines
+    sqlite_result = sqlite_store.filter(selection)
+    pandas_result = pandas_store.filter(selection)
+    
+    assert sqlite_result.metrics == pytest.approx(pandas_result.metrics)
+    assert as_dicts(sqlite_result.series) == as_dicts(pandas_result.series)
+    assert values(sqlite_store.rows(sqlite_result)) == values(pandas_store.rows(pandas_result))
+    
+    for sort_column in (None, 'Nome', 'Data de criação do Lead Raiz', 'Status (Detalhado)'):
+        for descending in (False, True):
+            for page in (1, 3):
+                assert values(sqlite_store.page(sqlite_result, page, 20, sort_column, descending)) == \
+                    values(pandas_store.page(pandas_result, page, 20, sort_column, descending))
@@ -0,0 +1,39 @@
+"""Exportação: limite de linhas do Excel no núcleo e no visualizador"""
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import generate_leads
+from leads_core import EXPORT_FORMATS, LeadStore, calculate_metrics, export, prepare_data
+
+APP = str(Path(__file__).resolve().parent.parent / 'dashboard_app.py')
+
+def test_excel_export_refuses_above_row_limit(monkeypatch):
+    data = prepare_data(generate_leads(50, seed=1))
+    monkeypatch.setattr(export, 'EXCEL_MAX_ROWS', 49)
+    
+    with pytest.raises(ValueError, match='limite'):
+        export.build_excel_export(data.raw, calculate_metrics(data.canon))
+    assert export.build_csv_export(data.raw, calculate_metrics(data.canon))
+
+def test_viewer_drops_excel_above_row_limit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    LeadStore(tmp_path / 'data', shared=False).save(generate_leads(50, seed=1))
+    monkeypatch.setitem(EXPORT_FORMATS['xlsx'], 'max_rows', 49)
+    
+    app = AppTest.from_file(APP, default_timeout=120)
+    app.run()
+    
+    assert not app.exception
+    formats = [box for box in app.selectbox if box.label == "Formato:"][0]
+    assert formats.options == [EXPORT_FORMATS[fmt]['label'] for fmt in ('csv', 'parquet')]
+    assert any('Excel indisponível' in caption.value for caption in app.caption)
+
+def test_csv_written_in_chunks_matches_in_memory_export(tmp_path, monkeypatch):
+    data = prepare_data(generate_leads(2_500, seed=1))
+    metrics = calculate_metrics(data.canon)
+    monkeypatch.setattr(export, 'EXPORT_CHUNK_ROWS', 1_000)
+    
+    export.write_export(data.raw, metrics, 'csv', tmp_path / 'leads.csv')
+    assert (tmp_path / 'leads.csv').read_bytes() == export.build_csv_export(data.raw, metrics)
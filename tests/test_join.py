@@ -0,0 +1,73 @@
+"""Cruzamento HubSpot × Genesys: normalização das chaves e contagens do casamento"""
+import numpy as np
+import pandas as pd
+
+from leads_core import join_exports, normalize_email, normalize_phone
+
+def test_normalize_phone():
+    phones = pd.Series([
+        '+55 (21) 98204-0848',  # código do país e pontuação
+        '021 98204-0848',       # zero de discagem
+        '5521982040848',        # país sem '+'
+        '(21) 8204-0848',       # celular antigo de 8 dígitos ganha o 9
+        '+55 21 8204-0848',
+        '(21) 3210-4567',       # fixo de 8 dígitos fica como está
+        21982040848.0,          # coluna lida como float
+        '123',
+        None,
+    ], dtype=object)
+    
+    assert normalize_phone(phones).tolist()[:7] == [
+        '21982040848',
+        '21982040848',
+        '21982040848',
+        '21982040848',
+        '21982040848',
+        '2132104567',
+        '21982040848',
+    ]
+    assert normalize_phone(phones)[7:].isna().all()
+
+def test_normalize_email():
+    emails = pd.Series(['  Fulano@Exemplo.COM ', 'ciclana@exemplo.com', 'sem e-mail', np.nan], dtype=object)
+    
+    normalized = normalize_email(emails)
+    assert normalized[:2].tolist() == ['fulano@exemplo.com', 'ciclana@exemplo.com']
+    assert normalized[2:].isna().all()
+
+def test_join_exports_counts(tmp_path):
+    hubspot = pd.DataFrame({
+        'Data de criação do Lead Raiz': ['2024-01-01 10:00'] * 5,
+        'Colégio de Interesse': ['Colégio X'] * 5,
+        'Número de telefone': ['(21) 98204-0848', '(21) 3210-4567', '(21) 97777-0000', None, '(21) 8111-2222'],
+        'E-mail': ['a@exemplo.com', 'B@Exemplo.com', 'c@exemplo.com', 'd@exemplo.com', None],
+        'Contato ID': ['1', '2', '3', None, '5'],
+    })
+    genesys = pd.DataFrame({
+        'Telefone': ['5521982040848', '21 98111-2222', None, '21900000000', '+55 21 98204-0848', None],
+        'Email': [None, None, ' b@exemplo.COM', 'x@exemplo.com', None, None],
+    })
+    hubspot.to_csv(tmp_path / 'hubspot.csv', index=False)
+    genesys.to_csv(tmp_path / 'genesys.csv', index=False)
+    
+    joined, report = join_exports(tmp_path / 'hubspot.csv', tmp_path / 'genesys.csv', chunk_rows=2)
+    
+    assert joined['Info Disparo'].tolist() == ['Disparado', 'Disparado', 'Não disparado', 'Não disparado', 'Disparado']
+    assert joined['Status'].tolist()[2:4] == ['(Nenhum valor)', 'Sem contato vinculado']
+    assert {key: report[key] for key in (
+        'lotes', 'linhas_log', 'linhas_log_casadas', 'linhas_log_sem_chave',
+        'leads', 'leads_com_telefone', 'leads_com_email',
+        'disparados', 'por_telefone', 'por_email', 'somente_email',
+    )} == {
+        'lotes': 3,
+        'linhas_log': 6,
+        'linhas_log_casadas': 4,
+        'linhas_log_sem_chave': 1,
+        'leads': 5,
+        'leads_com_telefone': 4,
+        'leads_com_email': 4,
+        'disparados': 3,
+        'por_telefone': 2,
+        'por_email': 1,
+        'somente_email': 1,
+    }
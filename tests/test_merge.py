@@ -0,0 +1,114 @@
+"""Upload incremental: chave do lead, índice de filtros ajustado e versão gravada a partir da anterior"""
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_leads
+from leads_core import FilterSelection, LeadStore, MissingColumnsError, arrow_compatible
+from leads_core.engines import iter_frame_chunks, write_sqlite
+from leads_core.merge import merge_delta
+from leads_core.model import FilterIndex, prepare_data
+
+PHONES = [21982040840 + i for i in range(5)]
+
+def leads(phones, dtype):
+    """Base de teste com os telefones como int, float (com uma célula vazia) ou texto"""
+    n = len(phones)
+    phone = pd.Series(phones, dtype=object)
+    if dtype == 'int':
+        phone = phone.astype('int64')
+    elif dtype == 'float':
+        phone = phone.astype('float64')
+    else:
+        phone = phone.map(lambda value: value if pd.isna(value) else str(int(value)))
+    return pd.DataFrame({
+        'Info Disparo': ['Disparado'] * n,
+        'Status': ['Leads'] * n,
+        'Colégio de Interesse': ['Colégio X'] * n,
+        'Data de criação do Lead Raiz': pd.date_range('2024-01-01 10:00', periods=n, freq='D'),
+        'Nome': [f"Lead {i}" for i in range(n)],
+        'Número de telefone': phone,
+        'E-mail': [f"lead{i}@exemplo.com" for i in range(n)],
+    })
+
+@pytest.mark.parametrize('base_dtype', ['int', 'float', 'str'])
+@pytest.mark.parametrize('delta_dtype', ['int', 'float', 'str'])
+def test_existing_leads_match_across_phone_dtypes(base_dtype, delta_dtype):
+    base = prepare_data(leads(PHONES, base_dtype))
+    delta = leads(PHONES, delta_dtype)
+    if delta_dtype == 'float':
+        # Uma célula vazia faz o read_excel ler a coluna como float
+        blank = leads([np.nan], 'float').assign(**{
+            'Data de criação do Lead Raiz': pd.Timestamp('2024-02-01'),
+            'E-mail': 'novo@exemplo.com',
+        })
+        delta = pd.concat([delta, blank], ignore_index=True)
+    
+    merged, counts = merge_delta(base, delta)
+    
+    assert counts == {'inserted': int(delta_dtype == 'float'), 'updated': 0, 'unchanged': len(PHONES)}
+    assert len(merged.raw) == len(PHONES) + counts['inserted']
+
+def base_and_delta():
+    """Base sintética e um delta com 10 leads alterados (um em colégio novo) e 30 novos"""
+    base = generate_leads(500, seed=1)
+    updated = base.iloc[100:110].assign(Status='Declinado (LEADS RAIZ 2026)', **{'Info Disparo': 'Não disparado'})
+    updated.loc[updated.index[0], 'Colégio de Interesse'] = 'Colégio Novo'
+    inserted = generate_leads(30, seed=2)
+    inserted['E-mail'] = [f"novo{i}@exemplo.com" for i in range(len(inserted))]
+    return base, pd.concat([updated, inserted], ignore_index=True)
+
+def test_merge_patches_filter_index():
+    base, delta = base_and_delta()
+    merged, counts = merge_delta(prepare_data(base), delta)
+    assert counts == {'inserted': 30, 'updated': 10, 'unchanged': 0}
+    
+    rebuilt = FilterIndex(merged.canon)
+    days = merged.canon['dia'].dropna()
+    selections = [
+        FilterSelection(),
+        FilterSelection(colegios=('Colégio Novo',)),
+        FilterSelection(colegios=('Matriz Educação', 'Colégio QI')),
+        FilterSelection(disparo=('Não disparado',)),
+        FilterSelection(status=('Declinado (LEADS RAIZ 2026)',)),
+        FilterSelection(data_inicio=days.min().date(), data_fim=days.quantile(0.5).date(), disparo=('Disparado',)),
+    ]
+    for selection in selections:
+        np.testing.assert_array_equal(merged.index.row_ids(selection), rebuilt.row_ids(selection))
+
+def test_merged_version_is_written_from_the_previous_one(tmp_path):
+    store = LeadStore(tmp_path / 'data', engine='sqlite', shared=False)
+    base, delta = base_and_delta()
+    store.ingest(base)
+    meta, counts = store.ingest(delta, merge=True)
+    
+    assert counts['inserted'] == 30 and counts['updated'] == 10
+    assert meta['origin'] == 'mesclagem' and meta['sha256'] is None
+    assert not (store.versions.path(meta['id']) / 'base_leads.xlsx').exists()
+    assert not store.versions.data_file.exists()
+    
+    # Banco copiado da versão anterior + linhas do delta = banco gravado do zero
+    full_db = tmp_path / 'full.sqlite'
+    write_sqlite(full_db, iter_frame_chunks(arrow_compatible(store.data().raw)))
+    query = "SELECT * FROM leads ORDER BY row_id"
+    with closing(sqlite3.connect(store.versions.sqlite_path(meta['id']))) as patched, \
+            closing(sqlite3.connect(full_db)) as full:
+        assert patched.execute(query).fetchall() == full.execute(query).fetchall()
+    
+    # .xlsx gerado sob demanda: hash nos metadados e cópia em data/base_leads.xlsx, sem reimportar
+    store.versions.xlsx_path(meta['id'])
+    assert store.versions.meta(meta['id'])['sha256'] is not None
+    assert store.versions.data_file.exists()
+    assert store.current_version() == meta['id'] and len(store.versions.list_versions()) == 2
+
+def test_merge_without_key_columns_lists_them(tmp_path):
+    store = LeadStore(tmp_path / 'data', shared=False)
+    store.ingest(leads(PHONES, 'int'))
+    delta = leads(PHONES, 'int').drop(columns=['E-mail', 'Número de telefone'])
+    
+    with pytest.raises(MissingColumnsError) as error:
+        store.ingest(delta, merge=True)
+    assert error.value.missing == ['Número de telefone', 'E-mail']
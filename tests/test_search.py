@@ -0,0 +1,58 @@
+"""Busca livre da tabela detalhada: nome sem acento, telefone por início/fim e e-mail por prefixo"""
+import pandas as pd
+import pytest
+
+from leads_core import build_search_index
+
+LEADS = pd.DataFrame({
+    'Nome': ['João Conceição', 'Joana Silva', 'Maria José Araújo', 'Fábio Gonçalves', None],
+    'E-mail': ['joao.c@exemplo.com', 'JOANA@Escola.com.br', 'maria@exemplo.com', None, 'sem@exemplo.com'],
+    'Número de telefone': ['(21) 98204-0848', '+55 21 97777-1234', '2132104567', None, 21966665555.0],
+    'Celular Tratado': [None, None, None, '11 8111-2222', None],
+})
+
+@pytest.fixture(scope='module')
+def index():
+    return build_search_index(LEADS)
+
+@pytest.mark.parametrize('query, expected', [
+    ('joao', [0]),              # sem acento casa com 'João'
+    ('JOÃO', [0]),
+    ('conceicao joao', [0]),    # todas as palavras, em qualquer ordem
+    ('jo', [0, 1, 2]),          # prefixo de 'joão', 'joana' e 'josé'
+    ('araujo', [2]),
+    ('ceição', [0]),            # termo contido no meio do nome (trigramas)
+    ('joao silva', []),
+])
+def test_name_lookup_ignores_accents(index, query, expected):
+    assert index.lookup(query).tolist() == expected
+
+@pytest.mark.parametrize('query, expected', [
+    ('21982040848', [0]),       # número completo com DDD
+    ('(21) 98204-0848', [0]),
+    ('+55 21 98204-0848', [0]),
+    ('2198204', [0]),           # início com DDD
+    ('98204', [0]),             # início sem DDD
+    ('0848', [0]),              # final do número
+    ('1234', [1]),
+    ('97777-1234', [1]),        # número sem DDD
+    ('3210', [2]),
+    ('1181112222', [3]),        # celular antigo de 8 dígitos, buscado como foi gravado
+    ('66665555', [4]),          # coluna lida como float
+    ('9999', []),
+])
+def test_phone_lookup_by_prefix_and_suffix(index, query, expected):
+    assert index.lookup(query).tolist() == expected
+
+@pytest.mark.parametrize('query, expected', [
+    ('joana@', [1]),            # e-mail em minúsculas
+    ('JOANA@ESCOLA', [1]),
+    ('maria@exemplo.com', [2]),
+    ('sem@', [4]),
+    ('outro@', []),
+])
+def test_email_lookup_by_prefix(index, query, expected):
+    assert index.lookup(query).tolist() == expected
+
+def test_empty_query_returns_every_row(index):
+    assert index.lookup('  ').tolist() == list(range(len(LEADS)))
@@ -0,0 +1,79 @@
+"""Armazenamento versionado: criação, retenção, restauração e reimportação do .xlsx trocado à mão"""
+import shutil
+
+import pytest
+
+from benchmarks.synthetic import generate_leads
+from leads_core import VersionStore, file_signature, prepare_data
+
+def version_store(tmp_path, keep=10):
+    data_dir = tmp_path / 'data'
+    return VersionStore(data_dir / 'versions', data_dir / 'CURRENT', keep=keep, data_file=data_dir / 'base_leads.xlsx')
+
+def test_create_version_publishes_files_and_metadata(tmp_path):
+    store = version_store(tmp_path)
+    meta = store.create_version(prepare_data(generate_leads(100, seed=1)))
+    
+    assert store.current_id() == meta['id']
+    assert meta['rows'] == 100 and meta['origin'] == 'upload'
+    assert meta['summary']['metrics']['total_leads'] == 100
+    assert sorted(path.name for path in store.path(meta['id']).iterdir()) == [
+        'base_leads.parquet', 'base_leads.xlsx', 'cube.parquet', 'meta.json',
+    ]
+    assert not [path for path in store.root.iterdir() if path.name.startswith('.')]
+    # data/base_leads.xlsx é a cópia da versão atual
+    assert file_signature(store.data_file)['sha256'] == meta['sha256']
+    assert len(store.load(meta['id']).raw) == 100
+
+def test_prune_keeps_the_newest_versions_and_the_current_one(tmp_path):
+    store = version_store(tmp_path, keep=2)
+    ids = [store.create_version(prepare_data(generate_leads(20, seed=seed)))['id'] for seed in range(3)]
+    
+    assert [meta['id'] for meta in store.list_versions()] == ids[:0:-1]
+    assert store.meta(ids[0]) is None
+    
+    store.rollback(ids[1])
+    store.keep = 1
+    store.prune()
+    assert [meta['id'] for meta in store.list_versions()] == ids[:0:-1]
+
+def test_rollback_switches_current_version_and_data_file(tmp_path):
+    store = version_store(tmp_path)
+    first = store.create_version(prepare_data(generate_leads(30, seed=1)))
+    second = store.create_version(prepare_data(generate_leads(40, seed=2)))
+    assert store.current_id() == second['id']
+    
+    store.rollback(first['id'])
+    assert store.current_id() == first['id']
+    assert file_signature(store.data_file)['sha256'] == first['sha256']
+    assert len(store.list_versions()) == 2
+    
+    with pytest.raises(ValueError):
+        store.rollback('inexistente')
+
+def test_sync_data_file_imports_unknown_content_once(tmp_path):
+    store = version_store(tmp_path)
+    first = store.create_version(prepare_data(generate_leads(30, seed=1)))
+    
+    # Arquivo trocado à mão: vira uma nova versão na próxima leitura
+    generate_leads(50, seed=2).to_excel(store.data_file, index=False)
+    imported = store.current_id()
+    assert imported != first['id']
+    assert store.meta(imported)['origin'] == 'arquivo' and store.meta(imported)['rows'] == 50
+    
+    # Conteúdo igual ao de uma versão retida não é reimportado
+    shutil.copyfile(store.path(first['id']) / 'base_leads.xlsx', store.data_file)
+    assert store.current_id() == imported
+    assert len(store.list_versions()) == 2
+    
+    # Outro processo (nova instância) também reconhece o arquivo atual
+    assert version_store(tmp_path).current_id() == imported
+
+def test_sync_data_file_reports_invalid_file(tmp_path):
+    store = version_store(tmp_path)
+    first = store.create_version(prepare_data(generate_leads(30, seed=1)))
+    
+    generate_leads(10, seed=2).drop(columns=['Status']).to_excel(store.data_file, index=False)
+    assert store.current_id() == first['id']
+    assert store.sync_error is not None
+    assert len(store.list_versions()) == 1